@@ -0,0 +1,96 @@
+"""
+Local stand-in for the Azure OpenAI chat completions endpoint, for running
+the advisor offline.
+
+    python advisor_stub.py --port 8001 --delay 0.5
+
+then point the advisor at it:
+
+    AZURE_OPENAI_ENDPOINT=http://127.0.0.1:8001 AZURE_OPENAI_KEY=stub
+    AZURE_OPENAI_API_VERSION=2024-06-01 AZURE_OPENAI_DEPLOYMENT_NAME=stub
+"""
+import argparse
+import hashlib
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+COMPLETIONS_PATH = re.compile(r"^/openai/deployments/([^/]+)/chat/completions$")
+
+
+def stub_note(prompt):
+    # Deterministic per prompt so caching behaviour is observable
+    target = re.search(r"Target: ([^(\n]+)", prompt)
+    name = target.group(1).strip() if target else "this destination"
+    return f"Stub advice for {name} ({hashlib.sha1(prompt.encode('utf-8')).hexdigest()[:8]})."
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        match = COMPLETIONS_PATH.match(self.path.split("?", 1)[0])
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if match is None:
+            self._send(404, {"error": {"code": "404", "message": "Resource not found"}})
+            return
+
+        self.server.calls += 1
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        if self.server.fail:
+            self._send(500, {"error": {"code": "500", "message": "Stub failure"}})
+            return
+
+        messages = json.loads(body).get("messages", [])
+        prompt = messages[-1]["content"] if messages else ""
+        self._send(200, {
+            "id": f"chatcmpl-stub-{self.server.calls}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": match.group(1),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": stub_note(prompt)},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        })
+
+    def _send(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(port=0, delay=0.0, fail=False):
+    """Serve the stub on a background thread; returns (server, base_url)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    server.daemon_threads = True
+    server.delay = delay
+    server.fail = fail
+    server.calls = 0
+    threading.Thread(target=server.serve_forever, name="advisor-stub", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds to sleep per completion")
+    parser.add_argument("--fail", action="store_true", help="answer every completion with a 500")
+    args = parser.parse_args()
+    server, url = start_stub_server(args.port, args.delay, args.fail)
+    print(f"Advisor stub listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
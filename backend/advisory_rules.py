@@ -0,0 +1,242 @@
+import bisect
+import string
+
+import numpy as np
+
+# ========== MESSAGE TEMPLATES ==========
+# Per locale: rule id -> str.format-style template. Available placeholders:
+# {gpa} {budget} {total} {safe} {fast} {moonshots} {safe_fast}
+MESSAGES = {
+    "en": {
+        # Zero-paths handler: (consultant_note, risk_advisory) come as a pair
+        "zero_low_gpa": (
+            "With a GPA of {gpa}, most graduate programs have minimum requirements that aren't met. "
+            "This doesn't mean your goals are impossible—consider pathway programs, diploma courses, "
+            "or countries with more flexible academic requirements."
+        ),
+        "zero_low_gpa_risk": (
+            "🎓 Suggestion: Many countries accept GPA 6.0+. Focus on improving academics or "
+            "explore alternative entry routes like portfolio-based admissions."
+        ),
+        "zero_low_budget": (
+            "With ₹{budget}L, even the most affordable destinations (like Germany at ~₹12L) "
+            "become challenging. Consider scholarships, education loans, or part-time work options."
+        ),
+        "zero_low_budget_risk": (
+            "💰 Suggestion: Germany offers zero tuition but requires ~₹12L for living costs. "
+            "Look into DAAD scholarships or sponsored programs."
+        ),
+        "zero_blocked": (
+            "With GPA {gpa} and budget ₹{budget}L, no pathways currently meet "
+            "all thresholds. This usually means one constraint is blocking discovery."
+        ),
+        "zero_blocked_risk": (
+            "🔍 Suggestions: Try adjusting your budget slightly, or check if your GPA meets "
+            "minimum requirements (most countries need 6.0-7.0+)."
+        ),
+
+        # Empathy engine (tone-aware), by budget band and whether a safe bet matched
+        "tight_budget_safe": (
+            "With ₹{budget}L, we've identified {total} realistic paths. "
+            "Germany's zero-tuition model could be your strongest play—graduate debt-free with a clear PR route."
+        ),
+        "tight_budget_no_safe": (
+            "With ₹{budget}L, options are limited but not zero. "
+            "You have {total} path(s) available, though they carry higher risk. "
+            "Consider increasing budget to unlock safer routes like Germany."
+        ),
+        "sweet_spot_safe": (
+            "₹{budget}L opens {total} strategic paths. You're in the sweet spot—"
+            "Ireland's 1-year ROI vs Germany's debt-free route are both viable. Consider your risk appetite."
+        ),
+        "sweet_spot_no_safe": (
+            "₹{budget}L opens {total} paths, but none in the 'Safe Bets' category yet. "
+            "The options available are faster but carry more uncertainty. A small budget increase could unlock Germany."
+        ),
+        "strong_budget_safe": (
+            "Strong position with ₹{budget}L. You qualify for {total} countries "
+            "including premium destinations. Weigh brand value against PR timeline—they don't always align."
+        ),
+        # "{{user.gpa}}" renders literally, exactly as the original handler's
+        # (non f-string) message did; kept so output is unchanged
+        "strong_budget_no_safe": (
+            "With ₹{budget}L, you have {total} options but they're skewed toward higher-risk paths. "
+            "Check if your GPA (currently {{user.gpa}}) meets requirements for safer countries."
+        ),
+        "open_budget": (
+            "With ₹{budget}L, all doors are open. But remember: highest investment doesn't mean "
+            "highest return. A 94% PR rate often beats a 27% lottery."
+        ),
+
+        # Risk advisory, by which buckets matched
+        "risk_balanced": (
+            "📊 Your profile matches {safe} high-probability paths and {moonshots} "
+            "high-reward option(s). We recommend securing a safe bet before betting on moonshots."
+        ),
+        "risk_high": (
+            "⚠️ Currently, your profile primarily matches higher-risk paths. "
+            "Consider increasing budget or exploring GPA improvement options."
+        ),
+        "risk_fast": (
+            "⚡ You have {fast} fast-track option(s) available. These offer speed but moderate uncertainty. "
+            "A small budget increase could unlock safer alternatives."
+        ),
+        "risk_strong": "✅ Strong match. You have {safe_fast} paths with 60%+ PR success rates.",
+    },
+}
+
+# ========== RULE TABLES ==========
+ZERO_GPA_FLOOR = 6.0
+ZERO_BUDGET_FLOOR = 12
+
+# Empathy budget bands: < 15, < 30, < 45, 45+
+BUDGET_BANDS = (15, 30, 45)
+
+# (gpa below floor, budget below floor) -> (advice rule, risk rule)
+ZERO_RULES = {
+    (True, True): ("zero_low_gpa", "zero_low_gpa_risk"),
+    (True, False): ("zero_low_gpa", "zero_low_gpa_risk"),
+    (False, True): ("zero_low_budget", "zero_low_budget_risk"),
+    (False, False): ("zero_blocked", "zero_blocked_risk"),
+}
+
+# (budget band, has a safe bet) -> advice rule
+EMPATHY_RULES = {
+    (0, True): "tight_budget_safe",
+    (0, False): "tight_budget_no_safe",
+    (1, True): "sweet_spot_safe",
+    (1, False): "sweet_spot_no_safe",
+    (2, True): "strong_budget_safe",
+    (2, False): "strong_budget_no_safe",
+    (3, True): "open_budget",
+    (3, False): "open_budget",
+}
+
+
+def _risk_rule(has_moonshot, has_safe, has_fast):
+    if has_moonshot and has_safe:
+        return "risk_balanced"
+    if has_moonshot:
+        return "risk_high"
+    if has_fast and not has_safe:
+        return "risk_fast"
+    return "risk_strong"
+
+
+# (any moonshot, any safe bet, any fast track) -> risk rule
+RISK_RULES = {
+    (m, s, f): _risk_rule(m, s, f)
+    for m in (False, True) for s in (False, True) for f in (False, True)
+}
+
+
+TEMPLATE_FIELDS = ("gpa", "budget", "total", "safe", "fast", "moonshots", "safe_fast")
+
+
+def compile_template(template):
+    """
+    Pre-parse a template into a function taking TEMPLATE_FIELDS
+    positionally. Placeholders are checked here and rewritten to
+    positional ones ("{gpa:.1f}" -> "{0:.1f}"), so rendering is a single
+    str.format call on a template with nothing left to resolve.
+    """
+    index = {field: i for i, field in enumerate(TEMPLATE_FIELDS)}
+    source = []
+    for literal, field, spec, conversion in string.Formatter().parse(template):
+        source.append(literal.replace("{", "{{").replace("}", "}}"))
+        if field is None:
+            continue
+        if field not in index or conversion or "{" in spec:
+            raise ValueError(f"Unsupported placeholder {{{field}}} in template: {template!r}")
+        source.append("{" + str(index[field]) + (":" + spec if spec else "") + "}")
+    return "".join(source).format
+
+
+class AdvisoryEngine:
+    """Rule tables plus one locale's pre-parsed templates."""
+
+    def __init__(self, messages):
+        missing = (
+            {rule for pair in ZERO_RULES.values() for rule in pair}
+            | set(EMPATHY_RULES.values()) | set(RISK_RULES.values())
+        ) - set(messages)
+        if missing:
+            raise ValueError(f"Missing advisory templates: {', '.join(sorted(missing))}")
+        self.templates = {rule: compile_template(text) for rule, text in messages.items()}
+
+        # Integer codes for vectorised selection; code i is self.rules[i]
+        self.rules = tuple(messages)
+        code = {rule: i for i, rule in enumerate(self.rules)}
+        self._zero_codes = np.array([
+            [code[ZERO_RULES[(bool(g), bool(b))][i]] for g in (0, 1) for b in (0, 1)] for i in (0, 1)
+        ])
+        self._empathy_codes = np.array([code[EMPATHY_RULES[(band, bool(s))]] for band in range(4) for s in (0, 1)])
+        self._risk_codes = np.array([
+            code[RISK_RULES[(bool(m), bool(s), bool(f))]] for m in (0, 1) for s in (0, 1) for f in (0, 1)
+        ])
+
+        # Both tables resolved straight to compiled template pairs, so
+        # messages() is one dict lookup plus two template calls
+        self._zero_table = {
+            key: (self.templates[advice], self.templates[risk]) for key, (advice, risk) in ZERO_RULES.items()
+        }
+        self._table = {
+            (band, s, f, m): (self.templates[EMPATHY_RULES[(band, s)]], self.templates[RISK_RULES[(m, s, f)]])
+            for band in range(len(BUDGET_BANDS) + 1)
+            for s in (False, True) for f in (False, True) for m in (False, True)
+        }
+
+    def select(self, gpa, budget, safe_count, fast_count, moonshot_count):
+        """(advice rule, risk rule) for one profile; constant time."""
+        if safe_count + fast_count + moonshot_count == 0:
+            return ZERO_RULES[(gpa < ZERO_GPA_FLOOR, budget < ZERO_BUDGET_FLOOR)]
+        band = bisect.bisect_right(BUDGET_BANDS, budget)
+        return (
+            EMPATHY_RULES[(band, safe_count > 0)],
+            RISK_RULES[(moonshot_count > 0, safe_count > 0, fast_count > 0)],
+        )
+
+    def select_batch(self, gpa, budget, safe_count, fast_count, moonshot_count):
+        """select() over arrays; returns (advice codes, risk codes) indexing self.rules."""
+        gpa = np.asarray(gpa)
+        budget = np.asarray(budget)
+        safe = np.asarray(safe_count) > 0
+        fast = np.asarray(fast_count) > 0
+        moon = np.asarray(moonshot_count) > 0
+        zero = ~(safe | fast | moon)
+        zero_index = (gpa < ZERO_GPA_FLOOR) * 2 + (budget < ZERO_BUDGET_FLOOR)
+        band = np.searchsorted(BUDGET_BANDS, budget, side="right")
+        advice = np.where(zero, self._zero_codes[0][zero_index], self._empathy_codes[band * 2 + safe])
+        risk = np.where(zero, self._zero_codes[1][zero_index], self._risk_codes[moon * 4 + safe * 2 + fast])
+        return advice, risk
+
+    def render(self, rule, *values):
+        """Render rule with values in TEMPLATE_FIELDS order (see template_values)."""
+        return self.templates[rule](*values)
+
+    def messages(self, gpa, budget, safe_count, fast_count, moonshot_count):
+        """(consultant_note, risk_advisory) for one profile."""
+        if safe_count or fast_count or moonshot_count:
+            advice, risk = self._table[(
+                bisect.bisect_right(BUDGET_BANDS, budget), safe_count > 0, fast_count > 0, moonshot_count > 0
+            )]
+        else:
+            advice, risk = self._zero_table[(gpa < ZERO_GPA_FLOOR, budget < ZERO_BUDGET_FLOOR)]
+        total = safe_count + fast_count + moonshot_count
+        safe_fast = safe_count + fast_count
+        return (advice(gpa, budget, total, safe_count, fast_count, moonshot_count, safe_fast),
+                risk(gpa, budget, total, safe_count, fast_count, moonshot_count, safe_fast))
+
+
+def template_values(gpa, budget, safe_count, fast_count, moonshot_count):
+    """Template arguments in TEMPLATE_FIELDS order."""
+    return (gpa, budget, safe_count + fast_count + moonshot_count, safe_count, fast_count,
+            moonshot_count, safe_count + fast_count)
+
+
+ENGINES = {locale: AdvisoryEngine(messages) for locale, messages in MESSAGES.items()}
+
+
+def advisory_messages(gpa, budget, safe_count, fast_count, moonshot_count, locale="en"):
+    """(consultant_note, risk_advisory) for a profile's bucket counts."""
+    return ENGINES[locale].messages(gpa, budget, safe_count, fast_count, moonshot_count)
@@ -1,45 +1,201 @@
+import asyncio
 import os
-from dotenv import load_dotenv
-from openai import AzureOpenAI
-
-# 1. Load the secrets
-load_dotenv()
-
-def get_ai_advice(profile, country_data, db_data):
-    try:
-        # Initialize Azure Client
-        client = AzureOpenAI(
-            azure_endpoint = os.getenv("AZURE_OPENAI_ENDPOINT"), 
-            api_key=os.getenv("AZURE_OPENAI_KEY"),  
-            api_version=os.getenv("AZURE_OPENAI_API_VERSION")
-        )
+import time
+from collections import OrderedDict
+
+from coalescing import SingleFlight
+from instrumentation import METRICS
+
+SYSTEM_PROMPT = "You are a helpful, concise academic advisor."
+OFFLINE_NOTE = "AI Consultant is offline. Rely on the Risk Score above."
+
 
-        # The Prompt
-        prompt = f"""
+def build_prompt(profile, country_data):
+    """The advisor prompt for one country from discover_strategies."""
+    alerts = [alert['text'] for alert in country_data.get('policy_alerts', [])]
+    return f"""
         Act as a Senior Study Abroad Consultant.
         Write a short, strategic 2-sentence note for a student.
 
         Student: {profile.major_interest} | Budget: {profile.budget_max_lakhs}L
-        Target: {country_data['country']} (Risk Score: {country_data['match_score']}/100)
-        Trend Alert: {db_data.get('trend_alert', 'None')}
-        Risks: {", ".join(country_data['reasoning'])}
+        Target: {country_data['name']} (PR Success: {country_data['pr_success_rate']}/100, {country_data['financial_status']})
+        Trend Alert: {alerts[0] if alerts else 'None'}
+        Risks: {", ".join(alerts[1:]) or 'None'}
 
         Advice:
         """
 
-        # Call GPT-4o
-        response = client.chat.completions.create(
-            model=os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME"), 
+
+def deterministic_note(country_data):
+    """Curated note served while (or instead of) waiting on the model."""
+    return country_data.get('insider_insight') or OFFLINE_NOTE
+
+
+class AdvisorService:
+    """
+    Async advisor with one shared (connection-pooled) Azure client.
+
+    Calls are bounded by a semaphore and a per-call timeout, and successful
+    notes are cached by prompt for cache_ttl seconds. Concurrent requests
+    for a prompt that isn't cached yet share one model call. Failures and
+    timeouts fall back to OFFLINE_NOTE and are never cached.
+    """
+
+    def __init__(self, endpoint=None, api_key=None, api_version=None, deployment=None,
+                 max_concurrency=8, timeout=8.0, cache_ttl=3600.0, cache_size=2048):
+        self.endpoint = endpoint
+        self.api_key = api_key
+        self.api_version = api_version
+        self.deployment = deployment
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client = None
+        self._cache = OrderedDict()
+        self._flight = SingleFlight()
+
+    @classmethod
+    def from_env(cls):
+        # Secrets may come from a .env file. Loaded here rather than at
+        # import, like the SDK below, so deployments without the advisor
+        # never pay for either
+        try:
+            from dotenv import load_dotenv
+        except ImportError:  # optional: plain environment variables work without it
+            pass
+        else:
+            load_dotenv()
+        return cls(
+            endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
+            api_key=os.getenv("AZURE_OPENAI_KEY"),
+            api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
+            deployment=os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME"),
+            max_concurrency=int(os.getenv("ADVISOR_MAX_CONCURRENCY", "8")),
+            timeout=float(os.getenv("ADVISOR_TIMEOUT_SECONDS", "8")),
+            cache_ttl=float(os.getenv("ADVISOR_CACHE_TTL_SECONDS", "3600")),
+        )
+
+    @property
+    def configured(self):
+        return bool(self.endpoint and self.api_key and self.deployment)
+
+    @property
+    def client(self):
+        if self._client is None:
+            from openai import AsyncAzureOpenAI
+            self._client = AsyncAzureOpenAI(
+                azure_endpoint=self.endpoint,
+                api_key=self.api_key,
+                api_version=self.api_version,
+                timeout=self.timeout,
+                # The per-call timeout below is the whole budget; no retries inside it
+                max_retries=0,
+            )
+        return self._client
+
+    def cached(self, prompt):
+        entry = self._cache.get(prompt)
+        if entry is None:
+            return None
+        expires_at, note = entry
+        if expires_at < time.monotonic():
+            del self._cache[prompt]
+            return None
+        self._cache.move_to_end(prompt)
+        return note
+
+    def _remember(self, prompt, note):
+        self._cache[prompt] = (time.monotonic() + self.cache_ttl, note)
+        self._cache.move_to_end(prompt)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def _complete(self, prompt):
+        response = await self.client.chat.completions.create(
+            model=self.deployment,
             messages=[
-                {"role": "system", "content": "You are a helpful, concise academic advisor."},
+                {"role": "system", "content": SYSTEM_PROMPT},
                 {"role": "user", "content": prompt}
             ],
             temperature=0.7,
             max_tokens=100
         )
-
         return response.choices[0].message.content.strip()
 
-    except Exception as e:
-        print(f"Azure Error: {e}")
-        return "AI Consultant is offline. Rely on the Risk Score above."
+    def _call(self, prompt):
+        """The in-flight model call for prompt, starting one if needed."""
+        task, started = self._flight.start(prompt, lambda: self._advise_uncached(prompt))
+        METRICS.inc("advisor_cache_total", "miss" if started else "coalesced")
+        return task
+
+    async def advise_prompt(self, prompt):
+        note = self.cached(prompt)
+        if note is not None:
+            METRICS.inc("advisor_cache_total", "hit")
+            return note
+        # Shielded: one caller going away mustn't cancel the call for the rest
+        return await asyncio.shield(self._call(prompt))
+
+    async def _advise_uncached(self, prompt):
+        if not self.configured:
+            return OFFLINE_NOTE
+        start = time.perf_counter()
+        try:
+            async with self._semaphore:
+                # Timed inside the semaphore: model latency, not queueing
+                start = time.perf_counter()
+                note = await asyncio.wait_for(self._complete(prompt), self.timeout)
+        except asyncio.TimeoutError:
+            METRICS.observe("advisor_seconds", time.perf_counter() - start, "timeout")
+            print("Azure Error: timed out")
+            return OFFLINE_NOTE
+        except Exception as e:
+            METRICS.observe("advisor_seconds", time.perf_counter() - start, "error")
+            print(f"Azure Error: {e!r}")
+            return OFFLINE_NOTE
+        METRICS.observe("advisor_seconds", time.perf_counter() - start, "ok")
+        self._remember(prompt, note)
+        return note
+
+    async def advise(self, profile, country_data):
+        """AI note for one country; OFFLINE_NOTE if the model is unavailable."""
+        return await self.advise_prompt(build_prompt(profile, country_data))
+
+    def advise_nowait(self, profile, country_data):
+        """
+        Return (note, task) without waiting on the model.
+
+        A cached AI note comes back with task None. Otherwise the
+        deterministic note is returned and task fills the cache in the
+        background (await it for the AI note if you want it later).
+        """
+        prompt = build_prompt(profile, country_data)
+        note = self.cached(prompt)
+        if note is not None:
+            return note, None
+        return deterministic_note(country_data), self._call(prompt)
+
+    async def aclose(self):
+        for task in self._flight.tasks():
+            task.cancel()
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+
+_advisor = None
+
+
+def get_advisor():
+    """Process-wide AdvisorService configured from the environment."""
+    global _advisor
+    if _advisor is None:
+        _advisor = AdvisorService.from_env()
+    return _advisor
+
+
+async def close_advisor():
+    """Close the process-wide advisor, if anything ever created it."""
+    if _advisor is not None:
+        await _advisor.aclose()
@@ -0,0 +1,157 @@
+import json
+import weakref
+
+import numpy as np
+
+import advisory_rules
+from catalog import ARCHETYPES, MANAGEABLE_GAP, encode_json, encode_plain
+
+# financial_health codes used in batch output; -1 marks "not eligible"
+HEALTH_CLASSES = ("excellent", "manageable", "stretch")
+NOT_ELIGIBLE = -1
+
+
+class CatalogArrays:
+    """Column view of a CompiledCatalog for vectorised scoring."""
+
+    def __init__(self, catalog):
+        rows = catalog.rows
+        self.names = [r.name for r in rows]
+        self.archetypes = [r.archetype for r in rows]
+        # Zero-copy views of the catalog's float64 columns
+        self.min_gpa = np.frombuffer(catalog.columns["min_gpa"], dtype=np.float64)
+        self.total_cost = np.frombuffer(catalog.columns["total_cost"], dtype=np.float64)
+        self.roi_percentage = np.array([r.roi_percentage for r in rows], dtype=np.float64)
+        # One-hot archetype matrix (countries x archetypes) so per-profile
+        # bucket counts are a single matmul
+        self.archetype_onehot = np.array(
+            [[r.archetype == a for a in ARCHETYPES] for r in rows], dtype=np.int32
+        ).reshape(len(rows), len(ARCHETYPES))
+
+
+_arrays = weakref.WeakKeyDictionary()
+
+
+def catalog_arrays(catalog):
+    arrays = _arrays.get(catalog)
+    if arrays is None:
+        arrays = _arrays[catalog] = CatalogArrays(catalog)
+    return arrays
+
+
+class BatchResult:
+    """
+    Scores for n profiles against m countries.
+
+    eligible/gap/health are (n, m) matrices; counts is (n, len(ARCHETYPES)).
+    advice_rule/risk_rule index engine.rules (the consultant_note and
+    risk_advisory each profile would get from /api/recommend).
+    """
+
+    def __init__(self, arrays, gpa, budget, eligible, gap, health, counts, engine):
+        self.arrays = arrays
+        self.gpa = gpa
+        self.budget = budget
+        self.eligible = eligible
+        self.gap = gap
+        self.health = health
+        self.counts = counts
+        self.engine = engine
+        self.advice_rule, self.risk_rule = engine.select_batch(gpa, budget, counts[:, 0], counts[:, 1], counts[:, 2])
+
+    def __len__(self):
+        return self.eligible.shape[0]
+
+    def columns(self):
+        counts = self.counts
+        return {
+            "countries": self.arrays.names,
+            "archetypes": self.arrays.archetypes,
+            "health_classes": list(HEALTH_CLASSES),
+            "advisory_rules": list(self.engine.rules),
+            "columns": {
+                "total_options": counts.sum(axis=1).tolist(),
+                "safe_count": counts[:, 0].tolist(),
+                "fast_count": counts[:, 1].tolist(),
+                "moonshot_count": counts[:, 2].tolist(),
+                "advice_rule": self.advice_rule.tolist(),
+                "risk_rule": self.risk_rule.tolist(),
+                # One list per country, indexed by profile
+                "financial_health": self.health.T.tolist(),
+                "gap_value": self.gap.T.tolist(),
+            }
+        }
+
+    def encode(self, **head):
+        """
+        {**head, **columns()} as UTF-8 JSON bytes, exactly as a JSONResponse
+        would render it but without walking the lists through
+        jsonable_encoder. gap_value is the only float column, so it goes
+        through encode_json and the rest through encode_plain.
+        """
+        columns = self.columns()
+        gap_value = columns["columns"].pop("gap_value")
+        body = encode_plain({**head, **columns})
+        # gap_value was the last key of "columns", itself the last key
+        return body[:-2] + b',"gap_value":' + encode_json(gap_value).encode("utf-8") + b"}}"
+
+    def iter_ndjson(self, chunk_size=1000):
+        """Yield NDJSON-encoded bytes, one line per profile, in chunks."""
+        names = self.arrays.names
+        archetypes = self.arrays.archetypes
+        for start in range(0, len(self), chunk_size):
+            stop = min(start + chunk_size, len(self))
+            health = self.health[start:stop].tolist()
+            gap = self.gap[start:stop].tolist()
+            counts = self.counts[start:stop].tolist()
+            gpa = self.gpa[start:stop].tolist()
+            budget = self.budget[start:stop].tolist()
+            lines = []
+            for offset, (h_row, g_row, c_row) in enumerate(zip(health, gap, counts)):
+                consultant_note, risk_advisory = self.engine.messages(gpa[offset], budget[offset], *c_row)
+                matches = [
+                    {
+                        "name": names[j],
+                        "archetype": archetypes[j],
+                        "financial_health": HEALTH_CLASSES[h],
+                        "gap_value": g_row[j],
+                    }
+                    for j, h in enumerate(h_row) if h != NOT_ELIGIBLE
+                ]
+                lines.append(json.dumps({
+                    "index": start + offset,
+                    "meta": {
+                        "total_options": sum(c_row),
+                        "safe_count": c_row[0],
+                        "fast_count": c_row[1],
+                        "moonshot_count": c_row[2]
+                    },
+                    "matches": matches,
+                    "consultant_note": consultant_note,
+                    "risk_advisory": risk_advisory
+                }, ensure_ascii=False))
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def score_profiles(gpa, budget, catalog, locale="en"):
+    """
+    Score a whole profile matrix against the catalog in one pass.
+
+    Same rules as discover_strategies (gpa >= min_gpa to be eligible, gap =
+    total_cost - budget, health bands at 0 and MANAGEABLE_GAP), evaluated as
+    (n, m) array ops instead of a Python loop per profile.
+    """
+    arrays = catalog_arrays(catalog)
+    gpa = np.asarray(gpa, dtype=np.float64).ravel()
+    budget = np.asarray(budget, dtype=np.float64).ravel()
+    if gpa.shape != budget.shape:
+        raise ValueError("gpa and budget must have the same length")
+
+    eligible = gpa[:, None] >= arrays.min_gpa
+    gap = arrays.total_cost - budget[:, None]
+    health = (gap > 0).astype(np.int8)
+    health += gap > MANAGEABLE_GAP
+    health[~eligible] = NOT_ELIGIBLE
+    counts = eligible.astype(np.int32) @ arrays.archetype_onehot
+
+    return BatchResult(arrays, gpa, budget, eligible, gap, health, counts, advisory_rules.ENGINES[locale])
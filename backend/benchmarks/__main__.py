@@ -0,0 +1,118 @@
+"""
+Recommendation path benchmarks.
+
+    python -m benchmarks --out bench.json
+    python -m benchmarks --rows 6,1000 --baseline bench.json
+
+Cold-start scenarios (import, readiness, first request; see
+benchmarks.startup) run in fresh processes after the rest.
+
+Writes machine-readable JSON (--out, or stdout) and, with --baseline,
+compares p50 latency per (scenario, catalog size) against a stored run,
+exiting non-zero if anything regressed by more than --tolerance.
+"""
+import argparse
+import json
+import platform
+import sys
+from datetime import datetime, timezone
+
+import numpy as np
+
+from benchmarks import startup
+from benchmarks.recommend import SCENARIOS, run_suite
+
+
+def compare(results, baseline, tolerance):
+    """[(result, baseline_result, ratio)] for comparable rows, plus whether any regressed."""
+    previous = {(r["scenario"], r["catalog_rows"], r.get("view")): r for r in baseline["results"]}
+    rows = []
+    regressed = False
+    for result in results:
+        before = previous.get((result["scenario"], result["catalog_rows"], result.get("view")))
+        if before is None:
+            continue
+        ratio = result["p50_ms"] / before["p50_ms"] if before["p50_ms"] else float("inf")
+        regressed |= ratio > 1 + tolerance
+        rows.append((result, before, ratio))
+    return rows, regressed
+
+
+def column(value, width, spec):
+    return f"{'-':>{width}}" if value is None else f"{value:>{width}{spec}}"
+
+
+def print_table(results, comparisons, stream):
+    ratios = {(r["scenario"], r["catalog_rows"]): ratio for r, _, ratio in comparisons}
+    print(f"{'scenario':<20}{'rows':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'rps':>10}{'KiB/req':>10}"
+          f"{'catalog MiB':>13}{'vs base':>9}",
+          file=stream)
+    for r in results:
+        ratio = ratios.get((r["scenario"], r["catalog_rows"]))
+        catalog_mib = None if r["catalog_kib"] is None else r["catalog_kib"] / 1024
+        print(f"{r['scenario']:<20}{r['catalog_rows']:>8}{r['p50_ms']:>10.3f}{r['p95_ms']:>10.3f}{r['p99_ms']:>10.3f}"
+              f"{column(r['rps'], 10, '.0f')}{column(r['alloc_peak_kib_p50'], 10, '.1f')}{column(catalog_mib, 13, '.1f')}"
+              f"{'' if ratio is None else f'{ratio:>8.2f}x':>9}",
+              file=stream)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", default="6,1000,100000", help="comma-separated synthetic catalog sizes")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--profiles", type=int, default=2000, help="distinct synthetic profiles to cycle through")
+    parser.add_argument("--distribution", choices=("realistic", "uniform"), default="realistic")
+    parser.add_argument("--view", choices=("full", "summary"), default="full")
+    parser.add_argument("--seconds", type=float, default=2.0, help="time budget per scenario")
+    parser.add_argument("--iterations", type=int, default=5000, help="max iterations per scenario")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--startup-rows", default="6,1000", help="catalog sizes for the cold-start scenarios")
+    parser.add_argument("--startup-runs", type=int, default=3, help="fresh processes per cold-start mode; 0 skips")
+    parser.add_argument("--out", help="write results JSON here instead of stdout")
+    parser.add_argument("--baseline", help="results JSON from an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed p50 slowdown vs baseline")
+    args = parser.parse_args(argv)
+
+    results = run_suite(
+        rows_list=[int(r) for r in args.rows.split(",")],
+        profiles=args.profiles,
+        distribution=args.distribution,
+        seconds=args.seconds,
+        iterations=args.iterations,
+        view=args.view,
+        scenarios=[s for s in args.scenarios.split(",") if s],
+        seed=args.seed,
+    )
+    if args.startup_runs > 0:
+        results += startup.run([int(r) for r in args.startup_rows.split(",")], args.startup_runs, args.seed)
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "argv": sys.argv[1:] if argv is None else argv,
+        },
+        "results": results,
+    }
+
+    comparisons, regressed = [], False
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            comparisons, regressed = compare(results, json.load(f), args.tolerance)
+        report["baseline"] = {"path": args.baseline, "tolerance": args.tolerance, "regressed": regressed}
+
+    print_table(results, comparisons, sys.stderr)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""
+Advisory message selection: the rule-table engine against the original
+if/elif ladders from the /api/recommend handler (kept verbatim below).
+
+    python -m benchmarks.advisory_rules
+"""
+import argparse
+import itertools
+import json
+import time
+
+import numpy as np
+
+import advisory_rules
+
+
+def legacy_messages(gpa, budget, safe_count, fast_count, moonshot_count):
+    total_options = safe_count + fast_count + moonshot_count
+
+    # ========== ZERO-PATHS HANDLER ==========
+    if total_options == 0:
+        if gpa < 6.0:
+            advisor_msg = (
+                f"With a GPA of {gpa}, most graduate programs have minimum requirements that aren't met. "
+                "This doesn't mean your goals are impossible—consider pathway programs, diploma courses, "
+                "or countries with more flexible academic requirements."
+            )
+            risk_note = (
+                "🎓 Suggestion: Many countries accept GPA 6.0+. Focus on improving academics or "
+                "explore alternative entry routes like portfolio-based admissions."
+            )
+        elif budget < 12:
+            advisor_msg = (
+                f"With ₹{budget}L, even the most affordable destinations (like Germany at ~₹12L) "
+                "become challenging. Consider scholarships, education loans, or part-time work options."
+            )
+            risk_note = (
+                "💰 Suggestion: Germany offers zero tuition but requires ~₹12L for living costs. "
+                "Look into DAAD scholarships or sponsored programs."
+            )
+        else:
+            advisor_msg = (
+                f"With GPA {gpa} and budget ₹{budget}L, no pathways currently meet "
+                "all thresholds. This usually means one constraint is blocking discovery."
+            )
+            risk_note = (
+                "🔍 Suggestions: Try adjusting your budget slightly, or check if your GPA meets "
+                "minimum requirements (most countries need 6.0-7.0+)."
+            )
+
+        return advisor_msg, risk_note
+    # ========== END ZERO-PATHS HANDLER ==========
+
+    # ========== EMPATHY ENGINE (TONE-AWARE) ==========
+    has_safe_options = safe_count > 0
+    
+    if budget < 15:
+        if has_safe_options:
+            advisor_msg = (
+                f"With ₹{budget}L, we've identified {total_options} realistic paths. "
+                "Germany's zero-tuition model could be your strongest play—graduate debt-free with a clear PR route."
+            )
+        else:
+            advisor_msg = (
+                f"With ₹{budget}L, options are limited but not zero. "
+                f"You have {total_options} path(s) available, though they carry higher risk. "
+                "Consider increasing budget to unlock safer routes like Germany."
+            )
+    elif budget < 30:
+        if has_safe_options:
+            advisor_msg = (
+                f"₹{budget}L opens {total_options} strategic paths. You're in the sweet spot—"
+                "Ireland's 1-year ROI vs Germany's debt-free route are both viable. Consider your risk appetite."
+            )
+        else:
+            advisor_msg = (
+                f"₹{budget}L opens {total_options} paths, but none in the 'Safe Bets' category yet. "
+                "The options available are faster but carry more uncertainty. A small budget increase could unlock Germany."
+            )
+    elif budget < 45:
+        if has_safe_options:
+            advisor_msg = (
+                f"Strong position with ₹{budget}L. You qualify for {total_options} countries "
+                "including premium destinations. Weigh brand value against PR timeline—they don't always align."
+            )
+        else:
+            advisor_msg = (
+                f"With ₹{budget}L, you have {total_options} options but they're skewed toward higher-risk paths. "
+                "Check if your GPA (currently {user.gpa}) meets requirements for safer countries."
+            )
+    else:
+        advisor_msg = (
+            f"With ₹{budget}L, all doors are open. But remember: highest investment doesn't mean "
+            "highest return. A 94% PR rate often beats a 27% lottery."
+        )
+    # ========== END EMPATHY ENGINE ==========
+
+    # ========== RISK ADVISORY ==========
+    if moonshot_count > 0 and safe_count > 0:
+        risk_note = (
+            f"📊 Your profile matches {safe_count} high-probability paths and {moonshot_count} "
+            "high-reward option(s). We recommend securing a safe bet before betting on moonshots."
+        )
+    elif moonshot_count > 0 and safe_count == 0:
+        risk_note = (
+            "⚠️ Currently, your profile primarily matches higher-risk paths. "
+            "Consider increasing budget or exploring GPA improvement options."
+        )
+    elif fast_count > 0 and safe_count == 0:
+        risk_note = (
+            f"⚡ You have {fast_count} fast-track option(s) available. These offer speed but moderate uncertainty. "
+            "A small budget increase could unlock safer alternatives."
+        )
+    else:
+        risk_note = f"✅ Strong match. You have {safe_count + fast_count} paths with 60%+ PR success rates."
+    # ========== END RISK ADVISORY ==========
+
+    return advisor_msg, risk_note
+
+
+def profile_grid():
+    gpas = [0.0, 5.0, 5.99, 6.0, 6.5, 7.0, 9.5]
+    budgets = [0.0, 5.0, 11.9, 12.0, 14.99, 15.0, 22.5, 29.99, 30.0, 44.0, 45.0, 100.0]
+    counts = range(3)
+    return list(itertools.product(gpas, budgets, counts, counts, counts))
+
+
+def check_equivalence(grid):
+    engine = advisory_rules.ENGINES["en"]
+    for profile in grid:
+        assert engine.messages(*profile) == legacy_messages(*profile), profile
+
+    columns = np.array(grid).T
+    advice, risk = engine.select_batch(*columns)
+    for profile, a, r in zip(grid, advice, risk):
+        assert (engine.rules[a], engine.rules[r]) == engine.select(*profile), profile
+
+
+def time_per_call(fn, grid, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for profile in grid:
+            fn(*profile)
+    return (time.perf_counter() - start) / (repeat * len(grid))
+
+
+def run(repeat=20):
+    grid = profile_grid()
+    check_equivalence(grid)
+    engine = advisory_rules.ENGINES["en"]
+
+    columns = np.array(grid).T
+    start = time.perf_counter()
+    for _ in range(repeat):
+        engine.select_batch(*columns)
+    batch_seconds = (time.perf_counter() - start) / (repeat * len(grid))
+
+    return {
+        "benchmark": "advisory_rules",
+        "profiles": len(grid),
+        "legacy_us_per_profile": time_per_call(legacy_messages, grid, repeat) * 1e6,
+        "engine_us_per_profile": time_per_call(engine.messages, grid, repeat) * 1e6,
+        "engine_select_us_per_profile": time_per_call(engine.select, grid, repeat) * 1e6,
+        "engine_select_batch_us_per_profile": batch_seconds * 1e6,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    print(json.dumps(run(args.repeat), indent=2))
@@ -0,0 +1,132 @@
+"""
+Burst load: waves of concurrent, mostly identical POST /api/recommend
+calls from a handful of clients (a campaign link shared thousands of
+times), in-process.
+
+    python -m benchmarks.burst --requests 2000 --distinct 5 --rows 1000
+
+Runs the same burst against the plain app, the app behind
+CoalescingMiddleware and the app behind a per-client RateLimitMiddleware
+(in-memory buckets), and a burst of identical advisor prompts against a
+stand-in model that takes --advisor-delay seconds per call.
+
+Every response write yields to the event loop, as a socket write under
+backpressure does; without that, in-process requests never overlap.
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter
+
+import httpx
+
+import ai_advisor
+import core_engine
+import main
+from benchmarks.harness import summarize
+from benchmarks.synthetic import synthetic_catalog, synthetic_profiles
+from coalescing import CoalescingMiddleware
+from instrumentation import METRICS
+from rate_limit import MemoryBuckets, RateLimitMiddleware
+
+
+def yielding(app):
+    async def wrapped(scope, receive, send):
+        async def send_and_yield(message):
+            await send(message)
+            await asyncio.sleep(0)
+        await app(scope, receive, send_and_yield)
+    return wrapped
+
+
+def counter_total(name):
+    family = METRICS.families.get(name)
+    return sum(family.series.values()) if family else 0
+
+
+async def burst(app, payloads, requests, concurrency, clients):
+    transports = [httpx.ASGITransport(app=yielding(app), client=(f"10.0.0.{i + 1}", 1000)) for i in range(clients)]
+    http = [httpx.AsyncClient(transport=t, base_url="http://bench") for t in transports]
+    latencies = []
+    statuses = Counter()
+
+    async def post(i):
+        start = time.perf_counter()
+        response = await http[i % clients].post("/api/recommend", json=payloads[i % len(payloads)])
+        latencies.append(time.perf_counter() - start)
+        statuses[response.status_code] += 1
+
+    coalesced = counter_total("requests_coalesced_total")
+    start = time.perf_counter()
+    try:
+        for wave in range(0, requests, concurrency):
+            # Each wave starts cold, as after a catalog reload
+            main.RESPONSE_CACHE.clear()
+            await asyncio.gather(*(post(i) for i in range(wave, min(wave + concurrency, requests))))
+    finally:
+        for client in http:
+            await client.aclose()
+    return {
+        **summarize(latencies, time.perf_counter() - start),
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "coalesced": counter_total("requests_coalesced_total") - coalesced,
+    }
+
+
+async def advisor_burst(prompts, distinct, delay):
+    advisor = ai_advisor.AdvisorService(endpoint="http://bench", api_key="bench", deployment="bench")
+    calls = 0
+
+    async def complete(prompt):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(delay)
+        return f"note {hash(prompt)}"
+
+    advisor._complete = complete
+    start = time.perf_counter()
+    await asyncio.gather(*(advisor.advise_prompt(f"prompt {i % distinct}") for i in range(prompts)))
+    return {"prompts": prompts, "distinct": distinct, "model_calls": calls, "seconds": time.perf_counter() - start}
+
+
+def run(requests=2000, distinct=5, concurrency=200, rows=1000, clients=10, rate=20.0, burst_size=40.0,
+        advisor_delay=0.05, seed=0):
+    payloads = synthetic_profiles(distinct, seed)
+    original = core_engine.get_catalog()
+    core_engine.STORE.publish(synthetic_catalog(rows, seed))
+    loop = asyncio.new_event_loop()
+    configs = {
+        "plain": main.app,
+        "coalesced": CoalescingMiddleware(main.app),
+        "rate_limited": RateLimitMiddleware(main.app, MemoryBuckets(rate, burst_size)),
+    }
+    results = []
+    try:
+        for name, app in configs.items():
+            stats = loop.run_until_complete(burst(app, payloads, requests, concurrency, clients))
+            results.append({"benchmark": "burst", "config": name, "rows": rows, "requests": requests,
+                            "distinct": distinct, "concurrency": concurrency, "clients": clients, **stats})
+        results.append({"benchmark": "advisor_burst",
+                        **loop.run_until_complete(advisor_burst(requests, distinct, advisor_delay))})
+    finally:
+        core_engine.STORE.publish(original)
+        main.RESPONSE_CACHE.clear()
+        loop.close()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--distinct", type=int, default=5, help="distinct profiles in the burst")
+    parser.add_argument("--concurrency", type=int, default=200, help="requests in flight per wave")
+    parser.add_argument("--rows", type=int, default=1000, help="synthetic catalog size")
+    parser.add_argument("--clients", type=int, default=10, help="distinct client IPs")
+    parser.add_argument("--rate", type=float, default=20.0, help="rate limit, requests/second per client")
+    parser.add_argument("--burst", type=float, default=40.0, help="rate limit bucket size")
+    parser.add_argument("--advisor-delay", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(json.dumps(run(args.requests, args.distinct, args.concurrency, args.rows, args.clients,
+                         args.rate, args.burst, args.advisor_delay, args.seed), indent=2))
@@ -0,0 +1,61 @@
+"""
+Time a full catalog reload (read + validate + compile + swap) for a
+synthetic data file of N rows, and attaching to the same catalog as a
+shared segment (what every worker but the first does in shared mode).
+
+    python -m benchmarks.catalog_load --rows 10000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.harness import retained_memory
+from benchmarks.synthetic import synthetic_catalog_file
+from catalog_store import CatalogStore, load_catalog
+from shared_catalog import Segment, SharedCatalogStore
+
+
+def run(rows=10000, repeat=5):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "countries.json")
+        synthetic_catalog_file(rows, path)
+        store = CatalogStore(path)
+        timings = []
+        for i in range(repeat):
+            # Touch the content so reload() doesn't short-circuit on an unchanged digest
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(" ")
+            start = time.perf_counter()
+            store.reload()
+            timings.append(time.perf_counter() - start)
+        _, catalog_kib = retained_memory(lambda: load_catalog(path))
+
+        shared = SharedCatalogStore(path, os.path.join(tmp, "shared"))
+        segment = os.path.join(shared.directory, shared.segment)
+        start = time.perf_counter()
+        Segment(segment).catalog()
+        attach_seconds = time.perf_counter() - start
+        _, shared_kib = retained_memory(lambda: Segment(segment).catalog())
+        segment_kib = os.path.getsize(segment) / 1024
+    return {
+        "benchmark": "catalog_load",
+        "rows": rows,
+        "reload_seconds_min": min(timings),
+        "reload_seconds_max": max(timings),
+        "catalog_kib": catalog_kib,
+        "bytes_per_row": catalog_kib * 1024 / rows,
+        "attach_seconds": attach_seconds,
+        "shared_kib": shared_kib,
+        "shared_bytes_per_row": shared_kib * 1024 / rows,
+        "segment_kib": segment_kib,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    print(json.dumps(run(args.rows, args.repeat), indent=2))
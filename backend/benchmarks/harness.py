@@ -0,0 +1,100 @@
+"""Timing and allocation helpers shared by the benchmarks."""
+import asyncio
+import gc
+import time
+import tracemalloc
+
+import numpy as np
+
+
+def summarize(latencies, elapsed):
+    ms = np.asarray(latencies) * 1000
+    return {
+        "iterations": len(latencies),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "mean_ms": float(ms.mean()),
+        "rps": len(latencies) / elapsed if elapsed else None,
+    }
+
+
+def measure(fn, args_list, max_iterations, max_seconds, min_iterations=3):
+    """
+    Call fn(*args) cycling through args_list until max_iterations or
+    max_seconds (but at least min_iterations), timing each call.
+    """
+    latencies = []
+    start = time.perf_counter()
+    deadline = start + max_seconds
+    for i in range(max_iterations):
+        args = args_list[i % len(args_list)]
+        t0 = time.perf_counter()
+        fn(*args)
+        t1 = time.perf_counter()
+        latencies.append(t1 - t0)
+        if t1 > deadline and i + 1 >= min_iterations:
+            break
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def measure_async(fn, args_list, max_iterations, max_seconds, min_iterations=3, loop=None):
+    """
+    measure() for a coroutine function, run on loop (for state bound to it,
+    such as an httpx client), or on a fresh loop via asyncio.run().
+    """
+    async def run():
+        latencies = []
+        start = time.perf_counter()
+        deadline = start + max_seconds
+        for i in range(max_iterations):
+            args = args_list[i % len(args_list)]
+            t0 = time.perf_counter()
+            await fn(*args)
+            t1 = time.perf_counter()
+            latencies.append(t1 - t0)
+            if t1 > deadline and i + 1 >= min_iterations:
+                break
+        return summarize(latencies, time.perf_counter() - start)
+
+    if loop is None:
+        return asyncio.run(run())
+    return loop.run_until_complete(run())
+
+
+def retained_memory(build):
+    """
+    (result, KiB) for build(): traced memory still allocated once it has
+    returned and garbage has been collected, i.e. what the result keeps alive.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = build()
+        gc.collect()
+        retained = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return result, retained / 1024
+
+
+def allocation_profile(fn, args_list, samples=20, loop=None):
+    """
+    Median and max of the peak traced allocation (KiB) made by one call.
+    Run separately from the timing loop: tracemalloc slows everything down.
+    """
+    peaks = []
+    tracemalloc.start()
+    try:
+        for i in range(min(samples, max(len(args_list), 1))):
+            args = args_list[i % len(args_list)]
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            result = fn(*args)
+            if loop is not None:
+                loop.run_until_complete(result)
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+    kib = np.asarray(peaks) / 1024
+    return {"alloc_peak_kib_p50": float(np.median(kib)), "alloc_peak_kib_max": float(kib.max())}
@@ -0,0 +1,122 @@
+"""
+The recommendation path, stage by stage, over synthetic catalogs:
+
+  engine_match     bisect + bucket lookup (core_engine.match_strategies)
+  engine_discover  discover_strategies, building the full response dicts
+  engine_rank      ranking.rank_buckets, top 10 per bucket by priority score
+  serialize        messages + JSON assembly for pre-matched rows
+  asgi             POST /api/recommend in-process, response cache on
+  asgi_uncached    the same with the response cache cleared per request
+  asgi_fast        asgi through the fast path (fast_path, RECOMMEND_FAST_PATH)
+  asgi_fast_uncached  asgi_uncached through the fast path
+
+The fast-path scenarios first check that both paths return the same bytes.
+"""
+import asyncio
+
+import httpx
+
+import core_engine
+import fast_path
+import main
+import ranking
+from benchmarks.harness import allocation_profile, measure, measure_async, retained_memory
+from benchmarks.synthetic import synthetic_catalog, synthetic_profiles
+
+SCENARIOS = ("engine_match", "engine_discover", "engine_rank", "serialize", "asgi", "asgi_uncached",
+             "asgi_fast", "asgi_fast_uncached")
+
+
+def to_profile(user):
+    return core_engine.UserProfile(
+        current_degree=user.degree,
+        gpa=user.gpa,
+        major_interest=user.major,
+        budget_max_lakhs=user.budget,
+        priority_goal=user.priority,
+        funding_source=user.funding_source,
+        target_intake=user.target_intake
+    )
+
+
+def run_suite(rows_list=(6, 1000, 100000), profiles=2000, distribution="realistic", seconds=2.0,
+              iterations=5000, view="full", scenarios=SCENARIOS, seed=0, alloc_samples=20):
+    payloads = synthetic_profiles(profiles, seed, distribution)
+    users = [main.UserRequest(**p) for p in payloads]
+    user_profiles = [to_profile(u) for u in users]
+
+    loop = asyncio.new_event_loop()
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bench")
+    params = {"view": view}
+
+    async def post(payload, fast=False):
+        fast_path.ENABLED = fast
+        response = await client.post("/api/recommend", json=payload, params=params)
+        response.raise_for_status()
+        return response.content
+
+    async def post_uncached(payload, fast=False):
+        main.RESPONSE_CACHE.clear()
+        return await post(payload, fast)
+
+    async def same_bytes(payloads):
+        for payload in payloads:
+            if await post_uncached(payload) != await post_uncached(payload, fast=True):
+                raise AssertionError(f"fast path output differs for {payload}")
+
+    original = core_engine.get_catalog()
+    enabled = fast_path.ENABLED
+    results = []
+    try:
+        for rows in rows_list:
+            catalog, catalog_kib = retained_memory(lambda: synthetic_catalog(rows, seed))
+            core_engine.STORE.publish(catalog)
+            main.RESPONSE_CACHE.clear()
+            projection = main.resolve_fields(catalog, view, None)
+
+            stages = {
+                "engine_match": (
+                    lambda p: core_engine.match_strategies(p, catalog),
+                    [(p,) for p in user_profiles], False),
+                "engine_discover": (
+                    lambda p: core_engine.discover_strategies(p, catalog),
+                    [(p,) for p in user_profiles], False),
+                "engine_rank": (
+                    lambda u: ranking.rank_buckets(catalog, u.gpa, u.budget, u.priority, "score", 10),
+                    [(u,) for u in users], False),
+                "serialize": (
+                    main.render_recommendation,
+                    [(u, catalog.match(u.gpa), projection) for u in users], False),
+                "asgi": (post, [(p,) for p in payloads], True),
+                "asgi_uncached": (post_uncached, [(p,) for p in payloads], True),
+                "asgi_fast": (post, [(p, True) for p in payloads], True),
+                "asgi_fast_uncached": (post_uncached, [(p, True) for p in payloads], True),
+            }
+            if any(name.startswith("asgi_fast") for name in scenarios):
+                loop.run_until_complete(same_bytes(payloads[:50]))
+            for name in scenarios:
+                fn, args_list, is_async = stages[name]
+                hits, misses = main.RESPONSE_CACHE.hits, main.RESPONSE_CACHE.misses
+                if is_async:
+                    stats = measure_async(fn, args_list, iterations, seconds, loop=loop)
+                else:
+                    stats = measure(fn, args_list, iterations, seconds)
+                hits, misses = main.RESPONSE_CACHE.hits - hits, main.RESPONSE_CACHE.misses - misses
+                allocs = allocation_profile(fn, args_list, alloc_samples, loop=loop if is_async else None)
+                results.append({
+                    "scenario": name,
+                    "catalog_rows": rows,
+                    "view": view,
+                    "distribution": distribution,
+                    **stats,
+                    **allocs,
+                    "cache_hit_ratio": hits / (hits + misses) if hits + misses else None,
+                    "catalog_kib": catalog_kib,
+                })
+    finally:
+        fast_path.ENABLED = enabled
+        core_engine.STORE.publish(original)
+        main.RESPONSE_CACHE.clear()
+        loop.run_until_complete(client.aclose())
+        loop.close()
+    return results
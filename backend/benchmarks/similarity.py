@@ -0,0 +1,141 @@
+"""
+Similar-profile search (similarity.SimilarityIndex) over synthetic
+historical records.
+
+    python -m benchmarks.similarity --records 1000000 --k 20
+
+Reports segment write and load time, query latency (p50/p95/p99), recall
+against an exact brute-force scan of the same distance, and the cost of
+appending batches (and of queries while the appended tail is merged in
+the background, and once it has been).
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+import similarity
+from benchmarks.harness import measure
+from benchmarks.synthetic import INTAKES, MAJORS, synthetic_profiles
+
+DEGREES = ("B.Tech", "B.Sc", "BBA", "B.Com", "BA")
+PRIORITIES = ("High ROI", "PR Pathway", "Low Cost", "Fast Track")
+FUNDING = ("Self", "Loan", "Scholarship", "Family")
+# Destinations by budget band, cheapest first
+DESTINATIONS = (("germany", "ireland"), ("ireland", "canada", "germany"), ("canada", "uk", "australia"),
+                ("usa", "uk", "australia"))
+
+
+def synthetic_records(n, seed=0):
+    rng = np.random.default_rng(seed)
+    gpa = np.clip(rng.normal(7.2, 0.9, n), 4.0, 10.0).round(2)
+    budget = np.clip(rng.lognormal(np.log(25), 0.5, n), 5, 150).round(1)
+    band = np.searchsorted((15, 30, 45), budget)
+    pick = rng.integers(0, 3, n)
+    columns = {
+        "degree": rng.integers(0, len(DEGREES), n),
+        "major": rng.integers(0, len(MAJORS), n),
+        "priority": rng.integers(0, len(PRIORITIES), n),
+        "funding_source": rng.integers(0, len(FUNDING), n),
+    }
+    return [
+        {
+            "gpa": float(gpa[i]),
+            "budget": float(budget[i]),
+            "degree": DEGREES[columns["degree"][i]],
+            "major": MAJORS[columns["major"][i]],
+            "priority": PRIORITIES[columns["priority"][i]],
+            "funding_source": FUNDING[columns["funding_source"][i]],
+            "destination": DESTINATIONS[band[i]][pick[i] % len(DESTINATIONS[band[i]])],
+            "target_intake": INTAKES[i % len(INTAKES)],
+        }
+        for i in range(n)
+    ]
+
+
+class Profile:
+    def __init__(self, payload):
+        self.gpa = payload["gpa"]
+        self.budget = payload["budget"]
+        self.degree = payload["degree"]
+        self.major = payload["major"]
+        self.priority = payload["priority"]
+        self.funding_source = "Self"
+
+
+def exact(index, profile, k):
+    """Brute-force k nearest under the same distance, as (sorted columns row) ids."""
+    columns = index._state[0].columns
+    distance = index._distances(columns, np.arange(len(columns["gpa"])), index.query(profile))
+    return set(np.argsort(distance, kind="stable")[:k].tolist()), np.sort(distance)[k - 1]
+
+
+def run(records=1_000_000, k=20, queries=2000, recall_queries=200, append_batches=20, append_size=1000,
+        seconds=2.0, seed=0):
+    profiles = [Profile(p) for p in synthetic_profiles(queries, seed + 1)]
+    data = synthetic_records(records, seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "outcomes.npz")
+        start = time.perf_counter()
+        similarity.write_segment(path, data)
+        write_seconds = time.perf_counter() - start
+        segment_mib = os.path.getsize(path) / 2**20
+        start = time.perf_counter()
+        index = similarity.load_index(path)
+        load_seconds = time.perf_counter() - start
+
+        query = measure(lambda p: index.nearest(p, k), [(p,) for p in profiles], queries, seconds)
+
+        # Recall: share of the exact k nearest (by distance, so ties count) the index returns
+        hits = 0
+        for profile in profiles[:recall_queries]:
+            _, kth = exact(index, profile, k)
+            found = index.nearest(profile, k)["neighbours"]
+            hits += sum(n["distance"] <= kth + 1e-4 for n in found)
+        recall = hits / (recall_queries * k)
+
+        appended = synthetic_records(append_batches * append_size, seed + 2)
+        timings = []
+        for i in range(append_batches):
+            start = time.perf_counter()
+            index.add_records(appended[i * append_size:(i + 1) * append_size])
+            timings.append(time.perf_counter() - start)
+        # Right after the appends, while they are being merged in the background
+        tail = measure(lambda p: index.nearest(p, k), [(p,) for p in profiles], queries, seconds)
+        unmerged = len(index._state[1]["gpa"])
+        index.wait_merged()
+        merged = measure(lambda p: index.nearest(p, k), [(p,) for p in profiles], queries, seconds)
+
+    return {
+        "records": records,
+        "k": k,
+        "write_seconds": write_seconds,
+        "segment_mib": segment_mib,
+        "load_seconds": load_seconds,
+        "query": query,
+        "recall": recall,
+        "append_batch": append_size,
+        "append_ms_p50": float(np.percentile(timings, 50) * 1000),
+        "append_ms_max": float(max(timings) * 1000),
+        "query_after_appends": tail,
+        "tail_records": unmerged,
+        "query_after_merge": merged,
+        "tail_records_after_merge": len(index._state[1]["gpa"]),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=1_000_000)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--append-batches", type=int, default=20)
+    parser.add_argument("--append-size", type=int, default=1000)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(json.dumps(run(args.records, args.k, args.queries, append_batches=args.append_batches,
+                         append_size=args.append_size, seconds=args.seconds, seed=args.seed), indent=2))
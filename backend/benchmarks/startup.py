@@ -0,0 +1,111 @@
+"""
+Cold start: how long a fresh worker takes to import the app, to report
+ready on /health, and to serve its first POST /api/recommend, with and
+without the startup warm-up (main.warm_up, STARTUP_WARMUP).
+
+    python -m benchmarks.startup --runs 5 --rows 6,1000
+
+Every run is a new interpreter, so nothing is shared between runs:
+
+  startup_import        import main
+  startup_ready         lifespan start (catalog compile, warm-up) until
+                        /health answers 200
+  first_request_cold    first request, STARTUP_WARMUP=0
+  first_request_warm    first request once the warm-up has finished
+  second_request_cold   the same request again, STARTUP_WARMUP=0
+
+Requests use the frontend's default budget and intake, so with the
+warm-up on the first one is served from the response cache.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = ("startup_import", "startup_ready", "first_request_cold", "first_request_warm", "second_request_cold")
+
+PAYLOAD = {"degree": "Bachelors", "gpa": 7.5, "major": "Computer Science", "budget": 25.0,
+           "priority": "High ROI", "funding_source": "Self", "target_intake": "Fall 2025"}
+
+
+async def child_timings():
+    start = time.perf_counter()
+    import main
+    imported = time.perf_counter()
+
+    import httpx
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bench")
+    timings = {"startup_import": imported - start}
+    start = time.perf_counter()
+    async with main.app.router.lifespan_context(main.app):
+        while (await client.get("/health")).status_code != 200:
+            await asyncio.sleep(0.001)
+        timings["startup_ready"] = time.perf_counter() - start
+        mode = "warm" if main.WARMUP else "cold"
+        for label in ("first", "second"):
+            start = time.perf_counter()
+            response = await client.post("/api/recommend", json=PAYLOAD)
+            response.raise_for_status()
+            timings[f"{label}_request_{mode}"] = time.perf_counter() - start
+    await client.aclose()
+    return timings
+
+
+def spawn(catalog_path, warmup):
+    env = dict(os.environ, STARTUP_WARMUP="1" if warmup else "0", METRICS_ENABLED="1")
+    if catalog_path:
+        env["CATALOG_PATH"] = catalog_path
+    output = subprocess.run([sys.executable, "-m", "benchmarks.startup", "--child"], cwd=BACKEND_DIR, env=env,
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def run(rows_list=(6, 1000), runs=5, seed=0):
+    """Rows in the benchmark suite's result format, one per (scenario, catalog size)."""
+    from benchmarks.harness import summarize
+    from benchmarks.synthetic import synthetic_catalog_file
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in rows_list:
+            path = os.path.join(tmp, f"countries-{rows}.json")
+            synthetic_catalog_file(rows, path, seed)
+            samples = {name: [] for name in SCENARIOS}
+            for _ in range(runs):
+                for warmup in (False, True):
+                    for name, seconds in spawn(path, warmup).items():
+                        # Import and readiness don't depend on the mode; keep the warm runs'
+                        if name.startswith("startup_") and not warmup:
+                            continue
+                        if name in samples:
+                            samples[name].append(seconds)
+            for name in SCENARIOS:
+                results.append({
+                    "scenario": name,
+                    "catalog_rows": rows,
+                    "runs": runs,
+                    **summarize(samples[name], sum(samples[name])),
+                    "rps": None,
+                    "alloc_peak_kib_p50": None,
+                    "catalog_kib": None,
+                })
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", default="6,1000", help="comma-separated synthetic catalog sizes")
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes per mode and catalog size")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        print(json.dumps(asyncio.run(child_timings())))
+    else:
+        print(json.dumps(run([int(r) for r in args.rows.split(",")], args.runs, args.seed), indent=2))
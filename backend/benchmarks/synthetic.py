@@ -0,0 +1,79 @@
+"""Synthetic catalogs and profile distributions for the benchmarks."""
+import copy
+import json
+
+import numpy as np
+
+from catalog import compile_catalog
+from catalog_store import DEFAULT_CATALOG_PATH
+
+INTAKES = ("Fall 2025", "Spring 2026", "Fall 2026")
+MAJORS = ("Computer Science", "Data Science", "Business", "Engineering", "Medicine", "Arts")
+
+
+def seed_records(path=DEFAULT_CATALOG_PATH):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["countries"]
+
+
+def synthetic_records(rows, seed=0, base_path=DEFAULT_CATALOG_PATH):
+    """
+    `rows` country records cloned from the shipped catalog. The first rows
+    are the real countries; the rest get spread costs and GPA floors.
+    """
+    seeds = seed_records(base_path)
+    rng = np.random.default_rng(seed)
+    costs = rng.uniform(0.5, 2.0, rows)
+    floors = rng.choice(np.arange(5.0, 9.05, 0.1), rows)
+    records = []
+    for i in range(rows):
+        record = copy.deepcopy(seeds[i % len(seeds)])
+        if i >= len(seeds):
+            record["name"] = f"{record['name']} #{i}"
+            record["total_cost"] = round(record["total_cost"] * float(costs[i]), 1)
+            record["min_gpa"] = round(float(floors[i]), 1)
+        records.append(record)
+    return records
+
+
+def synthetic_catalog(rows, seed=0):
+    return compile_catalog(synthetic_records(rows, seed), version=f"synthetic-{rows}-{seed}")
+
+
+def synthetic_catalog_file(rows, path, seed=0):
+    """Write a catalog data file of `rows` synthetic records."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"version": f"synthetic-{rows}", "countries": synthetic_records(rows, seed)}, f, ensure_ascii=False)
+
+
+def synthetic_profiles(n, seed=0, distribution="realistic"):
+    """
+    /api/recommend request bodies.
+
+    realistic: GPA ~ N(7.2, 0.9) and budgets ~ lognormal around 25L, rounded
+    the way the frontend's slider and input produce them.
+    uniform: GPA and budget spread evenly over the whole input range, which
+    defeats most caching.
+    """
+    rng = np.random.default_rng(seed)
+    if distribution == "realistic":
+        gpa = np.clip(rng.normal(7.2, 0.9, n), 4.0, 10.0).round(1)
+        budget = np.clip(rng.lognormal(np.log(25), 0.5, n), 5, 100).round(0)
+    elif distribution == "uniform":
+        gpa = rng.uniform(4.0, 10.0, n).round(2)
+        budget = rng.uniform(0, 100, n).round(2)
+    else:
+        raise ValueError(f"Unknown distribution: {distribution}")
+    majors = rng.integers(0, len(MAJORS), n)
+    intakes = rng.integers(0, len(INTAKES), n)
+    return [
+        {
+            "degree": "B.Tech",
+            "gpa": float(gpa[i]),
+            "major": MAJORS[majors[i]],
+            "budget": float(budget[i]),
+            "priority": "High ROI",
+            "target_intake": INTAKES[intakes[i]],
+        }
+        for i in range(n)
+    ]
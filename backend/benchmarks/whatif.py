@@ -0,0 +1,108 @@
+"""
+Slider drags: a session moving its budget and GPA in small steps, served
+by POST /api/recommend (the whole body every step) and by POST
+/api/whatif (deltas, see whatif), in-process, with the fast path
+(fast_path, RECOMMEND_FAST_PATH) off and on.
+
+    python -m benchmarks.whatif --steps 500 --rows 6,1000
+
+Reports latency and response bytes per step for both, and checks that
+every delta, applied with whatif.apply_delta, gives exactly the body
+/api/recommend returns for the same profile.
+"""
+import argparse
+import asyncio
+import json
+
+import httpx
+import numpy as np
+
+import core_engine
+import fast_path
+import main
+import whatif
+from benchmarks.harness import summarize
+from benchmarks.synthetic import synthetic_catalog
+
+
+def slider_walk(steps, seed=0):
+    """Profiles along a drag: mostly budget steps of 0.5L, now and then a GPA step of 0.1."""
+    rng = np.random.default_rng(seed)
+    gpa, budget = 7.5, 25.0
+    profiles = []
+    for _ in range(steps):
+        if rng.random() < 0.2:
+            gpa = float(np.clip(round(gpa + rng.choice((-0.1, 0.1)), 1), 5.0, 10.0))
+        else:
+            budget = float(np.clip(budget + rng.choice((-0.5, 0.5)), 5.0, 150.0))
+        profiles.append({"degree": "Bachelors", "gpa": gpa, "major": "Computer Science", "budget": budget,
+                         "priority": "High ROI", "funding_source": "Self", "target_intake": "Fall 2025"})
+    return profiles
+
+
+async def drag(client, profiles, view, fast):
+    recommend, delta, sizes = [], [], {"recommend": 0, "whatif": 0}
+    mismatches = 0
+    state = None
+    headers = {"X-Session-Id": f"bench-{view}-{fast}"}
+    fast_path.ENABLED = fast
+    loop = asyncio.get_running_loop()
+    for profile in profiles:
+        start = loop.time()
+        full = await client.post(f"/api/recommend?view={view}", json=profile)
+        recommend.append(loop.time() - start)
+        start = loop.time()
+        response = await client.post(f"/api/whatif?view={view}", json=profile, headers=headers)
+        delta.append(loop.time() - start)
+        full.raise_for_status()
+        response.raise_for_status()
+        sizes["recommend"] += len(full.content)
+        sizes["whatif"] += len(response.content)
+        body = response.json()
+        headers["X-Whatif-Revision"] = str(body["revision"])
+        state = whatif.apply_delta(state, body)
+        mismatches += state != full.json()
+    await client.delete("/api/whatif", headers=headers)
+    return recommend, delta, sizes, mismatches
+
+
+def run(rows_list=(6, 1000), steps=500, seed=0):
+    profiles = slider_walk(steps, seed)
+    original = core_engine.get_catalog()
+    loop = asyncio.new_event_loop()
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bench")
+    enabled = fast_path.ENABLED
+    results = []
+    try:
+        for rows in rows_list:
+            core_engine.STORE.publish(synthetic_catalog(rows, seed))
+            for view in ("full", "summary"):
+                for fast in (False, True):
+                    main.RESPONSE_CACHE.clear()
+                    recommend, delta, sizes, mismatches = loop.run_until_complete(drag(client, profiles, view, fast))
+                    for name, latencies in (("recommend", recommend), ("whatif", delta)):
+                        results.append({
+                            "endpoint": name,
+                            "fast_path": fast,
+                            "rows": rows,
+                            "view": view,
+                            **summarize(latencies, sum(latencies)),
+                            "bytes_per_step": sizes[name] / steps,
+                        })
+                    results[-1]["mismatches"] = mismatches
+    finally:
+        fast_path.ENABLED = enabled
+        loop.run_until_complete(client.aclose())
+        core_engine.STORE.publish(original)
+        main.RESPONSE_CACHE.clear()
+        loop.close()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", default="6,1000", help="comma-separated synthetic catalog sizes")
+    parser.add_argument("--steps", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(json.dumps(run([int(r) for r in args.rows.split(",")], args.steps, args.seed), indent=2))
@@ -0,0 +1,367 @@
+import bisect
+import hashlib
+import json
+import math
+import re
+from array import array
+from functools import lru_cache, partial
+from operator import attrgetter
+# What encode_json writes strings with (ensure_ascii=False); the C version when available
+from json.encoder import encode_basestring as encode_str
+
+try:
+    import orjson
+except ImportError:  # optional speedup for the per-request encoding below
+    orjson = None
+
+from records import FIELD_NAMES, NUMERIC_FIELDS, Country
+
+ARCHETYPES = ("safe_bets", "fast_track", "moonshots")
+
+# Fields discover_strategies adds on top of the static record, in response order
+ASSESSMENT_FIELDS = ("financial_status", "financial_health", "gap_value", "roi_percentage", "deadlines")
+
+# ?view=summary: enough to render a result card without the heavy nested data
+SUMMARY_FIELDS = ("name", "flag", "archetype", "tagline", "total_cost", "min_gpa",
+                  "avg_salary_post_grad", "break_even_months", "pr_risk_color",
+                  "pr_success_rate") + ASSESSMENT_FIELDS
+
+# Budget gap (in lakhs) up to which a shortfall is still "manageable"
+MANAGEABLE_GAP = 10
+
+
+def classify_gap(gap, is_moonshot):
+    """Return (financial_status, financial_health) for a budget gap."""
+    if gap <= 0:
+        # Special handling for moonshots - money doesn't eliminate lottery risk
+        if is_moonshot:
+            financial_status = "Budget OK"
+        else:
+            financial_status = "Fully Covered"
+        return financial_status, "excellent"
+    elif gap <= MANAGEABLE_GAP:
+        return f"Gap: ₹{gap:.1f}L", "manageable"
+    else:
+        return f"Gap: ₹{gap:.1f}L", "stretch"
+
+
+# Same settings as Starlette's JSONResponse so spliced output is byte-identical.
+# A shared encoder instance: json.dumps() builds a new one per call for
+# non-default settings, which dominates catalog compile time.
+encode_json = json.JSONEncoder(ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode
+
+
+def encode_number(value):
+    """encode_json(value) for a number, without the encoder's per-call setup."""
+    # The encoder writes finite floats with float.__repr__ and ints with int.__repr__ too
+    if type(value) is float and math.isfinite(value):
+        return float.__repr__(value)
+    if type(value) is int:
+        return int.__repr__(value)
+    return encode_json(value)
+
+
+def _pooled_json(pool, kind, obj, encode):
+    """encode(obj), once per pooled object: the pool keeps obj alive, so its id is stable."""
+    key = ("json", kind, id(obj))
+    text = pool.get(key)
+    if text is None:
+        text = pool[key] = encode(obj)
+    return text
+
+
+def _task_json(t):
+    return f'{{"task":{encode_str(t.task)},"date":{encode_str(t.date)}}}'
+
+
+def _branch_json(b):
+    return (f'{{"path":{encode_str(b.path)},"timeline":{encode_str(b.timeline)},'
+            f'"success":{encode_str(b.success)},"color":{encode_str(b.color)}}}')
+
+
+def _alert_json(a):
+    return f'{{"type":{encode_str(a.type)},"text":{encode_str(a.text)}}}'
+
+
+def _costs_json(c):
+    n = encode_number
+    return (f'{{"tuition":{n(c.tuition)},"living":{n(c.living)},'
+            f'"visa_fees":{n(c.visa_fees)},"insurance":{n(c.insurance)}}}')
+
+
+def _list_json(pool, kind, items, encode):
+    return "[" + ",".join(_pooled_json(pool, kind, item, encode) for item in items) + "]"
+
+
+def _deadlines_json(action_deadlines, pool):
+    """(JSON object, {intake: deadline fragment}) for Country.action_deadlines."""
+    fragments = {}
+    intakes = []
+    for pair in action_deadlines:
+        intake, tasks = pair
+        tasks_json = _pooled_json(pool, "tasks", tasks, lambda tasks: _list_json(pool, "task", tasks, _task_json))
+        fragments[intake] = _pooled_json(pool, "deadlines", pair,
+                                         lambda pair: f'"deadlines":{tasks_json}'.encode("utf-8"))
+        intakes.append(f"{encode_str(intake)}:{tasks_json}")
+    return "{" + ",".join(intakes) + "}", fragments
+
+
+def country_json(country, pool):
+    """
+    (static JSON, {intake: deadline fragment}) for a Country, byte-identical
+    to encode_json(country.to_dict()). Sub-records are pooled (see
+    records), so each distinct one is encoded once per catalog, not per row;
+    rows with the same calendar share one fragments dict.
+    """
+    n = encode_number
+    key = ("json", "nested", id(country.timeline_steps), id(country.pr_branches), id(country.policy_alerts),
+           id(country.action_deadlines))
+    nested = pool.get(key)
+    if nested is None:
+        deadlines, fragments = _deadlines_json(country.action_deadlines, pool)
+        steps = "[" + ",".join(map(encode_str, country.timeline_steps)) + "]"
+        branches = _list_json(pool, "branch", country.pr_branches, _branch_json)
+        alerts = _list_json(pool, "alert", country.policy_alerts, _alert_json)
+        nested = pool[key] = (
+            f'"timeline_steps":{steps},"pr_branches":{branches},"policy_alerts":{alerts},'
+            f'"action_deadlines":{deadlines},'.encode("utf-8"), fragments)
+    # Joined as bytes: the shared nested part is most of the record, and is
+    # encoded once per catalog rather than copied into every row's str
+    head = (
+        f'{{"name":{encode_str(country.name)},"flag":{encode_str(country.flag)},'
+        f'"archetype":{encode_str(country.archetype)},"tagline":{encode_str(country.tagline)},'
+        f'"costs":{_pooled_json(pool, "costs", country.costs, _costs_json)},'
+        f'"total_cost":{n(country.total_cost)},"min_gpa":{n(country.min_gpa)},'
+        f'"avg_salary_post_grad":{n(country.avg_salary_post_grad)},'
+        f'"break_even_months":{n(country.break_even_months)},'
+        f'"pr_risk_color":{encode_str(country.pr_risk_color)},"pr_success_rate":{n(country.pr_success_rate)},'
+    )
+    tail = f'"insider_insight":{encode_str(country.insider_insight)}}}'
+    return b"".join((head.encode("utf-8"), nested[0], tail.encode("utf-8"))), nested[1]
+
+
+# UTF-8 JSON for strings, ints, None and dicts/lists of them. orjson writes
+# those exactly like encode_json, only faster; not floats (1e16 vs 1e+16).
+if orjson is not None:
+    encode_plain = orjson.dumps
+else:
+    def encode_plain(value):
+        return encode_json(value).encode("utf-8")
+
+
+EMPTY_DEADLINES = b'"deadlines":[]'
+
+
+NON_SLUG = re.compile(r"[^a-z0-9]+")
+
+
+def slugify(name):
+    return NON_SLUG.sub("-", name.lower()).strip("-")
+
+
+def roi_percentage(record):
+    # Two years of post-grad salary against the total investment
+    annual_salary = record['avg_salary_post_grad']
+    return round(((annual_salary * 2) - record['total_cost']) / record['total_cost'] * 100, 1)
+
+
+class CatalogRow:
+    """
+    One compiled catalog entry: the country (see records.Country) plus
+    everything derivable from it, including its pre-serialized JSON.
+    """
+
+    __slots__ = ("position", "country", "id", "name", "archetype", "min_gpa",
+                 "total_cost", "roi_percentage", "is_moonshot",
+                 "static_json", "roi_fragment", "deadline_fragments", "_fragments")
+
+    def __init__(self, position, record, pool=None):
+        if pool is None:
+            pool = {}
+        self.position = position
+        # The source dict is only read here; the row keeps the compact form
+        self.country = country = Country.from_dict(record, pool)
+        self.id = slugify(country.name)
+        self.name = country.name
+        self.archetype = country.archetype
+        self.min_gpa = country.min_gpa
+        self.total_cost = country.total_cost
+        self.roi_percentage = roi_percentage(record)
+        self.is_moonshot = self.archetype == 'moonshots'
+
+        # Pre-serialized pieces are kept as UTF-8 bytes: half the size of a
+        # str once a flag emoji forces 4 bytes per character, and responses
+        # are bytes anyway
+        self.static_json, self.deadline_fragments = country_json(country, pool)
+        self.roi_fragment = f'"roi_percentage":{encode_number(self.roi_percentage)}'.encode("utf-8")
+        self._fragments = None
+
+    @property
+    def record(self):
+        """The country as a plain dict (a fresh copy each call)."""
+        return self.country.to_dict()
+
+    @property
+    def fragments(self):
+        """b'"key":value' per static field; only projections need these, so built on first use."""
+        if self._fragments is None:
+            self._fragments = {
+                key: f"{encode_json(key)}:{encode_json(value)}".encode("utf-8") for key, value in self.record.items()
+            }
+        return self._fragments
+
+    def deadline_fragment(self, intake):
+        """b'"deadlines":[...]' for an intake."""
+        return self.deadline_fragments.get(intake, EMPTY_DEADLINES)
+
+    def assess(self, budget, target_intake):
+        """The per-user fields discover_strategies adds to the record."""
+        gap = self.total_cost - budget
+        financial_status, financial_health = classify_gap(gap, self.is_moonshot)
+        return {
+            "financial_status": financial_status,
+            "financial_health": financial_health,
+            "gap_value": gap,
+            "roi_percentage": self.roi_percentage,
+            "deadlines": [task.to_dict() for task in self.country.deadlines(target_intake)]
+        }
+
+    def evaluate(self, budget, target_intake):
+        return {**self.record, **self.assess(budget, target_intake)}
+
+    def encode(self, budget, target_intake, fields=None):
+        """
+        UTF-8 JSON for evaluate(budget, target_intake), optionally restricted
+        to fields. Only the budget-dependent values are serialized here.
+        """
+        gap = self.total_cost - budget
+        financial_status, financial_health = classify_gap(gap, self.is_moonshot)
+        deadlines = self.deadline_fragment(target_intake)
+        if fields is None:
+            return b"".join((
+                self.static_json[:-1],
+                b',"financial_status":', encode_plain(financial_status),
+                b',"financial_health":"', financial_health.encode("ascii"),
+                b'","gap_value":', encode_number(gap).encode("ascii"), b",",
+                self.roi_fragment, b",", deadlines, b"}",
+            ))
+        dynamic = {
+            "financial_status": b'"financial_status":' + encode_plain(financial_status),
+            "financial_health": f'"financial_health":"{financial_health}"'.encode("ascii"),
+            "gap_value": b'"gap_value":' + encode_number(gap).encode("ascii"),
+            "roi_percentage": self.roi_fragment,
+            "deadlines": deadlines,
+        }
+        parts = [fragment for key, fragment in self.fragments.items() if key in fields]
+        parts.extend(value for key, value in dynamic.items() if key in fields)
+        return b"{" + b",".join(parts) + b"}"
+
+
+class CompiledCatalog:
+    """
+    Read-only view over the country records, compiled once.
+
+    Rows are indexed by min_gpa and total_cost (sorted, for bisect) and by
+    archetype. A GPA lookup is a bisect into the min_gpa index; the bucketed
+    result for each distinct cut point is memoised, so steady-state lookups
+    never touch rows that don't match.
+    """
+
+    def __init__(self, records, version=None):
+        # One pass over the records for the rows, with equal sub-records
+        # (deadline tasks, PR branches...) and their JSON shared across rows;
+        # then the numeric fields as contiguous float64 columns in row order,
+        # for vectorised consumers (np.frombuffer views them without copying)
+        pool = {}
+        rows = [CatalogRow(i, record, pool) for i, record in enumerate(records)]
+        del pool
+        countries = [row.country for row in rows]
+        columns = {name: array("d", map(attrgetter(name), countries)) for name in NUMERIC_FIELDS}
+        self._index(tuple(rows), columns, version)
+
+    @classmethod
+    def from_rows(cls, rows, columns, version=None, index_json=None):
+        """
+        A catalog over already built rows, e.g. views into a shared segment
+        (see shared_catalog). columns maps NUMERIC_FIELDS to float64 buffers.
+        """
+        catalog = cls.__new__(cls)
+        catalog._index(rows, columns, version, index_json)
+        return catalog
+
+    def _index(self, rows, columns, version=None, index_json=None):
+        self.rows = rows
+        self.columns = columns
+
+        # Anything cached off this catalog is keyed on version, so it must
+        # change whenever content does; default to a content hash
+        if version is None:
+            digest = hashlib.blake2b(digest_size=8)
+            for row in self.rows:
+                digest.update(row.static_json)
+            version = digest.hexdigest()
+        self.version = version
+
+        # Rows are in position order and sorted() is stable, so ties keep it
+        self.by_gpa = tuple(sorted(self.rows, key=attrgetter("min_gpa")))
+        self._gpa_keys = [r.min_gpa for r in self.by_gpa]
+
+        self.by_cost = tuple(sorted(self.rows, key=attrgetter("total_cost")))
+        self._cost_keys = [r.total_cost for r in self.by_cost]
+
+        self.by_archetype = {a: tuple(r for r in self.rows if r.archetype == a) for a in ARCHETYPES}
+        self.by_id = {r.id: r for r in self.rows}
+
+        # Every field name a projection may ask for
+        self.field_names = FIELD_NAMES | frozenset(ASSESSMENT_FIELDS)
+
+        # Body of GET /api/countries
+        if index_json is None:
+            # encode_json of [{"id", "name", "flag", "archetype"}, ...], a string at a time
+            index_json = ("[" + ",".join(
+                f'{{"id":{encode_str(r.id)},"name":{encode_str(r.name)},'
+                f'"flag":{encode_str(r.country.flag)},"archetype":{encode_str(r.archetype)}}}'
+                for r in self.rows
+            ) + "]").encode("utf-8")
+        self.index_json = index_json
+
+        # Over by_gpa rather than a bound method: a cache holding self would
+        # make the catalog a reference cycle, and a replaced catalog would
+        # then stay allocated until the next full GC pass
+        self._buckets_at = lru_cache(maxsize=256)(partial(bucket_rows, self.by_gpa))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def eligible(self, gpa):
+        """Rows whose min_gpa is met, in ascending min_gpa order."""
+        return self.by_gpa[:bisect.bisect_right(self._gpa_keys, gpa)]
+
+    def within_budget(self, budget):
+        """Rows whose total_cost is fully covered by budget, cheapest first."""
+        return self.by_cost[:bisect.bisect_right(self._cost_keys, budget)]
+
+    def cost_between(self, low, high):
+        """Rows with low < total_cost <= high, cheapest first."""
+        return self.by_cost[bisect.bisect_right(self._cost_keys, low):bisect.bisect_right(self._cost_keys, high)]
+
+    def cut(self, gpa):
+        """Position of gpa among the min_gpa thresholds; equal cuts match the same rows."""
+        return bisect.bisect_right(self._gpa_keys, gpa)
+
+    def match(self, gpa):
+        """Eligible rows bucketed by archetype, each bucket in catalog order."""
+        return self._buckets_at(self.cut(gpa))
+
+
+def bucket_rows(by_gpa, cut):
+    """The first cut rows of by_gpa, bucketed by archetype in catalog order."""
+    buckets = {a: [] for a in ARCHETYPES}
+    for row in sorted(by_gpa[:cut], key=lambda r: r.position):
+        if row.archetype in buckets:
+            buckets[row.archetype].append(row)
+    return {a: tuple(rows) for a, rows in buckets.items()}
+
+
+def compile_catalog(records, version=None):
+    return CompiledCatalog(records, version)
@@ -0,0 +1,180 @@
+import gc
+import hashlib
+import os
+import threading
+import time
+from typing import Annotated, Dict, List, Literal, Union
+
+from pydantic import ConfigDict, StringConstraints, TypeAdapter
+from typing_extensions import TypedDict
+
+from catalog import compile_catalog
+
+DEFAULT_CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "countries.json")
+
+Number = Union[int, float]
+FORBID_EXTRA = ConfigDict(extra="forbid")
+# "Dec 2024" or "Now"; deadline_calendar parses these into dates
+DeadlineDate = Annotated[str, StringConstraints(pattern=r"^(Now|(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec) \d{4})$")]
+
+
+# Validated as TypedDicts rather than BaseModels: pydantic-core builds the
+# plain dicts the compiler consumes directly, with no model_dump() pass.
+# Field order below is the JSON key order served by the API; keep it stable.
+class CostBreakdown(TypedDict):
+    __pydantic_config__ = FORBID_EXTRA
+
+    tuition: Number
+    living: Number
+    visa_fees: Number
+    insurance: Number
+
+class PRBranch(TypedDict):
+    __pydantic_config__ = FORBID_EXTRA
+
+    path: str
+    timeline: str
+    success: str
+    color: str
+
+class PolicyAlert(TypedDict):
+    __pydantic_config__ = FORBID_EXTRA
+
+    type: str
+    text: str
+
+class DeadlineTask(TypedDict):
+    __pydantic_config__ = FORBID_EXTRA
+
+    task: str
+    date: DeadlineDate
+
+class CountryRecord(TypedDict):
+    __pydantic_config__ = FORBID_EXTRA
+
+    name: str
+    flag: str
+    archetype: Literal["safe_bets", "fast_track", "moonshots"]
+    tagline: str
+    costs: CostBreakdown
+    total_cost: Number
+    min_gpa: Number
+    avg_salary_post_grad: Number
+    break_even_months: Number
+    pr_risk_color: str
+    pr_success_rate: Number
+    timeline_steps: List[str]
+    pr_branches: List[PRBranch]
+    policy_alerts: List[PolicyAlert]
+    action_deadlines: Dict[str, List[DeadlineTask]]
+    insider_insight: str
+
+class CatalogFile(TypedDict):
+    version: str
+    countries: List[CountryRecord]
+
+CATALOG_FILE = TypeAdapter(CatalogFile)
+
+
+def file_digest(raw):
+    """Content hash of a catalog file's bytes."""
+    return hashlib.blake2b(raw, digest_size=8).hexdigest()
+
+
+def load_catalog(path):
+    """Read, validate and compile a catalog file. Raises on any invalid record."""
+    with open(path, "rb") as f:
+        raw = f.read()
+    digest = file_digest(raw)
+
+    # Loading allocates a lot of long-lived containers at once; pausing the
+    # cyclic GC stops it from rescanning them over and over mid-build
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        data = CATALOG_FILE.validate_json(raw)
+        # The file's version label plus a content hash, so an edit that forgets
+        # to bump the label still invalidates everything cached off the catalog
+        catalog = compile_catalog(data["countries"], version=f"{data['version']}+{digest}")
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return catalog, digest
+
+
+class CatalogStore:
+    """
+    Holds the live CompiledCatalog for a data file.
+
+    A reload compiles the new catalog completely before replacing the
+    reference, so readers always see either the old catalog or the new one.
+    Request handlers should fetch `store.catalog` once and use that object
+    for the whole request.
+    """
+
+    def __init__(self, path=DEFAULT_CATALOG_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._stop = threading.Event()
+        self.catalog = self._digest = None
+        self.reload()
+
+    def _stat(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def reload(self):
+        """Re-read the data file; returns True if the catalog changed."""
+        with self._lock:
+            mtime = self._stat()
+            catalog, digest = load_catalog(self.path)
+            self._mtime = mtime
+            if digest == self._digest:
+                return False
+            self.catalog, self._digest = catalog, digest
+            self.loaded_at = time.time()
+            return True
+
+    def publish(self, catalog):
+        """Swap in an already compiled catalog (benchmarks, tests, tooling)."""
+        with self._lock:
+            self.catalog = catalog
+            self._digest = None
+            self.loaded_at = time.time()
+
+    def reload_if_modified(self):
+        mtime = self._stat()
+        if mtime == self._mtime:
+            return False
+        try:
+            return self.reload()
+        except Exception:
+            # Don't retry the same broken file on every poll
+            self._mtime = mtime
+            raise
+
+    def watch(self, interval=5.0):
+        """Poll the data file's mtime in a daemon thread and reload on change."""
+        if self._watcher is not None:
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.reload_if_modified()
+                except Exception as e:
+                    # Keep serving the last good catalog
+                    print(f"Catalog reload failed: {e}")
+
+        self._watcher = threading.Thread(target=run, name="catalog-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
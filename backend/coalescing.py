@@ -0,0 +1,118 @@
+"""
+Single-flight coalescing: concurrent identical work shares one execution.
+
+SingleFlight is the primitive, used by the advisor so a burst of identical
+prompts makes one model call. CoalescingMiddleware applies it to whole
+POST /api/recommend responses: requests with the same canonical key (the
+parsed profile and query, so key order, whitespace and 7 vs 7.0 don't
+matter) that arrive while a first one is being served get a copy of that
+response instead of running the route again.
+
+Followers receive the leader's response as soon as the route has produced
+it, not once the leader's client has read it, so a slow client never holds
+up the others. If the leader fails, each follower runs the route itself.
+"""
+import asyncio
+
+import fast_path
+from instrumentation import METRICS
+
+
+class SingleFlight:
+    """Per-key sharing of one in-flight coroutine among concurrent callers."""
+
+    def __init__(self):
+        self._inflight = {}
+
+    def __len__(self):
+        return len(self._inflight)
+
+    def tasks(self):
+        return list(self._inflight.values())
+
+    def start(self, key, factory):
+        """
+        (task, started): the in-flight task for key, starting factory() as a
+        new one if there is none. The task leaves the table when it finishes.
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            return task, False
+        task = self._inflight[key] = asyncio.ensure_future(factory())
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return task, True
+
+    async def run(self, key, factory):
+        """Await factory() for key, or the call already running for it."""
+        task, _ = self.start(key, factory)
+        # A cancelled caller mustn't cancel the call others are waiting on
+        return await asyncio.shield(task)
+
+
+def recommend_key(scope, body):
+    """Canonical key for a /api/recommend request, or None to never coalesce it."""
+    headers = dict(scope["headers"])
+    content_type = headers.get(b"content-type")
+    if not fast_path.is_json(content_type.decode("latin-1") if content_type is not None else None):
+        return None
+    profile = fast_path.parse_profile(body)
+    query = fast_path.parse_query(scope["query_string"]) if profile is not None else None
+    if query is None:
+        return None
+    # Floats by their hex form: -0.0 == 0.0, but they render differently
+    fields = tuple(value.hex() if isinstance(value, float) else value
+                   for value in (getattr(profile, name) for name in fast_path.RecommendProfile.__slots__))
+    # Conditional requests get a different response (304)
+    return scope["path"], fields, query, headers.get(b"if-none-match")
+
+
+class CoalescingMiddleware:
+    """Pure ASGI middleware coalescing identical concurrent POSTs to `paths`."""
+
+    def __init__(self, app, paths=("/api/recommend",), key=recommend_key, registry=METRICS):
+        self.app = app
+        self.paths = frozenset(paths)
+        self.key = key
+        self.registry = registry
+        self.flights = {}
+
+    async def __call__(self, scope, receive, send):
+        if not (scope["type"] == "http" and scope["method"] == "POST" and scope["path"] in self.paths):
+            return await self.app(scope, receive, send)
+        body = await fast_path.read_body(receive)
+        if body is None:
+            return
+        receive = fast_path.replaying(body, receive)
+        key = self.key(scope, body)
+        if key is None:
+            return await self.app(scope, receive, send)
+
+        leader = self.flights.get(key)
+        if leader is not None:
+            messages = await asyncio.shield(leader)
+            if messages is not None:
+                self.registry.inc("requests_coalesced_total", scope["path"])
+                for message in messages:
+                    await send(message)
+                return
+            # The leader failed; serve this one normally
+
+        flight = self.flights[key] = asyncio.get_running_loop().create_future()
+        recorded = []
+
+        async def record(message):
+            recorded.append(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                if not flight.done():
+                    flight.set_result(recorded)
+                if self.flights.get(key) is flight:
+                    del self.flights[key]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, record)
+        finally:
+            if not flight.done():
+                flight.set_result(None)
+            if self.flights.get(key) is flight:
+                del self.flights[key]
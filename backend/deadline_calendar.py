@@ -0,0 +1,253 @@
+"""
+Typed calendar over every country's action_deadlines.
+
+Deadline dates in the data are months ("Dec 2024") or "Now". They're parsed
+once per catalog into Deadline entries covering that whole month, kept in
+one list sorted by the month's last day, so "what's due in the next N days"
+is a bisect to today plus a scan that stops at today + N. "Now" entries have
+no date and are due as of whatever day the query is for.
+
+Intake openings (the first dated deadline of each country's intake) get the
+same treatment for "earliest intake I can still make".
+"""
+import bisect
+import calendar
+import datetime
+import re
+import weakref
+from functools import lru_cache
+
+MONTHS = {name.lower(): i for i, name in enumerate(calendar.month_abbr) if name}
+
+_MONTH_YEAR = re.compile(r"^\s*([A-Za-z]{3})[A-Za-z]*\.?\s+(\d{4})\s*$")
+
+
+@lru_cache(maxsize=1024)
+def parse_deadline_date(text):
+    """(first day, last day) of the month in a "Dec 2024" string; None for "Now"."""
+    if text.strip().lower() == "now":
+        return None
+    match = _MONTH_YEAR.match(text)
+    if match is None or match.group(1).lower() not in MONTHS:
+        raise ValueError(f"Unrecognised deadline date: {text!r}")
+    year, month = int(match.group(2)), MONTHS[match.group(1).lower()]
+    return datetime.date(year, month, 1), _month_end(datetime.date(year, month, 1))
+
+
+def _month_end(day):
+    return datetime.date(day.year, day.month, calendar.monthrange(day.year, day.month)[1])
+
+
+class Deadline:
+    __slots__ = ("country_id", "country", "intake", "task", "label", "start", "end", "order")
+
+    def __init__(self, row, intake, order, task, label, dates):
+        self.country_id = row.id
+        self.country = row.name
+        self.intake = intake
+        # Position within the intake's task list, which is chronological
+        self.order = order
+        self.task = task
+        self.label = label
+        self.start, self.end = dates if dates is not None else (None, None)
+
+    def to_dict(self):
+        return {
+            "country_id": self.country_id,
+            "country": self.country,
+            "intake": self.intake,
+            "task": self.task,
+            "date": self.label,
+            "starts": self.start.isoformat() if self.start else None,
+            "ends": self.end.isoformat() if self.end else None,
+        }
+
+
+class DeadlineCalendar:
+    """
+    All deadlines of a catalog. `dated` is sorted by end day (ties in
+    catalog/task order) with `_ends` as its bisect key; `openings` holds one
+    entry per (country, intake): its first dated deadline. `intakes`,
+    `closes` and `undated` (the "Now" tasks, where there are any) are keyed
+    by (country id, intake) in catalog order.
+    """
+
+    def __init__(self, catalog):
+        self.undated = {}
+        dated = []
+        self.intakes = {}
+        # Country id -> its (country id, intake) keys
+        self._keys = {}
+        self._positions = {}
+        for row in catalog.rows:
+            self._positions[row.id] = row.position
+            keys = self._keys.setdefault(row.id, [])
+            for intake, tasks in row.country.action_deadlines:
+                entries = [
+                    Deadline(row, intake, i, t.task, t.date, parse_deadline_date(t.date))
+                    for i, t in enumerate(tasks)
+                ]
+                key = (row.id, intake)
+                keys.append(key)
+                self.intakes[key] = entries
+                for entry in entries:
+                    if entry.end:
+                        dated.append(entry)
+                    else:
+                        self.undated.setdefault(key, []).append(entry)
+
+        dated.sort(key=self._calendar_order)
+        self.dated = dated
+        self._ends = [entry.end for entry in self.dated]
+
+        openings = []
+        # Last dated deadline per intake: "Now" tasks of a finished intake aren't due any more
+        self.closes = {}
+        for key, entries in self.intakes.items():
+            ends = [e.end for e in entries if e.end]
+            if ends:
+                openings.append(next(e for e in entries if e.end))
+                self.closes[key] = max(ends)
+        openings.sort(key=lambda e: (e.end, e.order))
+        self.openings = openings
+        self._opening_ends = [e.end for e in openings]
+
+    def _calendar_order(self, entry):
+        return entry.end, self._positions[entry.country_id], entry.intake, entry.order
+
+    def _few(self, countries):
+        """Whether to look countries up by key rather than filter every deadline."""
+        return countries is not None and len(countries) * 16 < len(self._keys)
+
+    def keys(self, countries, intake=None):
+        """(country id, intake) keys of countries (ids) in catalog order, narrowed to intake."""
+        ids = sorted((c for c in set(countries) if c in self._keys), key=self._positions.__getitem__)
+        if intake is None:
+            return [key for c in ids for key in self._keys[c]]
+        return [(c, intake) for c in ids if (c, intake) in self.intakes]
+
+    def _undated(self, countries, intake):
+        """(key, "Now" tasks) pairs for countries and intake, filtering the whole index."""
+        return [
+            (key, entries) for key, entries in self.undated.items()
+            if (countries is None or key[0] in countries) and (intake is None or key[1] == intake)
+        ]
+
+    def _dated(self, keys):
+        """The dated deadlines of keys, in calendar order."""
+        return sorted((e for key in keys for e in self.intakes[key] if e.end), key=self._calendar_order)
+
+    def upcoming(self, today, days, countries=None, intake=None):
+        """
+        Deadlines whose month overlaps [today, today + days], soonest first,
+        with "Now" tasks first. countries (ids) and intake narrow the result.
+        """
+        horizon = today + datetime.timedelta(days=days)
+        if self._few(countries):
+            keys = self.keys(countries, intake)
+            undated = [(key, self.undated[key]) for key in keys if key in self.undated]
+            dated = [e for e in self._dated(keys) if e.end >= today and e.start <= horizon]
+        else:
+            undated = self._undated(countries, intake)
+            # Months are sorted by end, and starts follow their ends: the window
+            # is everything ending between today and the end of horizon's month
+            dated = self.dated[bisect.bisect_left(self._ends, today):
+                               bisect.bisect_right(self._ends, _month_end(horizon))]
+            if countries is not None or intake is not None:
+                dated = [
+                    e for e in dated
+                    if (countries is None or e.country_id in countries) and (intake is None or e.intake == intake)
+                ]
+        return [e for key, entries in undated if self.closes.get(key, today) >= today for e in entries] + dated
+
+    def earliest_intakes(self, today, countries):
+        """
+        country id -> (intake, first deadline) for the earliest intake whose
+        first dated deadline hasn't passed. Countries with nothing left are
+        absent.
+        """
+        wanted = set(countries)
+        found = {}
+        for i in range(bisect.bisect_left(self._opening_ends, today), len(self.openings)):
+            entry = self.openings[i]
+            if entry.country_id in wanted and entry.country_id not in found:
+                found[entry.country_id] = (entry.intake, entry)
+                if len(found) == len(wanted):
+                    break
+        return found
+
+    def entries(self, countries=None, intake=None):
+        """Every deadline (dated ones in calendar order) for an export."""
+        if self._few(countries):
+            keys = self.keys(countries, intake)
+            return [e for key in keys for e in self.undated.get(key, ())] + self._dated(keys)
+        undated = [e for _, entries in self._undated(countries, intake) for e in entries]
+        if countries is None and intake is None:
+            return undated + self.dated
+        return undated + [
+            e for e in self.dated
+            if (countries is None or e.country_id in countries) and (intake is None or e.intake == intake)
+        ]
+
+
+_calendars = weakref.WeakKeyDictionary()
+
+
+def deadline_calendar(catalog):
+    cal = _calendars.get(catalog)
+    if cal is None:
+        cal = _calendars[catalog] = DeadlineCalendar(catalog)
+    return cal
+
+
+# ========== ICALENDAR ==========
+
+def _ics_escape(text):
+    return text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+def _ics_fold(line):
+    """Split a content line into 75-octet pieces (RFC 5545 3.1)."""
+    data = line.encode("utf-8")
+    if len(data) <= 75:
+        return line
+    parts = []
+    while len(data) > 75:
+        cut = 75 if not parts else 74
+        # Don't split a UTF-8 sequence
+        while cut > 0 and (data[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(data[:cut].decode("utf-8"))
+        data = data[cut:]
+    parts.append(data.decode("utf-8"))
+    return "\r\n ".join(parts)
+
+
+def to_ics(entries, today, stamp=None):
+    """
+    VCALENDAR text with an all-day event per deadline spanning its month;
+    "Now" tasks land on today.
+    """
+    stamp = (stamp or datetime.datetime.now(datetime.timezone.utc)).strftime("%Y%m%dT%H%M%SZ")
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//GlobalPathways AI//Deadlines//EN",
+        "CALSCALE:GREGORIAN",
+    ]
+    for entry in entries:
+        start = entry.start or today
+        end = (entry.end or today) + datetime.timedelta(days=1)
+        uid = re.sub(r"[^a-z0-9]+", "-", f"{entry.country_id} {entry.intake} {entry.order}".lower())
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:{uid}@globalpathways",
+            f"DTSTAMP:{stamp}",
+            f"DTSTART;VALUE=DATE:{start.strftime('%Y%m%d')}",
+            f"DTEND;VALUE=DATE:{end.strftime('%Y%m%d')}",
+            f"SUMMARY:{_ics_escape(f'{entry.country}: {entry.task}')}",
+            f"DESCRIPTION:{_ics_escape(f'{entry.intake} intake, due {entry.label}')}",
+            "END:VEVENT",
+        ]
+    lines.append("END:VCALENDAR")
+    return "\r\n".join(_ics_fold(line) for line in lines) + "\r\n"
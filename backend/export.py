@@ -0,0 +1,411 @@
+"""
+Offline export: score a profile grid or a profile file against the catalog
+in bulk, writing columnar results plus a few aggregate reports.
+
+    python -m export --gpa 5:10:0.1 --budget 5:100:1 --intakes "Fall 2025,Fall 2026" --out results
+    python -m export --input profiles.csv --out results --processes 4
+
+Scoring is batch_engine.score_profiles, i.e. the same eligibility, bucket
+counts, financial_health, gap_value and advisory rules as /api/recommend,
+one (chunk x countries) matrix at a time. Each chunk is scored and
+written as its own part file by a worker process; the parent only reads
+the input and sums the aggregates, with at most two chunks per worker in
+flight, so memory stays bounded however large the input is.
+
+Output directory:
+  manifest.json    catalog version, country ids, code tables, files
+  part-NNNNN.npz   one per chunk (.parquet with --format parquet, the
+                   default when pyarrow is installed)
+  aggregates.json  buckets_by_budget (per intake and budget band, the share
+                   of profiles with at least one safe_bets / fast_track /
+                   moonshots option), country_health and rule counts
+
+Budgets are INR lakhs, like the catalog; a grid --currency or a file's
+currency column converts them first, as /api/recommend does.
+"""
+import argparse
+import csv
+import json
+import math
+import multiprocessing
+import os
+import time
+from collections import deque
+from itertools import islice
+
+import numpy as np
+
+import advisory_rules
+import batch_engine
+import fx
+from catalog import ARCHETYPES
+from catalog_store import DEFAULT_CATALOG_PATH, load_catalog
+
+DEFAULT_INTAKE = "Fall 2025"
+
+# Per-chunk (profiles x countries) cells; score_profiles holds a few
+# matrices of this size at once
+CHUNK_CELLS = 2_000_000
+# and few enough profiles that a small catalog still splits across workers
+MAX_CHUNK_ROWS = 50_000
+
+# buckets_by_budget counters, per (intake, budget band)
+OUTCOMES = ("profiles",) + ARCHETYPES + ("no_options",)
+
+
+def axis(spec):
+    """Grid values for "start:stop:step" (stop included) or "a,b,c"."""
+    if ":" in spec:
+        start, stop, step = (float(x) for x in spec.split(":"))
+        if step <= 0 or stop < start:
+            raise ValueError(f"Bad range: {spec}")
+        count = math.floor((stop - start) / step + 1e-9) + 1
+        # Rounded so 0.1 steps give 7.3, not 7.300000000000001
+        return np.round(start + step * np.arange(count), 10)
+    return np.array([float(x) for x in spec.split(",")])
+
+
+class ProfileGrid:
+    """Every (intake, gpa, budget) combination, generated chunk by chunk."""
+
+    def __init__(self, gpa, budget, intakes=(DEFAULT_INTAKE,), currency=None):
+        self.gpa = np.asarray(gpa, dtype=np.float64)
+        self.budget = np.asarray(budget, dtype=np.float64)
+        if currency:
+            self.budget = self.budget * fx.fx_table().currency(currency).to_lakhs
+        self.intakes = list(intakes)
+
+    def __len__(self):
+        return len(self.intakes) * len(self.gpa) * len(self.budget)
+
+    def chunks(self, chunk_size):
+        shape = (len(self.intakes), len(self.gpa), len(self.budget))
+        for start in range(0, len(self), chunk_size):
+            intake, g, b = np.unravel_index(np.arange(start, min(start + chunk_size, len(self))), shape)
+            yield self.gpa[g], self.budget[b], intake.astype(np.int16)
+
+
+class ProfileFile:
+    """
+    Profiles from a CSV file or JSON Lines (.jsonl/.ndjson), read chunk by
+    chunk. Columns follow the /api/recommend body: gpa, budget (or
+    budget_max_lakhs), optional target_intake and currency; others are
+    ignored. Intakes are coded in order of first appearance.
+    """
+
+    def __init__(self, path, default_intake=DEFAULT_INTAKE):
+        self.path = path
+        self.default_intake = default_intake
+        self.intakes = []
+        self._codes = {}
+
+    def _records(self):
+        with open(self.path, encoding="utf-8", newline="") as f:
+            if self.path.endswith(".csv"):
+                yield from enumerate(csv.DictReader(f), start=2)
+            else:
+                for line, text in enumerate(f, start=1):
+                    if text.strip():
+                        yield line, text
+
+    def _profile(self, record, table):
+        if isinstance(record, str):
+            record = json.loads(record)
+        budget = record.get("budget", record.get("budget_max_lakhs"))
+        if budget is None:
+            raise KeyError("budget")
+        budget = float(budget)
+        currency = record.get("currency")
+        if currency:
+            budget = table.budget_in_lakhs(budget, currency)
+        intake = record.get("target_intake") or self.default_intake
+        code = self._codes.get(intake)
+        if code is None:
+            code = self._codes[intake] = len(self.intakes)
+            self.intakes.append(intake)
+        return float(record["gpa"]), budget, code
+
+    def chunks(self, chunk_size):
+        table = fx.fx_table()
+        records = self._records()
+        while True:
+            batch = list(islice(records, chunk_size))
+            if not batch:
+                return
+            profiles = []
+            for line, record in batch:
+                try:
+                    profiles.append(self._profile(record, table))
+                except (KeyError, TypeError, ValueError) as e:
+                    raise ValueError(f"{self.path}:{line}: invalid profile ({e!r})") from None
+            gpa, budget, intake = zip(*profiles)
+            yield (np.array(gpa, dtype=np.float64), np.array(budget, dtype=np.float64),
+                   np.array(intake, dtype=np.int16))
+
+
+# Set in the parent before the pool starts, so forked workers inherit it;
+# spawned workers load it themselves
+_catalog = None
+
+
+def _init_worker(path, version):
+    global _catalog
+    if _catalog is None or _catalog.version != version:
+        _catalog, _ = load_catalog(path)
+
+
+def score_chunk(number, start, gpa, budget, intake, out_dir, format="npz", edges=advisory_rules.BUDGET_BANDS,
+                locale="en", matrices=True, compress=False):
+    """
+    Score one chunk of profiles and write it as out_dir/part-<number>.
+    Returns (file entry, partial aggregates); the columns themselves never
+    go back to the parent process.
+    """
+    result = batch_engine.score_profiles(gpa, budget, _catalog, locale)
+    counts = result.counts
+    columns = {
+        "index": np.arange(start, start + len(result), dtype=np.int64),
+        "gpa": result.gpa,
+        "budget": result.budget,
+        "intake": intake,
+        "total_options": counts.sum(axis=1, dtype=np.int32),
+        "safe_count": counts[:, 0],
+        "fast_count": counts[:, 1],
+        "moonshot_count": counts[:, 2],
+        "advice_rule": result.advice_rule.astype(np.int16),
+        "risk_rule": result.risk_rule.astype(np.int16),
+    }
+    if matrices:
+        # (profiles x countries), countries in manifest order
+        columns["financial_health"] = result.health
+        columns["gap_value"] = result.gap
+    name = f"part-{number:05d}.{format}"
+    WRITERS[format](os.path.join(out_dir, name), columns, compress)
+    return {"file": name, "rows": len(result)}, aggregate(columns, result.health, edges, len(result.engine.rules))
+
+
+def aggregate(columns, health, edges, rule_count):
+    band = np.searchsorted(edges, columns["budget"], side="right")
+    intake = columns["intake"]
+    outcome = np.stack([
+        np.ones(len(intake), dtype=bool),
+        columns["safe_count"] > 0,
+        columns["fast_count"] > 0,
+        columns["moonshot_count"] > 0,
+        columns["total_options"] == 0,
+    ], axis=1).astype(np.int64)
+    by_band = np.zeros((int(intake.max()) + 1, len(edges) + 1, len(OUTCOMES)), dtype=np.int64)
+    np.add.at(by_band, (intake, band), outcome)
+    return {
+        "by_band": by_band,
+        "health": np.stack([(health == h).sum(axis=0) for h in range(len(batch_engine.HEALTH_CLASSES))], axis=1),
+        "advice": np.bincount(columns["advice_rule"], minlength=rule_count),
+        "risk": np.bincount(columns["risk_rule"], minlength=rule_count),
+    }
+
+
+def band_labels(edges):
+    bounds = [f"{edge:g}" for edge in edges]
+    return [f"<{bounds[0]}"] + [f"{lo}-{hi}" for lo, hi in zip(bounds, bounds[1:])] + [f">={bounds[-1]}"]
+
+
+class Aggregates:
+    """Running totals of score_chunk's partial aggregates."""
+
+    def __init__(self, catalog, edges, rules):
+        self.catalog = catalog
+        self.edges = edges
+        self.rules = rules
+        self.by_band = np.zeros((0, len(edges) + 1, len(OUTCOMES)), dtype=np.int64)
+        self.health = np.zeros((len(catalog), len(batch_engine.HEALTH_CLASSES)), dtype=np.int64)
+        self.advice = np.zeros(len(rules), dtype=np.int64)
+        self.risk = np.zeros(len(rules), dtype=np.int64)
+
+    def add(self, partial):
+        by_band = partial["by_band"]
+        if by_band.shape[0] > self.by_band.shape[0]:
+            grown = np.zeros(by_band.shape, dtype=np.int64)
+            grown[:self.by_band.shape[0]] = self.by_band
+            self.by_band = grown
+        self.by_band[:by_band.shape[0]] += by_band
+        self.health += partial["health"]
+        self.advice += partial["advice"]
+        self.risk += partial["risk"]
+
+    def report(self, intakes):
+        profiles = int(self.by_band[..., 0].sum())
+        buckets = []
+        for code, intake in enumerate(intakes[:self.by_band.shape[0]]):
+            for label, counts in zip(band_labels(self.edges), self.by_band[code].tolist()):
+                if counts[0]:
+                    buckets.append({"intake": intake, "budget_band": label, "profiles": counts[0],
+                                    **{name: n / counts[0] for name, n in zip(OUTCOMES[1:], counts[1:])}})
+        countries = []
+        for row, counts in zip(self.catalog.rows, self.health.tolist()):
+            shares = {name: n / profiles if profiles else 0.0 for name, n in zip(batch_engine.HEALTH_CLASSES, counts)}
+            countries.append({"id": row.id, "name": row.name, "archetype": row.archetype,
+                              "eligible": sum(counts) / profiles if profiles else 0.0, **shares})
+        return {
+            "catalog_version": self.catalog.version,
+            "profiles": profiles,
+            "budget_bands": band_labels(self.edges),
+            "buckets_by_budget": buckets,
+            "country_health": countries,
+            "advice_rules": {rule: n for rule, n in zip(self.rules, self.advice.tolist()) if n},
+            "risk_rules": {rule: n for rule, n in zip(self.rules, self.risk.tolist()) if n},
+        }
+
+
+def write_npz(path, columns, compress=False):
+    (np.savez_compressed if compress else np.savez)(path, **columns)
+
+
+def write_parquet(path, columns, compress=False):
+    """One Parquet file per chunk; matrices become fixed-size list columns."""
+    # Optional dependency, only needed for this format
+    import pyarrow
+    import pyarrow.parquet
+    arrays = {}
+    for name, values in columns.items():
+        if values.ndim == 2:
+            arrays[name] = pyarrow.FixedSizeListArray.from_arrays(pyarrow.array(values.ravel()), values.shape[1])
+        else:
+            arrays[name] = pyarrow.array(values)
+    pyarrow.parquet.write_table(pyarrow.table(arrays), path, compression="zstd" if compress else "snappy")
+
+
+def parquet_available():
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+WRITERS = {"npz": write_npz, "parquet": write_parquet}
+
+
+def _ordered(pool, tasks, window):
+    """pool results for tasks in order, with at most `window` submitted ahead."""
+    pending = deque()
+    for args in tasks:
+        pending.append(pool.apply_async(score_chunk, args))
+        if len(pending) >= window:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+
+def export(source, out_dir, format="auto", processes=None, chunk_size=None, edges=advisory_rules.BUDGET_BANDS,
+           locale="en", matrices=True, compress=False, catalog_path=None):
+    """
+    Score every profile in source (a ProfileGrid or ProfileFile) and write
+    the results to out_dir. Returns a summary of the run.
+    """
+    global _catalog
+    catalog_path = catalog_path or os.getenv("CATALOG_PATH", DEFAULT_CATALOG_PATH)
+    catalog, _ = load_catalog(catalog_path)
+    _catalog = catalog
+    edges = tuple(sorted(edges))
+    rules = advisory_rules.ENGINES[locale].rules
+    if format == "auto":
+        format = "parquet" if parquet_available() else "npz"
+    elif format == "parquet" and not parquet_available():
+        raise ImportError("Parquet output needs pyarrow (pip install pyarrow)")
+    processes = processes or os.cpu_count() or 1
+    chunk_size = chunk_size or max(256, min(MAX_CHUNK_ROWS, CHUNK_CELLS // max(len(catalog), 1)))
+
+    os.makedirs(out_dir, exist_ok=True)
+    totals = Aggregates(catalog, edges, rules)
+
+    def tasks():
+        start = 0
+        for number, (gpa, budget, intake) in enumerate(source.chunks(chunk_size)):
+            yield number, start, gpa, budget, intake, out_dir, format, edges, locale, matrices, compress
+            start += len(gpa)
+
+    began = time.perf_counter()
+    pool = None
+    if processes == 1:
+        results = (score_chunk(*args) for args in tasks())
+    else:
+        pool = multiprocessing.Pool(processes, _init_worker, (catalog_path, catalog.version))
+        results = _ordered(pool, tasks(), 2 * processes)
+    files = []
+    try:
+        for entry, partial in results:
+            files.append(entry)
+            totals.add(partial)
+    finally:
+        if pool is not None:
+            pool.terminate()
+    seconds = time.perf_counter() - began
+    rows = sum(entry["rows"] for entry in files)
+
+    manifest = {
+        "catalog_version": catalog.version,
+        "format": format,
+        "rows": rows,
+        "budget_unit": "INR lakhs",
+        "countries": [row.id for row in catalog.rows],
+        "archetypes": list(batch_engine.catalog_arrays(catalog).archetypes),
+        "health_classes": list(batch_engine.HEALTH_CLASSES),
+        "not_eligible": batch_engine.NOT_ELIGIBLE,
+        "intakes": list(source.intakes),
+        "advisory_rules": list(rules),
+        "files": files,
+    }
+    with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    with open(os.path.join(out_dir, "aggregates.json"), "w", encoding="utf-8") as f:
+        json.dump(totals.report(manifest["intakes"]), f, ensure_ascii=False, indent=2)
+
+    return {"out": out_dir, "format": format, "rows": rows, "chunks": len(files), "chunk_size": chunk_size,
+            "processes": processes, "seconds": seconds, "rows_per_second": rows / seconds if seconds else None}
+
+
+def read_chunks(out_dir):
+    """Yield the column dicts of an npz export, one per chunk."""
+    with open(os.path.join(out_dir, "manifest.json"), encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest["format"] != "npz":
+        raise ValueError(f"{out_dir} is a {manifest['format']} export; read it with pyarrow")
+    for part in manifest["files"]:
+        with np.load(os.path.join(out_dir, part["file"])) as data:
+            yield {name: data[name] for name in data.files}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--input", help="profile file (.csv, .jsonl or .ndjson)")
+    source.add_argument("--gpa", help='grid GPAs, "start:stop:step" or "a,b,c"')
+    parser.add_argument("--budget", default="5:100:5", help="grid budgets, same syntax as --gpa")
+    parser.add_argument("--intakes", default=DEFAULT_INTAKE, help="grid intakes, comma separated")
+    parser.add_argument("--currency", help="currency of the grid budgets (default INR lakhs)")
+    parser.add_argument("--out", required=True, help="output directory")
+    parser.add_argument("--format", choices=("auto",) + tuple(WRITERS), default="auto")
+    parser.add_argument("--processes", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=None, help="profiles per chunk")
+    parser.add_argument("--bands", default=",".join(map(str, advisory_rules.BUDGET_BANDS)),
+                        help="budget band edges for buckets_by_budget, in lakhs")
+    parser.add_argument("--locale", choices=tuple(advisory_rules.ENGINES), default="en")
+    parser.add_argument("--no-matrices", action="store_true",
+                        help="skip the per-country financial_health and gap_value columns")
+    parser.add_argument("--compress", action="store_true")
+    parser.add_argument("--catalog", help="catalog file (default CATALOG_PATH or the shipped one)")
+    args = parser.parse_args(argv)
+
+    if args.input:
+        profiles = ProfileFile(args.input)
+    else:
+        profiles = ProfileGrid(axis(args.gpa), axis(args.budget),
+                               [i.strip() for i in args.intakes.split(",") if i.strip()], args.currency)
+    summary = export(profiles, args.out, args.format, args.processes, args.chunk_size,
+                     [float(edge) for edge in args.bands.split(",")], args.locale,
+                     not args.no_matrices, args.compress, args.catalog)
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
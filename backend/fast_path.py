@@ -0,0 +1,196 @@
+"""
+Fast path for POST /api/recommend and /api/whatif (RECOMMEND_FAST_PATH=1).
+
+The regular route goes through FastAPI's dependency solving and a pydantic
+model for the body. For a request this small that machinery costs more
+than the lookup itself. FastPathMiddleware answers the common case
+directly: the body is parsed with orjson (stdlib json without it) into a
+slotted RecommendProfile, the query string is checked against the route's
+parameters by hand, and the handler returns the same pre-encoded body the
+route would, so responses are byte-identical.
+
+Anything the fast path isn't certain about (a missing field, a number
+sent as a string, an unknown ?view=, a non-JSON content type...) is
+replayed to the regular route unchanged, so validation errors and
+pydantic's coercions stay exactly as they were.
+"""
+import math
+import os
+from urllib.parse import parse_qsl
+
+try:
+    import orjson
+    loads = orjson.loads
+except ImportError:  # optional speedup; fall back to the stdlib parser
+    import json
+    loads = json.loads
+
+# Read per request, so benchmarks can compare both paths in one process
+ENABLED = os.getenv("RECOMMEND_FAST_PATH", "0") == "1"
+
+VIEWS = ("full", "summary")
+RANK_MODES = ("score", "pareto")
+
+
+class RecommendProfile:
+    """
+    The validated /api/recommend body; same fields as main.UserRequest.
+    converted marks a profile whose budget was given in a currency and is
+    now in INR lakhs (see main.in_lakhs).
+    """
+
+    __slots__ = ("degree", "gpa", "major", "budget", "priority", "funding_source", "target_intake", "currency",
+                 "converted")
+
+    def __init__(self, degree, gpa, major, budget, priority, funding_source="Self", target_intake="Fall 2025",
+                 currency=None, converted=False):
+        self.degree = degree
+        self.gpa = gpa
+        self.major = major
+        self.budget = budget
+        self.priority = priority
+        self.funding_source = funding_source
+        self.target_intake = target_intake
+        self.currency = currency
+        self.converted = converted
+
+
+def _number(value):
+    # bool is an int, but pydantic has its own rules for it; leave it to them
+    if type(value) not in (int, float):
+        return None
+    try:
+        value = float(value)
+    except OverflowError:
+        return None
+    return value if math.isfinite(value) else None
+
+
+def parse_profile(body):
+    """RecommendProfile for a JSON body, or None if it needs full validation."""
+    try:
+        data = loads(body)
+    except ValueError:
+        return None
+    if type(data) is not dict:
+        return None
+    degree, major, priority = data.get("degree"), data.get("major"), data.get("priority")
+    if not (type(degree) is str and type(major) is str and type(priority) is str):
+        return None
+    gpa, budget = _number(data.get("gpa")), _number(data.get("budget"))
+    if gpa is None or budget is None:
+        return None
+    funding_source = data.get("funding_source", "Self")
+    target_intake = data.get("target_intake", "Fall 2025")
+    if not (funding_source is None or type(funding_source) is str):
+        return None
+    if not (target_intake is None or type(target_intake) is str):
+        return None
+    currency = data.get("currency")
+    if not (currency is None or type(currency) is str):
+        return None
+    return RecommendProfile(degree, gpa, major, budget, priority, funding_source, target_intake, currency)
+
+
+def parse_query(query_string):
+    """(view, fields, rank, top) for a query string, or None if it needs full validation."""
+    # Last value wins for repeated keys, as with Starlette's QueryParams
+    params = dict(parse_qsl(query_string.decode("latin-1"), keep_blank_values=True))
+    if "similar" in params:
+        # Left to the route, and never coalesced: appends change the answer
+        return None
+    view = params.get("view", "full")
+    rank = params.get("rank")
+    top = params.get("top")
+    if view not in VIEWS or (rank is not None and rank not in RANK_MODES):
+        return None
+    if top is not None:
+        if not (top.isascii() and top.isdigit() and top[0] != "0"):
+            return None
+        top = int(top)
+    return view, params.get("fields"), rank, top
+
+
+def parse_int(text):
+    """int for a plain decimal header value ("12", "-3"), or None if it needs full validation."""
+    digits = text[1:] if text[:1] == "-" else text
+    if not (digits.isascii() and digits.isdigit()) or (digits[0] == "0" and len(digits) > 1):
+        return None
+    return int(text)
+
+
+def is_json(content_type):
+    """Whether FastAPI would parse a body with this Content-Type as JSON.
+
+    Without a Content-Type, FastAPI parses JSON only when the route opts out of
+    strict content types (the default changed across releases), so leave those
+    requests to the route.
+    """
+    if not content_type:
+        return False
+    media = content_type.split(";", 1)[0].strip().lower()
+    maintype, _, subtype = media.partition("/")
+    return maintype == "application" and (subtype == "json" or subtype.endswith("+json"))
+
+
+async def read_body(receive):
+    """The whole request body, or None if the client went away first."""
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            return None
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+
+def replaying(body, receive):
+    """A receive() that yields an already read body once, then defers to the real one."""
+    replayed = False
+
+    async def replay():
+        nonlocal replayed
+        if not replayed:
+            replayed = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+
+    return replay
+
+
+class FastPathMiddleware:
+    """
+    Pure ASGI middleware serving POST `path` through handler(scope, profile,
+    view, fields, rank, top), which returns a Response, or None to defer to
+    the regular route.
+    """
+
+    def __init__(self, app, path, handler):
+        self.app = app
+        self.path = path
+        self.handler = handler
+
+    async def __call__(self, scope, receive, send):
+        if not (ENABLED and scope["type"] == "http" and scope["method"] == "POST" and scope["path"] == self.path):
+            return await self.app(scope, receive, send)
+
+        content_type = None
+        for name, value in scope["headers"]:
+            if name == b"content-type":
+                content_type = value.decode("latin-1")
+                break
+
+        body = await read_body(receive)
+        if body is None:
+            return
+
+        response = None
+        if is_json(content_type):
+            profile = parse_profile(body)
+            query = parse_query(scope["query_string"]) if profile is not None else None
+            if query is not None:
+                response = self.handler(scope, profile, *query)
+        if response is not None:
+            return await response(scope, receive, send)
+        await self.app(scope, replaying(body, receive), send)
@@ -0,0 +1,179 @@
+"""
+Currency conversion for the catalog's money figures.
+
+Catalog figures (costs, total_cost, avg_salary_post_grad) are INR lakhs at
+the FX table's year. The table (data/fx_rates.json, override with
+FX_RATES_PATH) gives each currency's INR rate, display unit and yearly
+inflation, plus each country's local currency. A country's figures are
+modelled in its local currency: converted out of INR at the table's
+rates, grown by that currency's inflation up to the requested year, then
+converted into the student's currency.
+
+Converted figures for the whole catalog are computed once per (catalog,
+currency, table version, year) and kept with their encoded body, so a
+request in another currency costs a dict lookup plus converting its own
+budget.
+"""
+import json
+import os
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+
+from catalog import encode_json
+
+DEFAULT_FX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "fx_rates.json")
+
+# Rupees per lakh: catalog figures are lakhs, table rates are per rupee
+LAKH = 100_000
+
+# Added to a response's meta when the request gave its budget in a
+# currency: money figures in the body are still catalog units
+CATALOG_UNITS = {"currency": "INR", "unit": LAKH}
+
+
+class Currency:
+    __slots__ = ("code", "symbol", "rate", "unit", "inflation", "from_lakhs", "to_lakhs")
+
+    def __init__(self, code, symbol, rate, unit=1, inflation=0.0):
+        self.code = code
+        self.symbol = symbol
+        # INR per unit of the currency; figures are shown in multiples of `unit`
+        self.rate = rate
+        self.unit = unit
+        self.inflation = inflation
+        self.to_lakhs = rate * unit / LAKH
+        self.from_lakhs = LAKH / (rate * unit)
+
+
+class FXTable:
+    """One version of the FX table."""
+
+    def __init__(self, data):
+        self.version = data["version"]
+        self.year = data["year"]
+        self.base = data["base"]
+        self.currencies = {code: Currency(code, **spec) for code, spec in data["currencies"].items()}
+        if self.base not in self.currencies:
+            raise ValueError(f"Base currency {self.base} has no rate")
+        self.countries = data.get("countries", {})
+        unknown = set(self.countries.values()) - self.currencies.keys()
+        if unknown:
+            raise ValueError(f"Countries use unknown currencies: {', '.join(sorted(unknown))}")
+
+    def currency(self, code):
+        try:
+            return self.currencies[code.upper()]
+        except KeyError:
+            raise ValueError(f"Unknown currency: {code}") from None
+
+    def growth(self, code, year):
+        """Price level of `year` relative to the table's year, in currency code."""
+        if year is None or year == self.year:
+            return 1.0
+        return (1.0 + self.currencies[code].inflation) ** (year - self.year)
+
+    def budget_in_lakhs(self, amount, code):
+        """A budget in currency code as INR lakhs, the catalog's unit."""
+        return amount * self.currency(code).to_lakhs
+
+
+def load_fx_table(path=DEFAULT_FX_PATH):
+    with open(path, "rb") as f:
+        return FXTable(json.load(f))
+
+
+_table_lock = threading.Lock()
+_table = (None, None, None)
+
+
+def fx_table(path=None):
+    """The table at FX_RATES_PATH, re-read whenever the file changes."""
+    global _table
+    path = path or os.getenv("FX_RATES_PATH", DEFAULT_FX_PATH)
+    mtime = os.stat(path).st_mtime_ns
+    cached_path, cached_mtime, table = _table
+    if cached_path != path or cached_mtime != mtime:
+        with _table_lock:
+            table = load_fx_table(path)
+            _table = (path, mtime, table)
+    return table
+
+
+class CostView:
+    """The catalog's money figures in one currency and year."""
+
+    def __init__(self, catalog, table, currency, year=None):
+        self.currency = currency = table.currency(currency)
+        self.year = year or table.year
+        rows = catalog.rows
+        native = [table.countries.get(row.name, table.base) for row in rows]
+        # Out of INR into the local currency and back in at the same table
+        # cancels out; what's left is local inflation up to `year`
+        growth = np.array([table.growth(code, year) for code in native])
+        scale = growth * currency.from_lakhs
+
+        lakhs = np.array([
+            [row.country.costs.tuition, row.country.costs.living, row.country.costs.visa_fees, row.country.costs.insurance]
+            for row in rows
+        ], dtype=np.float64).reshape(-1, 4)
+        total = np.frombuffer(catalog.columns["total_cost"])
+        salary = np.frombuffer(catalog.columns["avg_salary_post_grad"])
+
+        self.total_cost = total * scale
+        self.avg_salary_post_grad = salary * scale
+        self.costs = lakhs * scale[:, None]
+        self.roi_percentage = np.round((self.avg_salary_post_grad * 2 - self.total_cost) / self.total_cost * 100, 1)
+        native_total = total * growth * np.array([table.currencies[code].from_lakhs for code in native])
+
+        def money(values):
+            return [round(v, 2) for v in values.tolist()]
+
+        countries = []
+        for row, code, costs, total_cost, salary_, roi, native_cost in zip(
+            rows, native, self.costs.tolist(), money(self.total_cost), money(self.avg_salary_post_grad),
+            self.roi_percentage.tolist(), money(native_total),
+        ):
+            countries.append({
+                "id": row.id,
+                "name": row.name,
+                "costs": dict(zip(("tuition", "living", "visa_fees", "insurance"), (round(c, 2) for c in costs))),
+                "total_cost": total_cost,
+                "avg_salary_post_grad": salary_,
+                "roi_percentage": roi,
+                "native": {"currency": code, "total_cost": native_cost},
+            })
+        self.body = encode_json({
+            "status": "success",
+            "currency": currency.code,
+            "symbol": currency.symbol,
+            "unit": currency.unit,
+            "fx_version": table.version,
+            "year": self.year,
+            "countries": countries,
+        }).encode("utf-8")
+
+
+# Per catalog: (currency, table version, year) -> CostView, least recently used first
+MAX_VIEWS = 32
+_views = weakref.WeakKeyDictionary()
+_views_lock = threading.Lock()
+
+
+def cost_view(catalog, currency, year=None, table=None):
+    table = table or fx_table()
+    key = (currency.upper(), table.version, year or table.year)
+    with _views_lock:
+        views = _views.setdefault(catalog, OrderedDict())
+        view = views.get(key)
+        if view is not None:
+            views.move_to_end(key)
+            return view
+    view = CostView(catalog, table, currency, year)
+    with _views_lock:
+        views[key] = view
+        while len(views) > MAX_VIEWS:
+            views.popitem(last=False)
+    return view
@@ -0,0 +1,242 @@
+"""
+Hot-path timing and counters, exported at /metrics in the Prometheus text
+format.
+
+Request stages are timed with a RequestTimer: each mark(stage) records the
+time since the previous mark on the monotonic perf_counter clock, so a
+handler pays one clock read per stage. With METRICS_ENABLED=0 (and no
+X-Server-Timing request header) handlers get NULL_TIMER, whose mark() does
+nothing, and the middleware passes requests straight through.
+"""
+import bisect
+import os
+import time
+
+# Seconds; most stages are well under a millisecond
+DEFAULT_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025,
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+# Request header that asks for a Server-Timing response header
+SERVER_TIMING_HEADER = b"x-server-timing"
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        # One slot per bucket plus +Inf; made cumulative at render time
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Family:
+    """One metric name: its type, help text and a series per label tuple."""
+
+    def __init__(self, name, kind, help, labels=()):
+        self.name = name
+        self.kind = kind
+        self.help = help
+        self.labels = tuple(labels)
+        self.series = {}
+
+    def render(self, lines):
+        lines.append(f"# HELP {self.name} {self.help}")
+        lines.append(f"# TYPE {self.name} {self.kind}")
+        for values, sample in sorted(self.series.items()):
+            if self.kind != "histogram":
+                lines.append(f"{self.name}{_format_labels(self.labels, values)} {_format_value(sample)}")
+                continue
+            cumulative = 0
+            for bound, count in zip(sample.buckets + (float("inf"),), sample.counts):
+                cumulative += count
+                labels = _format_labels(self.labels + ("le",), values + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(sample.sum)}")
+            lines.append(f"{self.name}_count{labels} {sample.count}")
+
+
+class Registry:
+    """
+    In-process metrics. Updates happen on the event loop thread, so there is
+    no locking; gauges that mirror other objects' state (cache sizes, the
+    catalog) are filled in by collectors at scrape time.
+    """
+
+    def __init__(self, enabled=True, prefix="gpw_"):
+        self.enabled = enabled
+        self.prefix = prefix
+        self.families = {}
+        self.collectors = []
+
+    def family(self, name, kind, help, labels=()):
+        family = self.families.get(name)
+        if family is None:
+            family = self.families[name] = Family(self.prefix + name, kind, help, labels)
+        return family
+
+    def observe(self, name, value, *labels, help=""):
+        if not self.enabled:
+            return
+        series = self.family(name, "histogram", help).series
+        histogram = series.get(labels)
+        if histogram is None:
+            histogram = series[labels] = Histogram()
+        histogram.observe(value)
+
+    def inc(self, name, *labels, amount=1, help=""):
+        if not self.enabled:
+            return
+        series = self.family(name, "counter", help).series
+        series[labels] = series.get(labels, 0) + amount
+
+    def collector(self, fn):
+        """Register fn(registry) to set gauges just before each scrape."""
+        self.collectors.append(fn)
+        return fn
+
+    def set(self, name, value, *labels, kind="gauge", help=""):
+        self.family(name, kind, help).series[labels] = value
+
+    def render(self):
+        for collect in self.collectors:
+            collect(self)
+        lines = []
+        for family in self.families.values():
+            family.render(lines)
+        return "\n".join(lines) + "\n"
+
+
+def _env_enabled():
+    return os.getenv("METRICS_ENABLED", "1").lower() not in ("0", "false", "no", "off")
+
+
+METRICS = Registry(enabled=_env_enabled())
+
+# Label names, declared up front so /metrics has HELP text from the start
+METRICS.family("stage_seconds", "histogram", "Time spent in each stage of a request.", ("handler", "stage"))
+METRICS.family("request_seconds", "histogram", "Time from request start to the last body byte.", ("handler", "method"))
+METRICS.family("requests_total", "counter", "Requests served.", ("handler", "method", "status"))
+METRICS.family("advisor_seconds", "histogram", "Latency of advisor model calls.", ("outcome",))
+METRICS.family("advisor_cache_total", "counter", "Advisor note cache lookups.", ("result",))
+METRICS.family("requests_coalesced_total", "counter", "Requests served a concurrent identical request's response.",
+               ("path",))
+METRICS.family("rate_limited_total", "counter", "Requests rejected by the rate limiter.", ("backend",))
+
+
+class RequestTimer:
+    """Consecutive stage spans for one request."""
+
+    __slots__ = ("last", "spans")
+
+    def __init__(self, start):
+        self.last = start
+        self.spans = []
+
+    def mark(self, stage):
+        """Close the span that started at the previous mark (or request start)."""
+        now = time.perf_counter()
+        self.spans.append((stage, now - self.last))
+        self.last = now
+
+    def skip(self):
+        """Start the next span now, leaving the time since the last mark unrecorded."""
+        self.last = time.perf_counter()
+
+
+class _NullTimer:
+    __slots__ = ()
+    spans = ()
+
+    def mark(self, stage):
+        pass
+
+    def skip(self):
+        pass
+
+
+NULL_TIMER = _NullTimer()
+
+
+def request_timer(request):
+    """The timer MetricsMiddleware attached to this request, or NULL_TIMER."""
+    return request.scope.get("gpw.timer", NULL_TIMER)
+
+
+def server_timing(spans, total):
+    """Server-Timing header value; durations in milliseconds."""
+    parts = [f"{stage};dur={seconds * 1000:.3f}" for stage, seconds in spans]
+    parts.append(f"total;dur={total * 1000:.3f}")
+    return ", ".join(parts)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware: starts each request's RequestTimer and, when the
+    response is done, records stage spans, request latency and status into
+    the registry. Requests carrying an X-Server-Timing header get the spans
+    back in a Server-Timing response header.
+    """
+
+    def __init__(self, app, registry=METRICS):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        want_header = any(name == SERVER_TIMING_HEADER for name, _ in scope["headers"])
+        if not (self.registry.enabled or want_header):
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        timer = scope["gpw.timer"] = RequestTimer(start)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if want_header:
+                    value = server_timing(timer.spans, time.perf_counter() - start)
+                    message = {**message, "headers": [*message.get("headers", ()),
+                                                      (b"server-timing", value.encode("latin-1"))]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            registry = self.registry
+            if registry.enabled:
+                # The router leaves the matched endpoint in the scope
+                endpoint = scope.get("endpoint")
+                handler = getattr(endpoint, "__name__", "unmatched")
+                for stage, seconds in timer.spans:
+                    registry.observe("stage_seconds", seconds, handler, stage)
+                registry.observe("request_seconds", time.perf_counter() - start, handler, scope["method"])
+                registry.inc("requests_total", handler, scope["method"], str(status))
@@ -1,10 +1,109 @@
-from fastapi import FastAPI
+import asyncio
+import datetime
+import hmac
+import os
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Optional
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
+from starlette.datastructures import Headers
+from starlette.middleware import Middleware
+from typing import List, Literal, Optional
+import advisory_rules
+import ai_advisor
+import batch_engine
 import core_engine
+import deadline_calendar
+import coalescing
+import fast_path
+import fx
+import instrumentation
+import pr_simulator
+import ranking
+import rate_limit
+import response_cache
+import sensitivity
+import serialization
+import similarity
+import streaming
+import whatif
+from catalog import SUMMARY_FIELDS, encode_plain
 
-app = FastAPI(title="GlobalPathways AI - Strategic Discovery Engine")
+SHARED_POLL_SECONDS = 2.0
+
+# STARTUP_WARMUP=0 skips the warm-up below (e.g. under --reload)
+WARMUP = os.getenv("STARTUP_WARMUP", "1") == "1"
+# Response bodies pre-rendered at startup: the frontend's default budget
+# and intake, full view, at the GPA cut points nearest a typical GPA
+WARMUP_PROFILES = 16
+WARMUP_GPA = 7.5
+WARMUP_BUDGET = 25.0
+# Beyond this many rows, building every row's projection fragments up
+# front costs more memory than it saves on the first ?view=summary request
+WARMUP_FRAGMENT_ROWS = 10_000
+
+# Filled in by warm_up(); /health reports "starting" until ready
+STARTUP = {"ready": not WARMUP, "seconds": None}
+
+def warm_catalog(catalog):
+    """Build everything cached off a catalog that requests would otherwise build lazily."""
+    for gpa in sorted({row.min_gpa for row in catalog.rows})[:255]:
+        catalog.match(gpa)
+    if len(catalog) <= WARMUP_FRAGMENT_ROWS:
+        for row in catalog.rows:
+            row.fragments
+    batch_engine.catalog_arrays(catalog)
+    table = fx.fx_table()
+    fx.cost_view(catalog, table.base, table=table)
+
+def warmup_requests(catalog):
+    """Recommendation requests whose bodies are worth having cached before the first user arrives."""
+    cuts = sorted({row.min_gpa for row in catalog.rows}, key=lambda gpa: abs(gpa - WARMUP_GPA))
+    return [
+        UserRequest(degree="Bachelors", gpa=gpa, major="", budget=WARMUP_BUDGET, priority="High ROI")
+        for gpa in cuts[:WARMUP_PROFILES]
+    ]
+
+async def warm_up(catalog):
+    """Fill the catalog's caches off the event loop and pre-render common responses, then report ready."""
+    start = time.perf_counter()
+    try:
+        await asyncio.to_thread(warm_catalog, catalog)
+        for user in warmup_requests(catalog):
+            # On the loop: the response cache isn't thread-safe
+            prepare_recommendation(user, "full", None)
+            await asyncio.sleep(0)
+    except Exception as e:
+        # Only caches; requests build whatever is missing themselves
+        print(f"Warm-up error: {e!r}")
+    STARTUP["seconds"] = time.perf_counter() - start
+    STARTUP["ready"] = True
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Compiled here rather than at import; a broken catalog still fails startup
+    catalog = await asyncio.to_thread(core_engine.get_catalog)
+    # Opt-in hot reload of the country data file (seconds between mtime checks)
+    watch_interval = float(os.getenv("CATALOG_WATCH_SECONDS", "0"))
+    if watch_interval <= 0 and core_engine.SHARED_CATALOG_DIR:
+        # Shared mode always polls, to pick up generations other workers publish
+        watch_interval = SHARED_POLL_SECONDS
+    if watch_interval > 0:
+        core_engine.STORE.watch(watch_interval)
+    # Optional "students like you" index (SIMILARITY_PATH); loaded before
+    # ready, so ?similar= never answers 404 just because it's still loading
+    await asyncio.to_thread(similarity.load_from_env)
+    # In the background, so /health can answer "starting" meanwhile
+    warming = asyncio.create_task(warm_up(catalog)) if WARMUP else None
+    yield
+    if warming is not None:
+        warming.cancel()
+    core_engine.STORE.stop_watching()
+    await ai_advisor.close_advisor()
+
+app = FastAPI(title="GlobalPathways AI - Strategic Discovery Engine", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -14,6 +113,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so request timings include the other middleware
+app.add_middleware(instrumentation.MetricsMiddleware)
+
+# Inside CORS (browsers need CORS headers on a 429 too) and metrics; opt-in
+# via RATE_LIMIT_PER_SECOND (see rate_limit) and COALESCE_REQUESTS=1
+RATE_LIMITER = rate_limit.backend_from_env(os.environ)
+if RATE_LIMITER is not None:
+    app.user_middleware.append(Middleware(rate_limit.RateLimitMiddleware, backend=RATE_LIMITER,
+                                          trusted_proxies=int(os.getenv("TRUST_FORWARDED_FOR", "0"))))
+if os.getenv("COALESCE_REQUESTS", "0") == "1":
+    app.user_middleware.append(Middleware(coalescing.CoalescingMiddleware))
+
 class UserRequest(BaseModel):
     degree: str
     gpa: float
@@ -22,10 +133,58 @@ class UserRequest(BaseModel):
     priority: str
     funding_source: Optional[str] = "Self"
     target_intake: Optional[str] = "Fall 2025"
+    # Currency of `budget` (see fx); None means INR lakhs, the catalog's unit
+    currency: Optional[str] = None
 
-@app.post("/api/recommend")
-async def recommend_pathway(user: UserRequest):
-    user_profile = core_engine.UserProfile(
+class BatchRequest(BaseModel):
+    gpa: List[float]
+    budget: List[float]
+
+class SimulationRequest(BaseModel):
+    budget: float
+    gpa: Optional[float] = None
+    countries: Optional[List[str]] = None
+    trials: int = Field(default=100_000, ge=1, le=pr_simulator.MAX_TRIALS)
+    seed: int = 0
+    horizon_years: float = Field(default=10, gt=0, le=40)
+
+def resolve_fields(catalog, view, fields):
+    """Field projection for ?view= / ?fields=; None means the full record."""
+    if fields:
+        requested = frozenset(f.strip() for f in fields.split(",") if f.strip())
+        unknown = requested - catalog.field_names
+        if unknown:
+            raise HTTPException(status_code=422, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+        return requested
+    if view == "summary":
+        return frozenset(SUMMARY_FIELDS)
+    return None
+
+# Ready-to-send /api/recommend bodies, see recommendation_key
+RESPONSE_CACHE = response_cache.ResponseCache()
+
+def recommendation_key(catalog, user: UserRequest, matched, projection, ordering=None):
+    """
+    Canonical cache key for a recommendation.
+
+    The body depends only on which min_gpa thresholds the GPA clears, the
+    budget, the intake and the projection. The raw GPA is echoed only in
+    the zero-paths messages, so otherwise it collapses to its cut point.
+    The budget is echoed in the messages and gap values, so it stays, as a
+    float so that 25 and 25.0 share an entry. Floats are keyed by their
+    hex form: -0.0 == 0.0, but they render differently. Ranked bodies also
+    depend on the ordering (mode, priority weights, top k). A budget given
+    in a currency adds its units to meta.
+    """
+    if any(matched.values()):
+        gpa_key = ("cut", catalog.cut(user.gpa))
+    else:
+        gpa_key = ("gpa", float(user.gpa).hex())
+    return (gpa_key, float(user.budget).hex(), user.target_intake, projection, ordering, converted(user))
+
+def user_profile(user: UserRequest):
+    """The advisor's view of a request profile."""
+    return core_engine.UserProfile(
         current_degree=user.degree,
         gpa=user.gpa,
         major_interest=user.major,
@@ -35,135 +194,438 @@ async def recommend_pathway(user: UserRequest):
         target_intake=user.target_intake
     )
 
-    strategies = core_engine.discover_strategies(user_profile)
-
-    total_options = sum(len(v) for v in strategies.values())
-    safe_count = len(strategies['safe_bets'])
-    fast_count = len(strategies['fast_track'])
-    moonshot_count = len(strategies['moonshots'])
-
-    # ========== ZERO-PATHS HANDLER ==========
-    if total_options == 0:
-        if user.gpa < 6.0:
-            advisor_msg = (
-                f"With a GPA of {user.gpa}, most graduate programs have minimum requirements that aren't met. "
-                "This doesn't mean your goals are impossible—consider pathway programs, diploma courses, "
-                "or countries with more flexible academic requirements."
-            )
-            risk_note = (
-                "🎓 Suggestion: Many countries accept GPA 6.0+. Focus on improving academics or "
-                "explore alternative entry routes like portfolio-based admissions."
-            )
-        elif user.budget < 12:
-            advisor_msg = (
-                f"With ₹{user.budget}L, even the most affordable destinations (like Germany at ~₹12L) "
-                "become challenging. Consider scholarships, education loans, or part-time work options."
-            )
-            risk_note = (
-                "💰 Suggestion: Germany offers zero tuition but requires ~₹12L for living costs. "
-                "Look into DAAD scholarships or sponsored programs."
-            )
-        else:
-            advisor_msg = (
-                f"With GPA {user.gpa} and budget ₹{user.budget}L, no pathways currently meet "
-                "all thresholds. This usually means one constraint is blocking discovery."
-            )
-            risk_note = (
-                "🔍 Suggestions: Try adjusting your budget slightly, or check if your GPA meets "
-                "minimum requirements (most countries need 6.0-7.0+)."
-            )
-        
-        return {
-            "status": "success",
-            "strategies": strategies,
-            "consultant_note": advisor_msg,
-            "risk_advisory": risk_note,
-            "meta": {
-                "total_options": 0,
-                "safe_count": 0,
-                "fast_count": 0,
-                "moonshot_count": 0
-            }
+def converted(user):
+    """Whether user's budget was given in a currency (see in_lakhs); UserRequest has no flag."""
+    return getattr(user, "converted", False)
+
+def in_lakhs(user: UserRequest):
+    """The profile with its budget converted from user.currency to INR lakhs."""
+    try:
+        budget = fx.fx_table().budget_in_lakhs(user.budget, user.currency)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return fast_path.RecommendProfile(user.degree, user.gpa, user.major, budget, user.priority,
+                                      user.funding_source, user.target_intake, converted=True)
+
+def prepare_recommendation(user: UserRequest, view, fields, timer=instrumentation.NULL_TIMER,
+                           rank=None, top=None, catalog=None):
+    """
+    Shared front half of the recommend endpoints: (profile in lakhs,
+    matched rows, cached body). user is a UserRequest or a
+    fast_path.RecommendProfile; catalog defaults to the current one.
+    """
+    if user.currency is not None:
+        user = in_lakhs(user)
+    # Everything up to here (body read, routing, pydantic or the fast path) is validation
+    timer.mark("validation")
+    # One catalog snapshot for the whole request, even if a reload lands mid-way
+    if catalog is None:
+        catalog = core_engine.get_catalog()
+    projection = resolve_fields(catalog, view, fields)
+
+    matched = core_engine.match_strategies(user, catalog)
+    timer.mark("match")
+
+    ordering = None if rank is None else (rank, ranking.priority_key(user.priority), top)
+    version = catalog.version
+    key = recommendation_key(catalog, user, matched, projection, ordering)
+    cached = RESPONSE_CACHE.get(version, key)
+    timer.mark("cache")
+    if cached is None:
+        ranked = None
+        if ordering is not None:
+            ranked = ranking.rank_buckets(catalog, user.gpa, user.budget, user.priority, rank, top)
+            timer.mark("rank")
+        body = render_recommendation(user, matched, projection, timer, ranked)
+        cached = RESPONSE_CACHE.put(version, key, body)
+    return user, matched, cached
+
+def similar_profiles(user, catalog, k):
+    """The "similar_profiles" section: the k nearest historical profiles and where they went."""
+    index = similarity.get_index()
+    if index is None:
+        raise HTTPException(status_code=404, detail="Similar profiles are not available (SIMILARITY_PATH is not set)")
+    result = index.nearest(user, k)
+    for destination in result["destinations"]:
+        row = catalog.by_id.get(destination["id"])
+        if row is not None:
+            destination["name"] = row.name
+            destination["flag"] = row.country.flag
+    return result
+
+def with_similar(cached, user, k, timer=instrumentation.NULL_TIMER):
+    """cached's body with a "similar_profiles" section appended; never cached, appends change it."""
+    section = similar_profiles(user, core_engine.get_catalog(), k)
+    body = cached.body[:-1] + b',"similar_profiles":' + encode_plain(section) + b"}"
+    timer.mark("similar")
+    return response_cache.CachedResponse(body)
+
+def recommendation_response(cached, if_none_match):
+    headers = {"ETag": cached.etag, "Cache-Control": "no-cache"}
+    if response_cache.etag_matches(if_none_match, cached.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(cached.body, media_type="application/json", headers=headers)
+
+@app.post("/api/recommend")
+async def recommend_pathway(user: UserRequest, request: Request,
+                            view: Literal["full", "summary"] = "full",
+                            fields: Optional[str] = None,
+                            rank: Optional[Literal["score", "pareto"]] = None,
+                            top: Optional[int] = Query(default=None, ge=1),
+                            similar: Optional[int] = Query(default=None, ge=1, le=similarity.MAX_K)):
+    """
+    Strategies per archetype bucket. Buckets are in catalog order unless
+    rank is given: "score" orders them by the priority-weighted score,
+    "pareto" keeps only each bucket's Pareto frontier; top caps each ranked
+    bucket. similar=k adds "similar_profiles": the k nearest historical
+    profiles (see similarity) and their destinations.
+    """
+    timer = instrumentation.request_timer(request)
+    profile, _, cached = prepare_recommendation(user, view, fields, timer, rank, top)
+    if similar is not None:
+        cached = with_similar(cached, profile, similar, timer)
+    return recommendation_response(cached, request.headers.get("if-none-match"))
+
+def recommend_fast(scope, profile, view, fields, rank, top):
+    """recommend_pathway for fast_path.FastPathMiddleware; None defers to the route."""
+    # Label metrics as the route would
+    scope["endpoint"] = recommend_pathway
+    try:
+        _, _, cached = prepare_recommendation(profile, view, fields, scope.get("gpw.timer", instrumentation.NULL_TIMER),
+                                           rank, top)
+    except HTTPException:
+        # e.g. unknown ?fields= or currency; let the route produce the error response
+        return None
+    return recommendation_response(cached, Headers(scope=scope).get("if-none-match"))
+
+# Innermost middleware, inside CORS and metrics, so they wrap fast-path responses too
+app.user_middleware.append(Middleware(fast_path.FastPathMiddleware, path="/api/recommend", handler=recommend_fast))
+
+@app.post("/api/recommend/stream")
+async def recommend_stream(user: UserRequest, request: Request, view: Literal["full", "summary"] = "full",
+                           fields: Optional[str] = None, format: Literal["ndjson", "sse"] = "ndjson",
+                           rank: Optional[Literal["score", "pareto"]] = None,
+                           top: Optional[int] = Query(default=None, ge=1)):
+    """
+    /api/recommend as a stream: the usual body first, straight from the
+    deterministic engine, then an advisor note per country as each model
+    call finishes, for the first streaming.NOTES_PER_BUCKET countries of
+    each bucket the body lists (after rank/top).
+    """
+    catalog = core_engine.get_catalog()
+    user, matched, cached = prepare_recommendation(
+        user, view, fields, instrumentation.request_timer(request), rank, top, catalog
+    )
+
+    def countries():
+        # Consumed once the body is out: ranking and evaluating rows cost
+        # time in catalog size, the first byte shouldn't
+        buckets = matched if rank is None else ranking.rank_buckets(
+            catalog, user.gpa, user.budget, user.priority, rank, top)
+        for rows in buckets.values():
+            for row in rows[:streaming.NOTES_PER_BUCKET]:
+                yield row, row.evaluate(user.budget, user.target_intake)
+
+    return StreamingResponse(
+        streaming.recommendation_events(format, cached.body, ai_advisor.get_advisor(), user_profile(user),
+                                        countries()),
+        media_type=streaming.MEDIA_TYPES[format],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def render_recommendation(user: UserRequest, matched, projection, timer=instrumentation.NULL_TIMER, ranked=None):
+    """
+    Encoded /api/recommend body for a profile's matched catalog rows.
+    ranked, if given, replaces matched as the rows listed under strategies;
+    counts and messages always describe everything matched.
+    """
+    total_options = sum(len(v) for v in matched.values())
+    safe_count = len(matched['safe_bets'])
+    fast_count = len(matched['fast_track'])
+    moonshot_count = len(matched['moonshots'])
+
+    # Zero-paths handler, empathy engine and risk advisory: see advisory_rules
+    advisor_msg, risk_note = advisory_rules.advisory_messages(
+        user.gpa, user.budget, safe_count, fast_count, moonshot_count
+    )
+    timer.mark("messages")
+
+    # Static country data was serialized once at catalog compile time;
+    # only the per-user fields are encoded here
+    body = serialization.encode_recommendation(
+        serialization.encode_strategies(matched if ranked is None else ranked,
+                                        user.budget, user.target_intake, projection),
+        advisor_msg,
+        risk_note,
+        {
+            "total_options": total_options,
+            "safe_count": safe_count,
+            "fast_count": fast_count,
+            "moonshot_count": moonshot_count,
+            # Money figures stay INR lakhs whatever the budget was given in
+            **(fx.CATALOG_UNITS if converted(user) else {})
         }
-    # ========== END ZERO-PATHS HANDLER ==========
-
-    # ========== EMPATHY ENGINE (TONE-AWARE) ==========
-    has_safe_options = safe_count > 0
-    
-    if user.budget < 15:
-        if has_safe_options:
-            advisor_msg = (
-                f"With ₹{user.budget}L, we've identified {total_options} realistic paths. "
-                "Germany's zero-tuition model could be your strongest play—graduate debt-free with a clear PR route."
-            )
-        else:
-            advisor_msg = (
-                f"With ₹{user.budget}L, options are limited but not zero. "
-                f"You have {total_options} path(s) available, though they carry higher risk. "
-                "Consider increasing budget to unlock safer routes like Germany."
-            )
-    elif user.budget < 30:
-        if has_safe_options:
-            advisor_msg = (
-                f"₹{user.budget}L opens {total_options} strategic paths. You're in the sweet spot—"
-                "Ireland's 1-year ROI vs Germany's debt-free route are both viable. Consider your risk appetite."
-            )
-        else:
-            advisor_msg = (
-                f"₹{user.budget}L opens {total_options} paths, but none in the 'Safe Bets' category yet. "
-                "The options available are faster but carry more uncertainty. A small budget increase could unlock Germany."
-            )
-    elif user.budget < 45:
-        if has_safe_options:
-            advisor_msg = (
-                f"Strong position with ₹{user.budget}L. You qualify for {total_options} countries "
-                "including premium destinations. Weigh brand value against PR timeline—they don't always align."
-            )
-        else:
-            advisor_msg = (
-                f"With ₹{user.budget}L, you have {total_options} options but they're skewed toward higher-risk paths. "
-                "Check if your GPA (currently {user.gpa}) meets requirements for safer countries."
-            )
-    else:
-        advisor_msg = (
-            f"With ₹{user.budget}L, all doors are open. But remember: highest investment doesn't mean "
-            "highest return. A 94% PR rate often beats a 27% lottery."
-        )
-    # ========== END EMPATHY ENGINE ==========
-
-    # ========== RISK ADVISORY ==========
-    if moonshot_count > 0 and safe_count > 0:
-        risk_note = (
-            f"📊 Your profile matches {safe_count} high-probability paths and {moonshot_count} "
-            "high-reward option(s). We recommend securing a safe bet before betting on moonshots."
-        )
-    elif moonshot_count > 0 and safe_count == 0:
-        risk_note = (
-            "⚠️ Currently, your profile primarily matches higher-risk paths. "
-            "Consider increasing budget or exploring GPA improvement options."
-        )
-    elif fast_count > 0 and safe_count == 0:
-        risk_note = (
-            f"⚡ You have {fast_count} fast-track option(s) available. These offer speed but moderate uncertainty. "
-            "A small budget increase could unlock safer alternatives."
-        )
+    )
+    timer.mark("encode")
+    return body
+
+@app.post("/api/recommend/batch")
+async def recommend_batch(batch: BatchRequest, format: Literal["columns", "ndjson"] = "columns"):
+    if len(batch.gpa) != len(batch.budget):
+        raise HTTPException(status_code=422, detail="gpa and budget must have the same length")
+
+    # Scoring and encoding are O(profiles x countries); keep them off the loop
+    result = await asyncio.to_thread(batch_engine.score_profiles, batch.gpa, batch.budget,
+                                     core_engine.get_catalog())
+
+    if format == "ndjson":
+        # Starlette iterates a plain generator in its threadpool
+        return StreamingResponse(result.iter_ndjson(), media_type="application/x-ndjson")
+
+    body = await asyncio.to_thread(result.encode, status="success", profiles=len(result))
+    return Response(body, media_type="application/json")
+
+# Each session's last profile, for POST /api/whatif
+WHATIF_SESSIONS = whatif.WhatIfSessions()
+
+@app.post("/api/whatif")
+async def whatif_delta(user: UserRequest, request: Request,
+                       x_session_id: str = Header(min_length=1, max_length=128),
+                       x_whatif_revision: Optional[int] = Header(default=None),
+                       view: Literal["full", "summary"] = "full"):
+    """
+    For sliders: only what changed since this session's previous profile
+    (see whatif). X-Whatif-Revision is the last revision the client
+    applied; anything else gets a reset.
+    """
+    return whatif_response(user, x_session_id, x_whatif_revision, view, instrumentation.request_timer(request))
+
+def whatif_response(user: UserRequest, session, revision, view, timer=instrumentation.NULL_TIMER):
+    if user.currency is not None:
+        user = in_lakhs(user)
+    timer.mark("validation")
+    catalog = core_engine.get_catalog()
+    body = WHATIF_SESSIONS.update(session, catalog, user, resolve_fields(catalog, view, None), revision)
+    timer.mark("delta")
+    return Response(body, media_type="application/json")
+
+def whatif_fast(scope, profile, view, fields, rank, top):
+    """whatif_delta for fast_path.FastPathMiddleware; None defers to the route."""
+    # The route takes only ?view=; the others are ignored there too
+    headers = Headers(scope=scope)
+    session, revision = headers.get("x-session-id"), headers.get("x-whatif-revision")
+    if session is None or not 1 <= len(session) <= 128:
+        return None
+    if revision is not None:
+        revision = fast_path.parse_int(revision)
+        if revision is None:
+            return None
+    scope["endpoint"] = whatif_delta
+    try:
+        return whatif_response(profile, session, revision, view, scope.get("gpw.timer", instrumentation.NULL_TIMER))
+    except HTTPException:
+        # Unknown currency; let the route produce the error response
+        return None
+
+app.user_middleware.append(Middleware(fast_path.FastPathMiddleware, path="/api/whatif", handler=whatif_fast))
+
+@app.delete("/api/whatif")
+async def whatif_end(x_session_id: str = Header(min_length=1, max_length=128)):
+    WHATIF_SESSIONS.discard(x_session_id)
+    return Response(status_code=204)
+
+@app.get("/api/sensitivity")
+async def recommendation_sensitivity(gpa: float = Query(allow_inf_nan=False),
+                                     budget: float = Query(allow_inf_nan=False)):
+    """
+    What would unlock more paths: exact budget and GPA breakpoints where a
+    country changes financial_health or enters a bucket, as step functions.
+    """
+    return {"status": "success", **sensitivity.sensitivity(core_engine.get_catalog(), gpa, budget)}
+
+@app.get("/api/costs")
+async def converted_costs(currency: str = "INR", year: Optional[int] = Query(default=None, ge=2000, le=2100)):
+    """
+    Every country's costs, salary and ROI in a currency, priced for an
+    intake year with each country's local inflation (the FX table's year
+    by default).
+    """
+    try:
+        view = fx.cost_view(core_engine.get_catalog(), currency, year)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return Response(view.body, media_type="application/json")
+
+@app.post("/api/simulate/pr")
+def simulate_pr(req: SimulationRequest):
+    """
+    Monte Carlo PR outcomes, time to PR and cash flow per country. Defaults
+    to the countries the GPA matches (every country without one). A plain
+    def, so the sampling runs in the threadpool rather than on the loop.
+    """
+    catalog = core_engine.get_catalog()
+    if req.countries is not None:
+        unknown = [c for c in req.countries if c not in catalog.by_id]
+        if unknown:
+            raise HTTPException(status_code=422, detail=f"Unknown countries: {', '.join(unknown)}")
+        ids = req.countries
+    elif req.gpa is not None:
+        ids = [row.id for rows in catalog.match(req.gpa).values() for row in rows]
     else:
-        risk_note = f"✅ Strong match. You have {safe_count + fast_count} paths with 60%+ PR success rates."
-    # ========== END RISK ADVISORY ==========
+        ids = [row.id for row in catalog.rows]
 
+    sim = pr_simulator.simulator(catalog)
     return {
         "status": "success",
-        "strategies": strategies,
-        "consultant_note": advisor_msg,
-        "risk_advisory": risk_note,
-        "meta": {
-            "total_options": total_options,
-            "safe_count": safe_count,
-            "fast_count": fast_count,
-            "moonshot_count": moonshot_count
+        "catalog_version": catalog.version,
+        "seed": req.seed,
+        "horizon_years": req.horizon_years,
+        "results": [sim.simulate(i, req.budget, req.trials, req.seed, req.horizon_years) for i in ids]
+    }
+
+def deadline_countries(catalog, countries, gpa):
+    """Country ids for the deadline endpoints: ?countries= ids, else the GPA's matches, else all (None)."""
+    if countries:
+        ids = {c.strip() for c in countries.split(",") if c.strip()}
+        unknown = ids - catalog.by_id.keys()
+        if unknown:
+            raise HTTPException(status_code=422, detail=f"Unknown countries: {', '.join(sorted(unknown))}")
+        return ids
+    if gpa is not None:
+        return {row.id for rows in catalog.match(gpa).values() for row in rows}
+    return None
+
+@app.get("/api/deadlines")
+async def upcoming_deadlines(days: int = Query(default=30, ge=0, le=3660), countries: Optional[str] = None,
+                             gpa: Optional[float] = None, intake: Optional[str] = None,
+                             today: Optional[datetime.date] = None):
+    """Deadlines falling in the next `days` days, soonest first."""
+    catalog = core_engine.get_catalog()
+    today = today or datetime.date.today()
+    entries = deadline_calendar.deadline_calendar(catalog).upcoming(
+        today, days, deadline_countries(catalog, countries, gpa), intake
+    )
+    return {"status": "success", "today": today.isoformat(), "days": days,
+            "deadlines": [e.to_dict() for e in entries]}
+
+@app.get("/api/deadlines/intakes")
+async def earliest_intakes(countries: Optional[str] = None, gpa: Optional[float] = None,
+                           today: Optional[datetime.date] = None):
+    """Per country, the earliest intake whose first deadline is still ahead."""
+    catalog = core_engine.get_catalog()
+    today = today or datetime.date.today()
+    ids = deadline_countries(catalog, countries, gpa)
+    if ids is None:
+        ids = {row.id for row in catalog.rows}
+    found = deadline_calendar.deadline_calendar(catalog).earliest_intakes(today, ids)
+    return {
+        "status": "success",
+        "today": today.isoformat(),
+        "intakes": {
+            row.id: {"intake": found[row.id][0], "first_deadline": found[row.id][1].to_dict()}
+            if row.id in found else None
+            for row in catalog.rows if row.id in ids
         }
     }
 
+@app.get("/api/deadlines.ics")
+async def deadlines_ics(countries: Optional[str] = None, gpa: Optional[float] = None,
+                        intake: Optional[str] = None, today: Optional[datetime.date] = None):
+    catalog = core_engine.get_catalog()
+    cal = deadline_calendar.deadline_calendar(catalog)
+    entries = cal.entries(deadline_countries(catalog, countries, gpa), intake)
+    return Response(
+        deadline_calendar.to_ics(entries, today or datetime.date.today()),
+        media_type="text/calendar",
+        headers={"Content-Disposition": 'attachment; filename="deadlines.ics"'}
+    )
+
+@app.get("/api/countries")
+async def list_countries():
+    return Response(core_engine.get_catalog().index_json, media_type="application/json")
+
+@app.get("/api/countries/{country_id}")
+async def country_detail(country_id: str):
+    row = core_engine.get_catalog().by_id.get(country_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail=f"Unknown country: {country_id}")
+    return Response(row.static_json, media_type="application/json")
+
+@app.post("/admin/catalog/reload")
+async def reload_catalog(x_admin_token: Optional[str] = Header(default=None)):
+    # Disabled unless ADMIN_TOKEN is configured
+    admin_token = os.getenv("ADMIN_TOKEN")
+    if not admin_token or not x_admin_token or not hmac.compare_digest(x_admin_token, admin_token):
+        raise HTTPException(status_code=403, detail="Forbidden")
+    try:
+        # Compiling takes a while on large catalogs; keep serving meanwhile
+        changed = await asyncio.to_thread(core_engine.STORE.reload)
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=f"Catalog reload failed: {e}")
+    catalog = core_engine.get_catalog()
+    return {"status": "success", "changed": changed, "version": catalog.version, "countries": len(catalog)}
+
+@app.post("/admin/similarity/reload")
+async def reload_similarity(x_admin_token: Optional[str] = Header(default=None)):
+    """Pick up segments appended to SIMILARITY_PATH since startup."""
+    admin_token = os.getenv("ADMIN_TOKEN")
+    if not admin_token or not x_admin_token or not hmac.compare_digest(x_admin_token, admin_token):
+        raise HTTPException(status_code=403, detail="Forbidden")
+    index = similarity.get_index()
+    if index is None:
+        raise HTTPException(status_code=404, detail="SIMILARITY_PATH is not set")
+    try:
+        added = await asyncio.to_thread(similarity.refresh)
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=f"Similarity reload failed: {e}")
+    return {"status": "success", "segments_added": added, "records": len(index)}
+
+def is_warm(catalog):
+    """True once the response cache holds bodies for the live catalog."""
+    return RESPONSE_CACHE.version == catalog.version and len(RESPONSE_CACHE) > 0
+
+@instrumentation.METRICS.collector
+def collect_app_metrics(registry):
+    registry.set("ready", int(STARTUP["ready"]), help="1 once the startup warm-up has finished.")
+    if STARTUP["seconds"] is not None:
+        registry.set("startup_warmup_seconds", STARTUP["seconds"], help="How long the startup warm-up took.")
+    catalog = core_engine.get_catalog()
+    registry.set("response_cache_hits_total", RESPONSE_CACHE.hits, kind="counter",
+                 help="Response cache lookups served from the cache.")
+    registry.set("response_cache_misses_total", RESPONSE_CACHE.misses, kind="counter",
+                 help="Response cache lookups that rendered a new body.")
+    lookups = RESPONSE_CACHE.hits + RESPONSE_CACHE.misses
+    registry.set("response_cache_hit_ratio", RESPONSE_CACHE.hits / lookups if lookups else 0.0,
+                 help="Share of response cache lookups that hit.")
+    registry.set("response_cache_entries", len(RESPONSE_CACHE), help="Bodies held in the response cache.")
+    registry.set("response_cache_bytes", RESPONSE_CACHE.size_bytes, help="Bytes held in the response cache.")
+    registry.set("whatif_sessions", len(WHATIF_SESSIONS), help="What-if sessions held.")
+    registry.set("whatif_resets_total", WHATIF_SESSIONS.resets, kind="counter",
+                 help="What-if responses that sent every row.")
+    registry.set("whatif_deltas_total", WHATIF_SESSIONS.deltas, kind="counter",
+                 help="What-if responses that sent only changes.")
+    registry.set("catalog_countries", len(catalog), help="Countries in the live catalog.")
+    registry.family("catalog_info", "gauge", "Live catalog version.", ("version",)).series = {(catalog.version,): 1}
+    registry.set("catalog_loaded_timestamp_seconds", core_engine.STORE.loaded_at,
+                 help="When the live catalog was loaded or published.")
+    if core_engine.SHARED_CATALOG_DIR:
+        registry.set("catalog_generation", core_engine.STORE.generation,
+                     help="Shared catalog segment generation this worker has mapped.")
+    registry.set("warm", int(is_warm(catalog)), help="1 once the response cache is populated for the live catalog.")
+
+@app.get("/metrics")
+async def metrics():
+    return Response(instrumentation.METRICS.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.get("/health")
 async def health():
-    return {"status": "operational", "version": "2.1.0-final"}
+    if not STARTUP["ready"]:
+        return JSONResponse({"status": "starting", "version": "2.1.0-final"}, status_code=503)
+    catalog = core_engine.get_catalog()
+    return {
+        "status": "operational",
+        "version": "2.1.0-final",
+        "catalog_version": catalog.version,
+        "countries": len(catalog),
+        "state": "warm" if is_warm(catalog) else "cold"
+    }
@@ -0,0 +1,208 @@
+"""
+Monte Carlo PR-pathway simulator.
+
+Each country's pr_branches are parsed once per catalog into numbers: a
+success probability and a uniform timeline range in months ("21 months",
+"6-10 years", "Variable"). A simulated student finishes the degree, then
+tries the branches in listed order; each attempt resolves after a sampled
+time and succeeds with its probability, and a failed attempt hands over to
+the next branch. Trials that have not reached PR by the horizon count as
+no PR.
+
+Cash flow per trial: the full total_cost up front (plus interest on the
+part of it the budget doesn't cover, carried through the degree), then
+avg_salary_post_grad while the student is in the country, i.e. until the
+horizon with PR or until the last branch fails without it.
+
+Sampling is vectorised over trials and seeded per (seed, country), so a
+country's numbers don't depend on which other countries were asked for.
+The sampled outcomes are profile-independent and cached per catalog (an
+LRU bounded by bytes, since seed and trials come from the caller); the
+budget only enters the cash-flow step.
+"""
+import re
+import threading
+import weakref
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+# Timeline used for "Variable" (and anything else unparseable), in months
+VARIABLE_MONTHS = (24.0, 96.0)
+DEFAULT_STUDY_MONTHS = 24.0
+# Annual rate on the budget gap, assumed to be borrowed
+DEFAULT_LOAN_RATE = 0.10
+
+# 17 bytes of outcomes per trial: ~3.4MB per country at the maximum
+MAX_TRIALS = 200_000
+OUTCOME_CACHE_BYTES = 64 * 1024 * 1024
+PERCENTILES = (10, 50, 90)
+
+_RANGE = re.compile(r"(\d+(?:\.\d+)?)(?:\s*-\s*(\d+(?:\.\d+)?))?\s*(month|year|yr|y|m)", re.IGNORECASE)
+_STUDY = re.compile(r"\((\d+(?:\.\d+)?)\s*(y|m)", re.IGNORECASE)
+
+
+def parse_timeline(text):
+    """(low, high) months for a pr_branches timeline string."""
+    match = _RANGE.search(text or "")
+    if match is None:
+        return VARIABLE_MONTHS
+    low = float(match.group(1))
+    high = float(match.group(2) or low)
+    scale = 1.0 if match.group(3).lower().startswith("m") else 12.0
+    return low * scale, high * scale
+
+
+def parse_success(text):
+    """Probability for a success string such as "94%"."""
+    match = re.search(r"(\d+(?:\.\d+)?)", str(text))
+    return min(float(match.group(1)) / 100.0, 1.0) if match else 0.0
+
+
+def parse_study_months(timeline_steps):
+    """Degree length from the first timeline step, e.g. "Masters (2y)"."""
+    match = _STUDY.search(timeline_steps[0]) if timeline_steps else None
+    if match is None:
+        return DEFAULT_STUDY_MONTHS
+    value = float(match.group(1))
+    return value * 12.0 if match.group(2).lower() == "y" else value
+
+
+class PathwayModel:
+    """Numeric form of one country's pr_branches."""
+
+    def __init__(self, row):
+        country = row.country
+        self.row = row
+        self.paths = [branch.path for branch in country.pr_branches]
+        self.success = np.array([parse_success(b.success) for b in country.pr_branches])
+        timelines = np.array([parse_timeline(b.timeline) for b in country.pr_branches]).reshape(-1, 2)
+        self.low = timelines[:, 0]
+        self.span = timelines[:, 1] - timelines[:, 0]
+        self.study_months = parse_study_months(country.timeline_steps)
+        self.seed_key = zlib.crc32(row.id.encode("utf-8"))
+
+
+class Outcomes:
+    """
+    Sampled trials for one country: pr_month (months from enrolment, inf
+    without PR inside the horizon), branch (index of the branch that gave
+    PR, -1 for none) and exit_month (when earning in the country stops).
+    """
+
+    __slots__ = ("pr_month", "branch", "exit_month")
+
+    def __init__(self, pr_month, branch, exit_month):
+        self.pr_month = pr_month
+        self.branch = branch
+        self.exit_month = exit_month
+
+    @property
+    def nbytes(self):
+        return self.pr_month.nbytes + self.branch.nbytes + self.exit_month.nbytes
+
+
+def sample_outcomes(model, trials, seed, horizon_months):
+    rng = np.random.default_rng([seed, model.seed_key])
+    n_branches = model.success.size
+    study = model.study_months
+    if n_branches == 0:
+        never = np.full(trials, np.inf)
+        return Outcomes(never, np.full(trials, -1, dtype=np.int8), np.full(trials, study))
+
+    succeeded = rng.random((trials, n_branches)) < model.success
+    resolved = study + np.cumsum(model.low + rng.random((trials, n_branches)) * model.span, axis=1)
+
+    any_success = succeeded.any(axis=1)
+    first = succeeded.argmax(axis=1)
+    pr_month = np.where(any_success, resolved[np.arange(trials), first], np.inf)
+    reached = pr_month <= horizon_months
+    pr_month[~reached] = np.inf
+    branch = np.where(reached, first, -1).astype(np.int8)
+    # Without PR, earning stops once the last branch has failed
+    exit_month = np.where(reached, horizon_months, np.minimum(resolved[:, -1], horizon_months))
+    return Outcomes(pr_month, branch, exit_month)
+
+
+def _percentiles(values):
+    if values.size == 0:
+        return None
+    points = np.percentile(values, PERCENTILES)
+    return {"mean": round(float(values.mean()), 2),
+            **{f"p{p}": round(float(v), 2) for p, v in zip(PERCENTILES, points)}}
+
+
+class Simulator:
+    """Per-catalog pathway models plus a cache of sampled outcomes."""
+
+    def __init__(self, catalog, max_bytes=OUTCOME_CACHE_BYTES):
+        self.models = {row.id: PathwayModel(row) for row in catalog.rows}
+        self.max_bytes = max_bytes
+        self.cache_bytes = 0
+        self._cache = OrderedDict()
+        # Requests simulate in worker threads
+        self._lock = threading.Lock()
+
+    def outcomes(self, country_id, trials, seed, horizon_months):
+        key = (country_id, trials, seed, horizon_months)
+        with self._lock:
+            outcomes = self._cache.get(key)
+            if outcomes is not None:
+                self._cache.move_to_end(key)
+                return outcomes
+        outcomes = sample_outcomes(self.models[country_id], trials, seed, horizon_months)
+        with self._lock:
+            if key not in self._cache and outcomes.nbytes <= self.max_bytes:
+                self._cache[key] = outcomes
+                self.cache_bytes += outcomes.nbytes
+                while self.cache_bytes > self.max_bytes:
+                    _, evicted = self._cache.popitem(last=False)
+                    self.cache_bytes -= evicted.nbytes
+        return outcomes
+
+    def simulate(self, country_id, budget, trials=100_000, seed=0, horizon_years=10,
+                 loan_rate=DEFAULT_LOAN_RATE):
+        """Summary statistics for one country and budget."""
+        model = self.models[country_id]
+        row = model.row
+        horizon_months = horizon_years * 12.0
+        outcomes = self.outcomes(country_id, trials, seed, horizon_months)
+
+        gap = max(row.total_cost - budget, 0.0)
+        outlay = row.total_cost + gap * loan_rate * model.study_months / 12.0
+        monthly_salary = row.country.avg_salary_post_grad / 12.0
+        working = np.maximum(outcomes.exit_month - model.study_months, 0.0)
+        net = working * monthly_salary - outlay
+
+        break_even = model.study_months + outlay / monthly_salary if monthly_salary > 0 else np.inf
+        broke_even = outcomes.exit_month >= break_even
+
+        reached = outcomes.branch >= 0
+        by_branch = np.bincount(outcomes.branch[reached], minlength=len(model.paths))
+        return {
+            "id": row.id,
+            "name": row.name,
+            "trials": trials,
+            "pr_probability": round(float(reached.mean()), 4),
+            "time_to_pr_months": _percentiles(outcomes.pr_month[reached]),
+            "branches": [
+                {"path": path, "share_of_pr": round(float(count) / max(int(reached.sum()), 1), 4)}
+                for path, count in zip(model.paths, by_branch.tolist())
+            ],
+            "net_position_lakhs": _percentiles(net),
+            "break_even": {
+                "month": round(float(break_even), 2) if np.isfinite(break_even) else None,
+                "probability": round(float(broke_even.mean()), 4),
+            },
+        }
+
+
+_simulators = weakref.WeakKeyDictionary()
+
+
+def simulator(catalog):
+    sim = _simulators.get(catalog)
+    if sim is None:
+        sim = _simulators[catalog] = Simulator(catalog)
+    return sim
@@ -0,0 +1,202 @@
+"""
+Ordering within the archetype buckets, driven by the profile's priority_goal.
+
+Each country gets four objectives scaled to [0, 1] across the catalog:
+ROI, pr_success_rate, speed (short break_even_months) and affordability
+(how little of the budget gap is left). "score" mode ranks by a weighted
+sum of them and keeps the top k; "pareto" mode keeps only countries no
+other eligible country beats on every objective, ordered by the same sum.
+
+Everything budget-independent is precomputed per catalog, so ranking a
+bucket is one pass over its eligible prefix plus a heap (or, for large
+buckets, numpy partial selection) of the top k, never a full sort.
+"""
+import bisect
+import heapq
+import re
+import weakref
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+from catalog import ARCHETYPES
+
+OBJECTIVES = ("roi", "pr", "speed", "affordability")
+
+Weights = namedtuple("Weights", OBJECTIVES)
+
+PRIORITY_WEIGHTS = {
+    "balanced": Weights(roi=0.25, pr=0.35, speed=0.2, affordability=0.2),
+    "roi": Weights(roi=0.5, pr=0.2, speed=0.2, affordability=0.1),
+    "pr": Weights(roi=0.15, pr=0.55, speed=0.1, affordability=0.2),
+    "speed": Weights(roi=0.2, pr=0.2, speed=0.5, affordability=0.1),
+    "cost": Weights(roi=0.15, pr=0.2, speed=0.15, affordability=0.5),
+}
+
+# Words in a free-text priority_goal -> PRIORITY_WEIGHTS key; first match wins
+PRIORITY_KEYWORDS = (
+    ("roi", "roi"), ("return", "roi"), ("salary", "roi"),
+    ("pr", "pr"), ("residency", "pr"), ("settle", "pr"), ("settlement", "pr"), ("immigration", "pr"),
+    ("fast", "speed"), ("quick", "speed"), ("speed", "speed"), ("break", "speed"),
+    ("cost", "cost"), ("cheap", "cost"), ("budget", "cost"), ("affordable", "cost"), ("low", "cost"),
+)
+
+RANK_MODES = ("score", "pareto")
+
+
+@lru_cache(maxsize=256)
+def priority_key(priority_goal):
+    """PRIORITY_WEIGHTS key for a priority_goal such as "High ROI"; "balanced" if nothing matches."""
+    words = re.findall(r"[a-z]+", (priority_goal or "").lower())
+    for keyword, key in PRIORITY_KEYWORDS:
+        if keyword in words:
+            return key
+    return "balanced"
+
+
+def _scaled(values, invert=False):
+    values = np.asarray(values, dtype=np.float64)
+    if values.size == 0:
+        return values
+    low, high = values.min(), values.max()
+    scaled = (values - low) / (high - low) if high > low else np.ones_like(values)
+    return 1.0 - scaled if invert else scaled
+
+
+class BucketIndex:
+    """One archetype's rows in ascending min_gpa order, with objective columns."""
+
+    def __init__(self, rows, static):
+        self.rows = rows
+        self.gpa_keys = [r.min_gpa for r in rows]
+        self.position = np.array([r.position for r in rows], dtype=np.int64)
+        self.total_cost = np.array([r.total_cost for r in rows], dtype=np.float64)
+        # (rows, 3): roi, pr, speed; also as lists for the small-bucket path
+        self.static = static
+        self.static_rows = [tuple(values) for values in static.tolist()]
+        self._static_scores = {}
+
+    def eligible(self, gpa):
+        return bisect.bisect_right(self.gpa_keys, gpa)
+
+    def static_scores(self, key):
+        """Weighted roi + pr + speed per row for a PRIORITY_WEIGHTS key, as (array, list)."""
+        scores = self._static_scores.get(key)
+        if scores is None:
+            array = self.static @ np.array(PRIORITY_WEIGHTS[key][:3])
+            scores = self._static_scores[key] = (array, array.tolist())
+        return scores
+
+
+class RankingIndex:
+    """Per-catalog objective columns, split by archetype."""
+
+    def __init__(self, catalog):
+        rows = catalog.by_gpa
+        order = np.array([r.position for r in rows], dtype=np.int64)
+        roi = _scaled([r.roi_percentage for r in rows])
+        pr = _scaled(np.frombuffer(catalog.columns["pr_success_rate"])[order])
+        speed = _scaled(np.frombuffer(catalog.columns["break_even_months"])[order], invert=True)
+        static = np.column_stack([roi, pr, speed]) if rows else np.zeros((0, 3))
+        # Affordability is the budget gap as a share of the dearest country
+        self.cost_scale = float(max((r.total_cost for r in rows), default=1) or 1)
+
+        self.buckets = {}
+        for archetype in ARCHETYPES:
+            picks = [i for i, r in enumerate(rows) if r.archetype == archetype]
+            self.buckets[archetype] = BucketIndex(tuple(rows[i] for i in picks), static[picks])
+
+
+_indexes = weakref.WeakKeyDictionary()
+
+
+def ranking_index(catalog):
+    index = _indexes.get(catalog)
+    if index is None:
+        index = _indexes[catalog] = RankingIndex(catalog)
+    return index
+
+
+def affordability(total_cost, budget, cost_scale):
+    return 1.0 - np.minimum(np.maximum(total_cost - budget, 0.0) / cost_scale, 1.0)
+
+
+def pareto_frontier(values):
+    """
+    Indices of the rows of values (maximise every column) not dominated by
+    any other row. Peels off the best remaining row by column sum, which a
+    dominated row can never be, and drops everything it dominates.
+    """
+    totals = values.sum(axis=1)
+    candidates = np.arange(values.shape[0])
+    frontier = []
+    while candidates.size:
+        best = candidates[np.argmax(totals[candidates])]
+        frontier.append(best)
+        rest = values[candidates]
+        dominated = np.all(rest <= values[best], axis=1) & np.any(rest < values[best], axis=1)
+        dominated |= candidates == best
+        candidates = candidates[~dominated]
+    return np.array(frontier, dtype=np.int64)
+
+
+def _dominates(a, b):
+    return all(x >= y for x, y in zip(a, b)) and a != b
+
+
+def _rank_small(bucket, n, budget, key, weight, cost_scale, mode, k):
+    """rank_buckets for one small bucket, in plain Python: heapq top-k."""
+    static = bucket.static_scores(key)[1]
+    rows = bucket.rows
+    afford = [1.0 - min(max(row.total_cost - budget, 0.0) / cost_scale, 1.0) for row in rows[:n]]
+    candidates = range(n)
+    if mode == "pareto":
+        values = [(*bucket.static_rows[i], afford[i]) for i in candidates]
+        candidates = [i for i in candidates if not any(_dominates(other, values[i]) for other in values)]
+    return heapq.nlargest(
+        n if k is None else k, candidates,
+        key=lambda i: (static[i] + weight * afford[i], -rows[i].position)
+    )
+
+
+def _rank_large(bucket, n, budget, key, weight, cost_scale, mode, k):
+    """rank_buckets for one large bucket, vectorised: partial selection of the top k."""
+    afford = affordability(bucket.total_cost[:n], budget, cost_scale)
+    scores = bucket.static_scores(key)[0][:n] + weight * afford
+    candidates = np.arange(n)
+    if mode == "pareto":
+        candidates = pareto_frontier(np.column_stack([bucket.static[:n], afford]))
+    if k is not None and k < candidates.size:
+        if k <= 0:
+            return []
+        # Keep everything tied with the k-th best so ties resolve by catalog order below
+        kth = -np.partition(-scores[candidates], k - 1)[k - 1]
+        candidates = candidates[scores[candidates] >= kth]
+    order = np.lexsort((bucket.position[candidates], -scores[candidates]))
+    return candidates[order[:k]].tolist()
+
+
+# Buckets up to this many eligible rows are ranked in Python; numpy's
+# per-call overhead only pays off above it
+SMALL_BUCKET = 128
+
+
+def rank_buckets(catalog, gpa, budget, priority_goal, mode="score", k=None):
+    """
+    catalog.match(gpa) with each bucket reordered by the priority's weighted
+    score: the top k in "score" mode, the Pareto frontier (capped at k) in
+    "pareto" mode.
+    """
+    if mode not in RANK_MODES:
+        raise ValueError(f"Unknown rank mode: {mode}")
+    index = ranking_index(catalog)
+    key = priority_key(priority_goal)
+    weight = PRIORITY_WEIGHTS[key].affordability
+    ranked = {}
+    for archetype, bucket in index.buckets.items():
+        n = bucket.eligible(gpa)
+        rank = _rank_small if n <= SMALL_BUCKET else _rank_large
+        order = rank(bucket, n, budget, key, weight, index.cost_scale, mode, k) if n else ()
+        ranked[archetype] = tuple(bucket.rows[i] for i in order)
+    return ranked
@@ -0,0 +1,149 @@
+"""
+Token-bucket rate limiting per client, as ASGI middleware.
+
+Each client (by IP) has a bucket of `burst` tokens refilled at `rate` per
+second; a request takes one token or gets a 429 with Retry-After. Two
+backends:
+
+  MemoryBuckets  in-process, per worker; an LRU bounded by max_clients,
+                 where evicting a bucket only ever forgives a client
+  RedisBuckets   shared by every worker through a Redis-compatible server
+                 (RATE_LIMIT_REDIS_URL), one atomic script per request using
+                 the server's clock; redis-py is imported on first use
+
+A backend that errors lets the request through: the limiter protects the
+service, it shouldn't take it down.
+"""
+import math
+import time
+from collections import OrderedDict
+
+from starlette.responses import JSONResponse
+
+from instrumentation import METRICS
+
+
+class MemoryBuckets:
+    name = "memory"
+
+    def __init__(self, rate, burst, max_clients=100_000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        # client -> (tokens, updated at), least recently seen first
+        self._buckets = OrderedDict()
+
+    async def acquire(self, client, now=None):
+        """(allowed, seconds until a token is available)."""
+        now = time.monotonic() if now is None else now
+        tokens, updated = self._buckets.pop(client, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens >= 1:
+            allowed, retry_after = True, 0.0
+            tokens -= 1
+        else:
+            allowed, retry_after = False, (1 - tokens) / self.rate
+        self._buckets[client] = (tokens, now)
+        if len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        return allowed, retry_after
+
+
+# KEYS[1] bucket; ARGV rate, burst. Returns {allowed, retry_after as a string}
+# (Lua numbers come back as integers otherwise).
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+  allowed = 1
+else
+  retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return {allowed, tostring(retry_after)}
+"""
+
+
+class RedisBuckets:
+    name = "redis"
+
+    def __init__(self, url, rate, burst, prefix="gpw:ratelimit:"):
+        self.url = url
+        self.rate = rate
+        self.burst = burst
+        self.prefix = prefix
+        self._script = None
+
+    @property
+    def script(self):
+        if self._script is None:
+            # Optional dependency, only needed when this backend is configured
+            import redis.asyncio
+            self._script = redis.asyncio.from_url(self.url).register_script(TOKEN_BUCKET_SCRIPT)
+        return self._script
+
+    async def acquire(self, client, now=None):
+        allowed, retry_after = await self.script(keys=[self.prefix + client], args=[self.rate, self.burst])
+        return bool(allowed), float(retry_after)
+
+
+def client_ip(scope, trusted_proxies=0):
+    """
+    The client's address. Behind trusted_proxies proxies, the X-Forwarded-For
+    hop the outermost of them appended: counting from the right, since
+    everything further left is whatever the client sent.
+    """
+    if trusted_proxies:
+        hops = [hop.strip() for name, value in scope["headers"] if name == b"x-forwarded-for"
+                for hop in value.decode("latin-1").split(",")]
+        hops = [hop for hop in hops if hop]
+        if len(hops) >= trusted_proxies:
+            return hops[-trusted_proxies]
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+class RateLimitMiddleware:
+    """Pure ASGI middleware limiting requests under `prefix` per client."""
+
+    def __init__(self, app, backend, prefix="/api/", trusted_proxies=0, registry=METRICS):
+        self.app = app
+        self.backend = backend
+        self.prefix = prefix
+        self.trusted_proxies = trusted_proxies
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefix):
+            return await self.app(scope, receive, send)
+        try:
+            allowed, retry_after = await self.backend.acquire(client_ip(scope, self.trusted_proxies))
+        except Exception as e:
+            print(f"Rate limiter error: {e!r}")
+            allowed = True
+        if allowed:
+            return await self.app(scope, receive, send)
+        self.registry.inc("rate_limited_total", self.backend.name)
+        response = JSONResponse({"detail": "Too Many Requests"}, status_code=429,
+                                headers={"Retry-After": str(max(1, math.ceil(retry_after)))})
+        await response(scope, receive, send)
+
+
+def backend_from_env(environ):
+    """The configured backend, or None when RATE_LIMIT_PER_SECOND is unset or 0."""
+    rate = float(environ.get("RATE_LIMIT_PER_SECOND", "0"))
+    if rate <= 0:
+        return None
+    burst = float(environ.get("RATE_LIMIT_BURST", "0")) or max(1.0, rate * 2)
+    url = environ.get("RATE_LIMIT_REDIS_URL")
+    return RedisBuckets(url, rate, burst) if url else MemoryBuckets(rate, burst)
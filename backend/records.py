@@ -0,0 +1,221 @@
+"""
+Immutable country records.
+
+The catalog keeps each country as a tree of frozen, slotted dataclasses
+instead of the nested dicts it was loaded from: no per-instance __dict__,
+strings interned, and identical sub-records (the same deadline task or PR
+branch appearing for many countries) stored once per catalog. Field order
+matches the JSON key order; to_dict() rebuilds the original record.
+"""
+import sys
+from dataclasses import dataclass, fields
+from operator import itemgetter
+from typing import Tuple, Union
+
+Number = Union[int, float]
+
+
+# Sub-record pooling. Keys are plain tuples of the source values (cheap to
+# hash, unlike dataclasses, which rehash every field on each call), so a
+# pool hit skips building the object at all. Lists (and a country's whole
+# calendar) are keyed as a whole first, so a repeated one is a single
+# lookup rather than one per item; catalog.country_json encodes the pooled
+# objects once per catalog on the same keys. Numbers are keyed with their
+# type: 0 == 0.0, but they serialize differently.
+
+def _pooled_tuple(items, pool):
+    """A tuple of already-pooled objects, shared by identity of its members."""
+    items = tuple(items)
+    return pool.setdefault((tuple, *map(id, items)), items)
+
+
+def _costs(costs, pool):
+    values = (costs['tuition'], costs['living'], costs['visa_fees'], costs['insurance'])
+    key = (Costs, *values, *map(type, values))
+    obj = pool.get(key)
+    if obj is None:
+        obj = pool[key] = Costs(*values)
+    return obj
+
+
+def _branch(b, pool):
+    key = (PRBranch, b['path'], b['timeline'], b['success'], b['color'])
+    obj = pool.get(key)
+    if obj is None:
+        obj = pool[key] = PRBranch(*map(sys.intern, key[1:]))
+    return obj
+
+
+def _alert(a, pool):
+    key = (PolicyAlert, a['type'], a['text'])
+    obj = pool.get(key)
+    if obj is None:
+        obj = pool[key] = PolicyAlert(*map(sys.intern, key[1:]))
+    return obj
+
+
+def _task(t, pool):
+    key = (DeadlineTask, t['task'], t['date'])
+    obj = pool.get(key)
+    if obj is None:
+        obj = pool[key] = DeadlineTask(*map(sys.intern, key[1:]))
+    return obj
+
+
+def _pooled_list(cls, items, values, build, pool):
+    """
+    A tuple of pooled cls objects for a list of source dicts. The list is
+    keyed by its values as a whole (values(item) is an itemgetter), so a
+    repeated list (the same calendar for many countries) costs one lookup
+    rather than one per item.
+    """
+    key = (cls, tuple(map(values, items)))
+    obj = pool.get(key)
+    if obj is None:
+        obj = pool[key] = _pooled_tuple([build(item, pool) for item in items], pool)
+    return obj
+
+
+def _deadlines(action_deadlines, pool):
+    """(intake, tasks) pairs, pooled as a whole calendar first, then per intake."""
+    key = ("calendar", *[(intake, *map(TASK_FIELDS, tasks)) for intake, tasks in action_deadlines.items()])
+    obj = pool.get(key)
+    if obj is None:
+        obj = pool[key] = _pooled_tuple([
+            _pooled_tuple((sys.intern(intake), _pooled_list(DeadlineTask, tasks, TASK_FIELDS, _task, pool)), pool)
+            for intake, tasks in action_deadlines.items()
+        ], pool)
+    return obj
+
+
+@dataclass(frozen=True, slots=True)
+class Costs:
+    tuition: Number
+    living: Number
+    visa_fees: Number
+    insurance: Number
+
+    def to_dict(self):
+        return {"tuition": self.tuition, "living": self.living,
+                "visa_fees": self.visa_fees, "insurance": self.insurance}
+
+
+@dataclass(frozen=True, slots=True)
+class PRBranch:
+    path: str
+    timeline: str
+    success: str
+    color: str
+
+    def to_dict(self):
+        return {"path": self.path, "timeline": self.timeline, "success": self.success, "color": self.color}
+
+
+@dataclass(frozen=True, slots=True)
+class PolicyAlert:
+    type: str
+    text: str
+
+    def to_dict(self):
+        return {"type": self.type, "text": self.text}
+
+
+@dataclass(frozen=True, slots=True)
+class DeadlineTask:
+    task: str
+    date: str
+
+    def to_dict(self):
+        return {"task": self.task, "date": self.date}
+
+
+@dataclass(frozen=True, slots=True)
+class Country:
+    name: str
+    flag: str
+    archetype: str
+    tagline: str
+    costs: Costs
+    total_cost: Number
+    min_gpa: Number
+    avg_salary_post_grad: Number
+    break_even_months: Number
+    pr_risk_color: str
+    pr_success_rate: Number
+    timeline_steps: Tuple[str, ...]
+    pr_branches: Tuple[PRBranch, ...]
+    policy_alerts: Tuple[PolicyAlert, ...]
+    # (intake, tasks) pairs in file order; a handful per country, so a
+    # tuple scan beats carrying a dict per record
+    action_deadlines: Tuple[Tuple[str, Tuple[DeadlineTask, ...]], ...]
+    insider_insight: str
+
+    @classmethod
+    def from_dict(cls, record, pool=None):
+        """
+        Build from a validated catalog record. pool dedupes equal
+        sub-records across countries; pass one dict per catalog.
+        """
+        unknown = record.keys() - FIELD_NAMES
+        if unknown:
+            raise ValueError(f"Unknown country fields: {', '.join(sorted(unknown))}")
+        if pool is None:
+            pool = {}
+        s = sys.intern
+        return cls(
+            name=s(record['name']),
+            flag=s(record['flag']),
+            archetype=s(record['archetype']),
+            tagline=s(record['tagline']),
+            costs=_costs(record['costs'], pool),
+            total_cost=record['total_cost'],
+            min_gpa=record['min_gpa'],
+            avg_salary_post_grad=record['avg_salary_post_grad'],
+            break_even_months=record['break_even_months'],
+            pr_risk_color=s(record['pr_risk_color']),
+            pr_success_rate=record['pr_success_rate'],
+            timeline_steps=_pooled_tuple(map(s, record['timeline_steps']), pool),
+            pr_branches=_pooled_list(PRBranch, record['pr_branches'], BRANCH_FIELDS, _branch, pool),
+            policy_alerts=_pooled_list(PolicyAlert, record['policy_alerts'], ALERT_FIELDS, _alert, pool),
+            action_deadlines=_deadlines(record['action_deadlines'], pool),
+            insider_insight=s(record['insider_insight']),
+        )
+
+    def deadlines(self, intake):
+        """Tasks for an intake; () if the country has none for it."""
+        for name, tasks in self.action_deadlines:
+            if name == intake:
+                return tasks
+        return ()
+
+    def to_dict(self):
+        """The record as loaded: same keys, order and values."""
+        return {
+            "name": self.name,
+            "flag": self.flag,
+            "archetype": self.archetype,
+            "tagline": self.tagline,
+            "costs": self.costs.to_dict(),
+            "total_cost": self.total_cost,
+            "min_gpa": self.min_gpa,
+            "avg_salary_post_grad": self.avg_salary_post_grad,
+            "break_even_months": self.break_even_months,
+            "pr_risk_color": self.pr_risk_color,
+            "pr_success_rate": self.pr_success_rate,
+            "timeline_steps": list(self.timeline_steps),
+            "pr_branches": [b.to_dict() for b in self.pr_branches],
+            "policy_alerts": [a.to_dict() for a in self.policy_alerts],
+            "action_deadlines": {
+                intake: [t.to_dict() for t in tasks] for intake, tasks in self.action_deadlines
+            },
+            "insider_insight": self.insider_insight,
+        }
+
+
+FIELD_NAMES = frozenset(f.name for f in fields(Country))
+BRANCH_FIELDS = itemgetter(*(f.name for f in fields(PRBranch)))
+ALERT_FIELDS = itemgetter(*(f.name for f in fields(PolicyAlert)))
+TASK_FIELDS = itemgetter(*(f.name for f in fields(DeadlineTask)))
+
+# Stored as contiguous float64 columns on the compiled catalog
+NUMERIC_FIELDS = ("total_cost", "min_gpa", "avg_salary_post_grad", "pr_success_rate", "break_even_months")
@@ -0,0 +1,104 @@
+"""
+Budget/GPA sensitivity: where along each axis the recommendation changes.
+
+For a fixed GPA the matched set is fixed and only financial_health moves
+with the budget; each row steps stretch -> manageable -> excellent at two
+thresholds derived from its total_cost. For a fixed budget, rows enter
+their archetype bucket as the GPA clears their min_gpa. Both step
+functions come from one merge over the catalog's sorted cost and GPA
+indexes, never from re-running the matcher per grid point.
+"""
+import heapq
+import math
+from itertools import groupby
+from operator import itemgetter
+
+from catalog import ARCHETYPES, MANAGEABLE_GAP, classify_gap
+
+HEALTH_LEVELS = ("stretch", "manageable", "excellent")
+
+
+def _lowest_budget(total_cost, max_gap):
+    """
+    Smallest float budget with total_cost - budget <= max_gap, i.e. exactly
+    where classify_gap moves into that band for this row (the naive
+    total_cost - max_gap is off by an ulp for many decimal costs).
+    """
+    budget = total_cost - max_gap
+    while total_cost - budget > max_gap:
+        budget = math.nextafter(budget, math.inf)
+    while total_cost - math.nextafter(budget, -math.inf) <= max_gap:
+        budget = math.nextafter(budget, -math.inf)
+    return budget
+
+
+def budget_events(rows):
+    """
+    (budget, row, health) events for rows sorted by total_cost, ascending by
+    budget. Both thresholds are monotone in total_cost, so this is a merge
+    of two already-sorted streams.
+    """
+    manageable = ((_lowest_budget(r.total_cost, MANAGEABLE_GAP), r, "manageable") for r in rows)
+    excellent = ((_lowest_budget(r.total_cost, 0), r, "excellent") for r in rows)
+    return heapq.merge(manageable, excellent, key=itemgetter(0))
+
+
+def budget_steps(catalog, gpa, budget):
+    """financial_health step function over budget for the rows gpa matches."""
+    rows = [r for r in catalog.by_cost if r.min_gpa <= gpa]
+    counts = dict.fromkeys(HEALTH_LEVELS, 0)
+    counts["stretch"] = len(rows)
+    initial = dict(counts)
+
+    steps = []
+    upcoming = None
+    for at, events in groupby(budget_events(rows), key=itemgetter(0)):
+        changes = []
+        for _, row, health in events:
+            counts[HEALTH_LEVELS[HEALTH_LEVELS.index(health) - 1]] -= 1
+            counts[health] += 1
+            changes.append({"id": row.id, "financial_health": health})
+        step = {"at": at, "changes": changes, "counts": dict(counts)}
+        steps.append(step)
+        if upcoming is None and at > budget:
+            upcoming = {"at": at, "increase": at - budget, "changes": changes}
+    return {"initial": initial, "steps": steps, "next": upcoming}
+
+
+def gpa_steps(catalog, gpa, budget):
+    """Archetype bucket step function over GPA, with each row's health at budget."""
+    counts = dict.fromkeys(ARCHETYPES, 0)
+    initial = dict(counts)
+
+    steps = []
+    upcoming = None
+    for at, rows in groupby(catalog.by_gpa, key=lambda r: r.min_gpa):
+        enters = []
+        for row in rows:
+            if row.archetype in counts:
+                counts[row.archetype] += 1
+            enters.append({
+                "id": row.id,
+                "archetype": row.archetype,
+                "financial_health": classify_gap(row.total_cost - budget, row.is_moonshot)[1]
+            })
+        step = {"at": at, "enters": enters, "counts": dict(counts)}
+        steps.append(step)
+        if upcoming is None and at > gpa:
+            upcoming = {"at": at, "increase": at - gpa, "enters": enters}
+    return {"initial": initial, "steps": steps, "next": upcoming}
+
+
+def sensitivity(catalog, gpa, budget):
+    """
+    Both step functions for a profile. A step's counts hold from its "at"
+    value up to the next step's; "next" is the first step above the
+    profile's own value, i.e. the smallest increase that changes anything.
+    """
+    return {
+        "catalog_version": catalog.version,
+        "gpa": gpa,
+        "budget": budget,
+        "by_budget": budget_steps(catalog, gpa, budget),
+        "by_gpa": gpa_steps(catalog, gpa, budget),
+    }
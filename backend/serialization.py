@@ -0,0 +1,20 @@
+from catalog import encode_plain
+
+
+def encode_strategies(matched, budget, target_intake, fields=None):
+    """UTF-8 JSON for the "strategies" object, assembled from each row's pre-serialized fragments."""
+    return b"{" + b",".join(
+        b'"' + archetype.encode("ascii") + b'":[' + b",".join(row.encode(budget, target_intake, fields) for row in rows) + b"]"
+        for archetype, rows in matched.items()
+    ) + b"}"
+
+
+def encode_recommendation(strategies_json, consultant_note, risk_advisory, meta):
+    """Full /api/recommend body; byte-identical to returning the equivalent dict."""
+    return b"".join((
+        b'{"status":"success","strategies":', strategies_json,
+        b',"consultant_note":', encode_plain(consultant_note),
+        b',"risk_advisory":', encode_plain(risk_advisory),
+        b',"meta":', encode_plain(meta),
+        b"}",
+    ))
@@ -0,0 +1,339 @@
+"""
+Compiled catalog shared between worker processes through a memory-mapped file.
+
+With several uvicorn workers every process otherwise compiles and holds its
+own copy of the catalog. In shared mode (SHARED_CATALOG_DIR) one worker
+compiles it and writes a segment file: the numeric columns as float64
+arrays plus every pre-serialized JSON fragment. Each worker maps the file
+read-only; columns are memoryviews over the mapping (np.frombuffer reads
+them in place) and the JSON a response splices in is sliced straight out
+of it, so the bulky parts exist once in the page cache, not once per worker.
+
+Each worker still builds its own row objects and sort indexes, but a
+SharedRow holds only the handful of scalars the matcher needs. The full
+records.Country is decoded from the row's static JSON on first use, so
+only the endpoints that need nested fields (simulation, deadlines) pay
+for it.
+
+Publishing is atomic: a segment is written under a temp name and
+os.replace()d into place, then the `current` pointer file is replaced the
+same way with the new generation. Workers poll the pointer (see
+CatalogStore.watch) and swap to a new generation as soon as it appears;
+responses already in flight keep the old mapping, which stays valid after
+the file is unlinked. An exclusive flock on the directory serialises
+writers, so when every worker notices an edited data file at once only
+the first compiles it. POSIX only (fcntl).
+
+Segment layout, little-endian, sections 8-byte aligned:
+
+    magic, header length       MAGIC, uint64
+    header                     JSON: version, source digest, row count,
+                               intakes, field list and section offsets
+    numbers                    float64 [field][row]
+    integral                   uint8 [field][row], 1 where the source was an int
+    spans                      int64 [row][string][start, end] into blob
+    blob                       UTF-8 bytes
+"""
+import contextlib
+import fcntl
+import json
+import mmap
+import os
+import struct
+import tempfile
+import time
+import uuid
+from array import array
+
+from catalog import EMPTY_DEADLINES, CatalogRow, CompiledCatalog
+from catalog_store import DEFAULT_CATALOG_PATH, CatalogStore, file_digest, load_catalog
+from records import NUMERIC_FIELDS, Country
+
+MAGIC = b"GPWCAT\x00\x01"
+PREAMBLE = struct.Struct("<8sQ")
+
+# Per-row numbers: the records' numeric columns plus the derived ROI
+ROW_NUMBERS = NUMERIC_FIELDS + ("roi_percentage",)
+
+# Per-row strings, in span order; one deadlines fragment per intake follows
+ID, NAME, ARCHETYPE, STATIC_JSON, ROI_FRAGMENT = range(5)
+FIXED_STRINGS = 5
+
+POINTER = "current"
+LOCK = ".lock"
+
+
+def _pad(size):
+    return -size % 8
+
+
+def write_segment(catalog, path, source_digest=None):
+    """Write catalog as a segment file at path, atomically."""
+    rows = catalog.rows
+    n = len(rows)
+    intakes = sorted({intake for row in rows for intake, _ in row.country.action_deadlines})
+
+    numbers = array("d")
+    integral = bytearray()
+    for field in ROW_NUMBERS:
+        for row in rows:
+            value = row.roi_percentage if field == "roi_percentage" else getattr(row.country, field)
+            if isinstance(value, int) and float(value) != value:
+                raise ValueError(f"{row.name}: {field} {value} doesn't fit a float64")
+            numbers.append(value)
+            integral.append(isinstance(value, int))
+
+    blob = bytearray()
+    spans = array("q")
+
+    def put(data):
+        spans.extend((len(blob), len(blob) + len(data)))
+        blob.extend(data)
+
+    for row in rows:
+        put(row.id.encode("utf-8"))
+        put(row.name.encode("utf-8"))
+        put(row.archetype.encode("utf-8"))
+        put(row.static_json)
+        put(row.roi_fragment)
+        present = {intake for intake, _ in row.country.action_deadlines}
+        for intake in intakes:
+            put(row.deadline_fragment(intake) if intake in present else b"")
+    index_json = (len(blob), len(blob) + len(catalog.index_json))
+    blob.extend(catalog.index_json)
+
+    sections = {}
+    offset = 0
+    for name, data in (("numbers", numbers), ("integral", integral), ("spans", spans), ("blob", blob)):
+        size = len(data) * (data.itemsize if isinstance(data, array) else 1)
+        sections[name] = (offset, size)
+        offset += size + _pad(size)
+
+    header = json.dumps({
+        "version": catalog.version,
+        "source_digest": source_digest,
+        "rows": n,
+        "intakes": intakes,
+        "fields": ROW_NUMBERS,
+        "sections": sections,
+        "index_json": index_json,
+    }).encode("utf-8")
+    header += b" " * _pad(PREAMBLE.size + len(header))
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp = tempfile.mkstemp(dir=directory, prefix=".segment-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            os.fchmod(f.fileno(), 0o644)
+            f.write(PREAMBLE.pack(MAGIC, len(header)))
+            f.write(header)
+            for data in (numbers, integral, spans, blob):
+                raw = memoryview(data).cast("B")
+                f.write(raw)
+                f.write(b"\0" * _pad(len(raw)))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(temp)
+        raise
+
+
+class Segment:
+    """A segment file mapped read-only, with typed views over its sections."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._map)
+        magic, header_size = PREAMBLE.unpack_from(view)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a catalog segment")
+        header = json.loads(bytes(view[PREAMBLE.size:PREAMBLE.size + header_size]))
+        base = PREAMBLE.size + header_size
+
+        def section(name):
+            offset, size = header["sections"][name]
+            return view[base + offset:base + offset + size]
+
+        self.version = header["version"]
+        self.source_digest = header["source_digest"]
+        self.rows = header["rows"]
+        self.intakes = {intake: FIXED_STRINGS + i for i, intake in enumerate(header["intakes"])}
+        self.width = FIXED_STRINGS + len(self.intakes)
+        self.fields = {name: i for i, name in enumerate(header["fields"])}
+        self.numbers = section("numbers").cast("d")
+        self.integral = section("integral")
+        self.spans = section("spans").cast("q")
+        self.blob = section("blob")
+        start, end = header["index_json"]
+        self.index_json = self.blob[start:end]
+        # Shared by every row's lazily decoded Country, as at compile time
+        self.pool = {}
+
+    def column(self, field):
+        """float64 values of a numeric field, in row order, without copying."""
+        start = self.fields[field] * self.rows
+        return self.numbers[start:start + self.rows]
+
+    def number(self, field, position):
+        i = self.fields[field] * self.rows + position
+        value = self.numbers[i]
+        return int(value) if self.integral[i] else value
+
+    def bytes_at(self, position, string):
+        i = (position * self.width + string) * 2
+        return self.blob[self.spans[i]:self.spans[i + 1]]
+
+    def text_at(self, position, string):
+        return str(self.bytes_at(position, string), "utf-8")
+
+    def catalog(self):
+        rows = tuple(SharedRow(self, i) for i in range(self.rows))
+        columns = {field: self.column(field) for field in NUMERIC_FIELDS}
+        return CompiledCatalog.from_rows(rows, columns, self.version, self.index_json)
+
+
+class SharedRow(CatalogRow):
+    """
+    A CatalogRow backed by a Segment: the matcher's scalars are plain
+    attributes, JSON fragments are slices of the mapping and the Country is
+    decoded on first access.
+    """
+
+    __slots__ = ("_segment", "_country")
+
+    def __init__(self, segment, position):
+        self.position = position
+        self._segment = segment
+        self._country = None
+        self._fragments = None
+        self.id = segment.text_at(position, ID)
+        self.name = segment.text_at(position, NAME)
+        self.archetype = segment.text_at(position, ARCHETYPE)
+        self.min_gpa = segment.number("min_gpa", position)
+        self.total_cost = segment.number("total_cost", position)
+        self.roi_percentage = segment.number("roi_percentage", position)
+        self.is_moonshot = self.archetype == 'moonshots'
+
+    @property
+    def country(self):
+        if self._country is None:
+            self._country = Country.from_dict(json.loads(bytes(self.static_json)), self._segment.pool)
+        return self._country
+
+    @property
+    def static_json(self):
+        return self._segment.bytes_at(self.position, STATIC_JSON)
+
+    @property
+    def roi_fragment(self):
+        return self._segment.bytes_at(self.position, ROI_FRAGMENT)
+
+    @property
+    def deadline_fragments(self):
+        return {intake: self.deadline_fragment(intake) for intake, _ in self.country.action_deadlines}
+
+    def deadline_fragment(self, intake):
+        string = self._segment.intakes.get(intake)
+        fragment = self._segment.bytes_at(self.position, string) if string is not None else None
+        return fragment if fragment else EMPTY_DEADLINES
+
+
+class SharedCatalogStore(CatalogStore):
+    """
+    CatalogStore whose catalog lives in a segment under directory, shared
+    with every other store (process) pointed at the same directory.
+    """
+
+    def __init__(self, path=DEFAULT_CATALOG_PATH, directory=None):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.segment = None
+        self.generation = 0
+        super().__init__(path)
+
+    @contextlib.contextmanager
+    def _flock(self, mode):
+        with open(os.path.join(self.directory, LOCK), "a+b") as f:
+            fcntl.flock(f.fileno(), mode)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def _read_pointer(self):
+        try:
+            with open(os.path.join(self.directory, POINTER), "rb") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write(self, catalog, source_digest):
+        """Publish catalog as the next generation. Caller holds the exclusive lock."""
+        pointer = self._read_pointer()
+        generation = (pointer["generation"] if pointer else 0) + 1
+        # Unique per write, so a wiped directory can't reuse a live segment's name
+        name = f"catalog-{generation:06d}-{uuid.uuid4().hex[:8]}.bin"
+        write_segment(catalog, os.path.join(self.directory, name), source_digest)
+
+        pointer = {"generation": generation, "segment": name, "source_digest": source_digest}
+        fd, temp = tempfile.mkstemp(dir=self.directory, prefix=".pointer-")
+        with os.fdopen(fd, "w") as f:
+            os.fchmod(f.fileno(), 0o644)
+            json.dump(pointer, f)
+        os.replace(temp, os.path.join(self.directory, POINTER))
+
+        # Readers take the shared lock until they've mapped a segment, so no
+        # one is between reading the pointer and opening an old file
+        for entry in os.listdir(self.directory):
+            if entry.startswith("catalog-") and entry != name:
+                with contextlib.suppress(OSError):
+                    os.unlink(os.path.join(self.directory, entry))
+        return pointer
+
+    def _attach(self, pointer):
+        """Map the pointer's segment unless it's already live; True if swapped."""
+        if self.segment is not None and pointer["segment"] == self.segment:
+            return False
+        segment = Segment(os.path.join(self.directory, pointer["segment"]))
+        self.catalog = segment.catalog()
+        self.segment, self.generation = pointer["segment"], pointer["generation"]
+        self._digest = pointer["source_digest"]
+        self.loaded_at = time.time()
+        return True
+
+    def reload(self):
+        """
+        Bring the shared segment up to date with the data file and map it;
+        returns True if the live catalog changed. Compiles only if no other
+        process already published this exact file.
+        """
+        with self._lock, self._flock(fcntl.LOCK_EX):
+            mtime = self._stat()
+            with open(self.path, "rb") as f:
+                digest = file_digest(f.read())
+            pointer = self._read_pointer()
+            if pointer is None or pointer["source_digest"] != digest:
+                catalog, digest = load_catalog(self.path)
+                pointer = self._write(catalog, digest)
+            self._mtime = mtime
+            return self._attach(pointer)
+
+    def publish(self, catalog):
+        with self._lock, self._flock(fcntl.LOCK_EX):
+            self._attach(self._write(catalog, None))
+
+    def refresh(self):
+        """Swap to the newest published generation; True if it wasn't live yet."""
+        pointer = self._read_pointer()
+        if pointer is None or pointer["segment"] == self.segment:
+            return False
+        with self._lock, self._flock(fcntl.LOCK_SH):
+            pointer = self._read_pointer()
+            return pointer is not None and self._attach(pointer)
+
+    def reload_if_modified(self):
+        changed = self.refresh()
+        return super().reload_if_modified() or changed
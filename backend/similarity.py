@@ -0,0 +1,556 @@
+"""
+"Students like you went to...": nearest historical profiles.
+
+Historical records (an anonymised profile plus the country the student went
+to) are encoded as features: GPA, log budget and integer codes for degree,
+major, priority and funding source. Distance between two profiles is
+
+    |gpa - gpa'| / GPA_SCALE + |log budget - log budget'| / BUDGET_SCALE
+    + MISMATCH[field] for each categorical field that differs
+
+No embeddings, no tree: records are kept sorted by a grid cell, i.e. their
+combination of category values plus a GPA bin and a log-budget bin. Every
+cell has a lower bound on the distance of anything in it: the mismatch
+weights of its combination, plus how many bins away it is. A query visits
+cells in order of that bound (ring by ring around its own cell, cheapest
+mismatches first), finding each cell's records with searchsorted over the
+sorted cell keys, and stops once the next bound exceeds the k-th best
+distance found so far. Cells whose bounds lie within BAND of each other
+are scored as one batch. This gives the exact k nearest under the distance
+above, except that a query stops after scoring MAX_SCANNED records and
+then returns the best found by then, which may not be the true nearest.
+
+Appends go to an unsorted tail that is scored in full on every query and
+merged into the sorted part by a background thread once it passes MAX_TAIL
+records, so neither appends nor queries wait for millions of records to be
+re-sorted.
+
+On disk, an index is one .npz segment per build or append: PATH itself and
+PATH's stem plus ".NNNN.npz" next to it. Each segment carries its own
+vocabularies, so segments can be written independently. Set
+SIMILARITY_PATH to load one at startup; build and append with
+
+    python -m similarity build records.csv data/outcomes.npz
+    python -m similarity append more.jsonl data/outcomes.npz
+"""
+import argparse
+import csv
+import functools
+import glob
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from catalog import slugify
+
+CATEGORIES = ("degree", "major", "priority", "funding_source")
+
+GPA_SCALE = 0.5
+BUDGET_SCALE = 0.25
+MISMATCH = {"degree": 0.5, "major": 1.0, "priority": 0.5, "funding_source": 0.25}
+
+# Grid: GPA in 0.25 steps over 0-10, log1p(budget in lakhs) in 0.15 steps
+# (roughly 16% apart) up to ~1000L
+GPA_BIN = 0.25
+GPA_BINS = 41
+BUDGET_BIN = 0.15
+BUDGET_BINS = 47
+# Anything r rings out is at least (r - 1) bins away along one axis
+RING_STEP = min(GPA_BIN / GPA_SCALE, BUDGET_BIN / BUDGET_SCALE)
+RINGS = max(GPA_BINS, BUDGET_BINS)
+
+# Every (which categories mismatch, ring) pair, in order of the lower
+# bound on the distance of records there
+VISIT_ORDER = sorted(
+    (sum(MISMATCH[name] for i, name in enumerate(CATEGORIES) if mask >> i & 1) + max(0, r - 1) * RING_STEP, mask, r)
+    for mask in range(1 << len(CATEGORIES)) for r in range(RINGS)
+)
+
+# Visit entries whose bounds lie within BAND of each other as one batch:
+# fewer, larger NumPy calls, at the cost of scoring a few rows a strict
+# bound-by-bound walk would have skipped
+BAND = 0.125
+
+MAX_K = 100
+MAX_SCANNED = 50_000
+# Appends beyond this many records are merged into the grid in the background
+MAX_TAIL = 1024
+# Search plans kept per grid, one per combination of query category codes
+MAX_PLANS = 4096
+
+
+def normalize(value):
+    """Category values compare case- and whitespace-insensitively."""
+    return " ".join(str(value).split()).casefold() if value else ""
+
+
+class Vocabulary:
+    """Category strings <-> dense integer codes."""
+
+    def __init__(self, values=()):
+        self.values = []
+        self.codes = {}
+        for value in values:
+            self.add(value)
+
+    def __len__(self):
+        return len(self.values)
+
+    def add(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def code(self, value):
+        """The code for value, or -1 if it has never been seen."""
+        return self.codes.get(value, -1)
+
+
+def empty_columns():
+    columns = {"gpa": np.empty(0, np.float32), "log_budget": np.empty(0, np.float32),
+               "destination": np.empty(0, np.int32)}
+    columns.update((name, np.empty(0, np.int32)) for name in CATEGORIES)
+    return columns
+
+
+def concat(*parts):
+    return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+
+def take(columns, order):
+    return {name: values[order] for name, values in columns.items()}
+
+
+def gpa_bin(gpa):
+    return np.clip(np.floor(np.asarray(gpa) / GPA_BIN), 0, GPA_BINS - 1).astype(np.int64)
+
+
+def budget_bin(log_budget):
+    return np.clip(np.floor(np.asarray(log_budget) / BUDGET_BIN), 0, BUDGET_BINS - 1).astype(np.int64)
+
+
+def ring_offsets(radius):
+    steps = np.arange(-radius, radius + 1)
+    dg, db = np.meshgrid(steps, steps, indexing="ij")
+    edge = np.maximum(np.abs(dg), np.abs(db)) == radius
+    return dg[edge], db[edge]
+
+
+RING_OFFSETS = [ring_offsets(radius) for radius in range(RINGS)]
+
+
+@functools.lru_cache(maxsize=4096)
+def ring(g, b, radius):
+    """Cell numbers (gpa bin * BUDGET_BINS + budget bin) exactly `radius` steps from (g, b), inside the grid."""
+    dg, db = RING_OFFSETS[radius]
+    gs, bs = g + dg, b + db
+    inside = (gs >= 0) & (gs < GPA_BINS) & (bs >= 0) & (bs < BUDGET_BINS)
+    return gs[inside] * BUDGET_BINS + bs[inside]
+
+
+def ranges(lo, hi):
+    """Concatenated np.arange(l, h) for each pair, without a Python loop."""
+    counts = hi - lo
+    total = int(counts.sum())
+    if not total:
+        return np.empty(0, np.int64)
+    starts = np.repeat(lo - np.cumsum(counts) + counts, counts)
+    return starts + np.arange(total)
+
+
+class Query:
+    __slots__ = ("gpa", "log_budget", "codes")
+
+    def __init__(self, gpa, log_budget, codes):
+        self.gpa = gpa
+        self.log_budget = log_budget
+        self.codes = codes
+
+
+class Grid:
+    """
+    Sorted records plus their cell keys. A combination of category codes
+    gets a mixed-radix number over the vocabulary sizes at build time.
+    """
+
+    def __init__(self, columns, sizes):
+        self.sizes = sizes
+        combo = np.zeros(len(columns["gpa"]), dtype=np.int64)
+        for name, size in zip(CATEGORIES, sizes):
+            combo = combo * size + columns[name]
+        keys = (combo * GPA_BINS + gpa_bin(columns["gpa"])) * BUDGET_BINS + budget_bin(columns["log_budget"])
+        order = np.argsort(keys, kind="stable")
+        self.columns = take(columns, order)
+        self.keys = keys[order]
+        # Combinations present, with their codes one column per category,
+        # and each record's position among them
+        self.combos, combo_index = np.unique(combo[order], return_inverse=True)
+        self.combo_index = combo_index.astype(np.int32)
+        codes = []
+        rest = self.combos
+        for size in reversed(sizes):
+            codes.append(rest % size)
+            rest = rest // size
+        self.combo_codes = np.stack(codes[::-1], axis=1) if len(sizes) else np.empty((0, 0), np.int64)
+        self.plans = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def visit(self, cells, query, penalty, found):
+        """Score the records in cells (keys) and hand them to found(rows, distances); returns how many."""
+        cells = np.concatenate(cells)
+        rows = ranges(np.searchsorted(self.keys, cells, side="left"),
+                      np.searchsorted(self.keys, cells, side="right"))
+        if len(rows):
+            columns = self.columns
+            distance = np.abs(columns["gpa"][rows] - query.gpa) / GPA_SCALE
+            distance += np.abs(columns["log_budget"][rows] - query.log_budget) / BUDGET_SCALE
+            distance += penalty[self.combo_index[rows]]
+            found(rows, distance)
+        return len(rows)
+
+    def plan(self, codes):
+        """
+        For a query's category codes: the mismatch penalty per combination,
+        and VISIT_ORDER as (bound, cell keys of (combination, cell 0),
+        radius) for the masks some combination here has. Cached per codes.
+        """
+        plan = self.plans.get(codes)
+        if plan is None:
+            mismatched = self.combo_codes != np.array(codes)
+            masks = mismatched @ (1 << np.arange(len(CATEGORIES)))
+            penalty = mismatched @ np.array([MISMATCH[name] for name in CATEGORIES])
+            bases = self.combos * (GPA_BINS * BUDGET_BINS)
+            groups = {mask: bases[masks == mask][:, None] for mask in np.unique(masks).tolist()}
+            plan = penalty, [(bound, groups[mask], radius) for bound, mask, radius in VISIT_ORDER if mask in groups]
+            if len(self.plans) >= MAX_PLANS:
+                self.plans.clear()
+            self.plans[codes] = plan
+        return plan
+
+    def search(self, query, kth, found):
+        """
+        Hand rows that may be among the nearest, with their distances, to
+        found(rows, distances): cell groups in order of their lower bound,
+        a BAND of bounds at a time, until the next bound passes kth(), the
+        current k-th best distance.
+        """
+        if not len(self.keys):
+            return
+        g, b = int(gpa_bin(query.gpa)), int(budget_bin(query.log_budget))
+        penalty, visits = self.plan(tuple(query.codes[name] for name in CATEGORIES))
+        scanned = 0
+        batch, band_end = [], None
+        for bound, bases, radius in visits:
+            if batch and bound > band_end:
+                scanned += self.visit(batch, query, penalty, found)
+                batch = []
+            if not batch:
+                if bound > kth() or (scanned > MAX_SCANNED and bound > 0):
+                    return
+                band_end = bound + BAND
+            cells = ring(g, b, radius)
+            if len(cells):
+                batch.append((bases + cells).ravel())
+        if batch:
+            self.visit(batch, query, penalty, found)
+
+
+class SimilarityIndex:
+    """
+    k-NN over historical profile -> destination records.
+
+    Reads take one snapshot of (grid, tail), and appends swap in a new one,
+    so queries never see a half-applied append.
+    """
+
+    def __init__(self):
+        self.vocab = {name: Vocabulary() for name in CATEGORIES + ("destination",)}
+        self.files = []
+        self._lock = threading.Lock()
+        self._state = (Grid(empty_columns(), (1,) * len(CATEGORIES)), empty_columns())
+        self._merging = None
+
+    def __len__(self):
+        grid, tail = self._state
+        return len(grid) + len(tail["gpa"])
+
+    def encode(self, records):
+        """Column arrays for raw records (dicts with gpa, budget, the CATEGORIES and destination)."""
+        columns = {
+            "gpa": np.array([float(r["gpa"]) for r in records], dtype=np.float32),
+            "log_budget": np.log1p(np.maximum([float(r["budget"]) for r in records], 0)).astype(np.float32),
+            "destination": np.array([self.vocab["destination"].add(slugify(str(r["destination"]))) for r in records],
+                                    dtype=np.int32),
+        }
+        for name in CATEGORIES:
+            columns[name] = np.array([self.vocab[name].add(normalize(r.get(name))) for r in records], dtype=np.int32)
+        return columns
+
+    def append(self, columns, merge=None):
+        """
+        Add already encoded columns (codes from this index's vocabularies).
+        They join the tail, which a background thread sorts into the grid
+        once it passes MAX_TAIL records; merge=True merges right away and
+        merge=False never does.
+        """
+        with self._lock:
+            grid, tail = self._state
+            tail = concat(tail, columns)
+            if merge:
+                grid, tail = Grid(concat(grid.columns, tail), self.sizes()), empty_columns()
+            elif merge is None and len(tail["gpa"]) > MAX_TAIL and self._merging is None:
+                self._merging = threading.Thread(target=self._merge, args=(grid, tail, self.sizes()),
+                                                 name="similarity-merge", daemon=True)
+                self._merging.start()
+            self._state = (grid, tail)
+
+    def sizes(self):
+        return tuple(max(1, len(self.vocab[name])) for name in CATEGORIES)
+
+    def _merge(self, grid, tail, sizes):
+        """
+        Sort tail into grid off the lock, keeping whatever was appended
+        meanwhile, and go again while that leaves more than MAX_TAIL.
+        """
+        try:
+            while True:
+                merged = Grid(concat(grid.columns, tail), sizes)
+                with self._lock:
+                    current, rest = self._state
+                    # Unless a merge=True append got there first, the
+                    # current tail starts with the records just merged
+                    if current is not grid:
+                        return
+                    rest = take(rest, slice(len(tail["gpa"]), None))
+                    self._state = (merged, rest)
+                    if len(rest["gpa"]) <= MAX_TAIL:
+                        return
+                    grid, tail, sizes = merged, rest, self.sizes()
+        finally:
+            with self._lock:
+                self._merging = None
+
+    def wait_merged(self, timeout=None):
+        """Block until a background merge in progress, if any, has finished."""
+        merging = self._merging
+        if merging is not None:
+            merging.join(timeout)
+
+    def add_records(self, records, merge=None):
+        self.append(self.encode(records), merge)
+
+    def query(self, profile):
+        """A Query for anything with gpa, budget (lakhs) and the CATEGORIES as attributes."""
+        return Query(float(profile.gpa), float(np.log1p(max(float(profile.budget), 0.0))),
+                     {name: self.vocab[name].code(normalize(getattr(profile, name))) for name in CATEGORIES})
+
+    @staticmethod
+    def _distances(columns, rows, query):
+        distance = np.abs(columns["gpa"][rows] - query.gpa) / GPA_SCALE
+        distance += np.abs(columns["log_budget"][rows] - query.log_budget) / BUDGET_SCALE
+        # Category penalties summed first and added once, as Grid.visit does
+        penalty = np.zeros(len(rows))
+        for name in CATEGORIES:
+            penalty += MISMATCH[name] * (columns[name][rows] != query.codes[name])
+        distance += penalty
+        return distance
+
+    def nearest(self, profile, k=20):
+        """
+        The k nearest records to profile (see query()) and the distribution
+        of their destinations, most common first.
+        """
+        grid, tail = self._state
+        query = self.query(profile)
+
+        # (columns, rows, distances) scored so far; the tail always in full
+        scored = []
+        if len(tail["gpa"]):
+            tail_rows = np.arange(len(tail["gpa"]))
+            scored.append((tail, tail_rows, self._distances(tail, tail_rows, query)))
+        # The k smallest distances so far
+        best = [scored[0][2] if scored else np.empty(0, np.float32)]
+
+        def found(rows, distances):
+            scored.append((grid.columns, rows, distances))
+            best[0] = np.concatenate([best[0], distances])
+            if len(best[0]) > k:
+                best[0] = np.partition(best[0], k - 1)[:k]
+
+        def kth():
+            return float(best[0].max()) if len(best[0]) >= k else math.inf
+
+        if len(best[0]) > k:
+            best[0] = np.partition(best[0], k - 1)[:k]
+        grid.search(query, kth, found)
+
+        if not scored:
+            return {"k": 0, "records": len(self), "destinations": [], "neighbours": []}
+        distance = np.concatenate([d for _, _, d in scored])
+        k = min(k, len(distance))
+        top = np.argpartition(distance, k - 1)[:k]
+        top = top[np.argsort(distance[top], kind="stable")]
+        picked = {name: values.tolist()
+                  for name, values in take(concat(*(take(columns, rows) for columns, rows, _ in scored)), top).items()}
+
+        vocab = self.vocab
+        neighbours = []
+        for i, d in enumerate(distance[top].tolist()):
+            neighbours.append({
+                "gpa": round(picked["gpa"][i], 2),
+                "budget": round(math.expm1(picked["log_budget"][i]), 1),
+                **{name: vocab[name].values[picked[name][i]] for name in CATEGORIES},
+                "destination": vocab["destination"].values[picked["destination"][i]],
+                "distance": round(d, 4),
+            })
+        counts = {}
+        for neighbour in neighbours:
+            counts[neighbour["destination"]] = counts.get(neighbour["destination"], 0) + 1
+        destinations = [{"id": destination, "count": count, "share": count / k}
+                        for destination, count in sorted(counts.items(), key=lambda item: (-item[1], item[0]))]
+        return {"k": k, "records": len(self), "destinations": destinations, "neighbours": neighbours}
+
+    # ---- segments on disk ----
+
+    def segment_columns(self, data):
+        """A loaded segment's columns, with its codes mapped onto this index's vocabularies."""
+        columns = {"gpa": data["gpa"].astype(np.float32), "log_budget": data["log_budget"].astype(np.float32)}
+        for name in CATEGORIES + ("destination",):
+            remap = np.array([self.vocab[name].add(value) for value in data[f"vocab_{name}"].tolist()] or [0],
+                             dtype=np.int32)
+            columns[name] = remap[data[name]]
+        return columns
+
+    def load_segments(self, paths, merge=None):
+        """Append segment files that aren't loaded yet; returns how many were new."""
+        new = [path for path in paths if path not in self.files]
+        if not new:
+            return 0
+        parts = []
+        for path in new:
+            with np.load(path) as data:
+                parts.append(self.segment_columns(data))
+        self.append(concat(*parts), merge)
+        self.files.extend(new)
+        return len(new)
+
+
+def segment_paths(path):
+    """PATH and its appended segments (STEM.NNNN.npz), oldest first."""
+    stem = path[:-4] if path.endswith(".npz") else path
+    appended = sorted(glob.glob(glob.escape(stem) + ".[0-9][0-9][0-9][0-9].npz"))
+    return ([path] if os.path.exists(path) else []) + appended
+
+
+def write_segment(path, records):
+    """Encode records as one self-contained segment file, written atomically."""
+    index = SimilarityIndex()
+    columns = index.encode(records)
+    arrays = dict(columns)
+    for name in CATEGORIES + ("destination",):
+        arrays[f"vocab_{name}"] = np.array(index.vocab[name].values, dtype=str)
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".npz.tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return len(records)
+
+
+def append_segment(path, records):
+    """Write records as the next STEM.NNNN.npz segment of the index at path."""
+    stem = path[:-4] if path.endswith(".npz") else path
+    existing = segment_paths(path)[1:]
+    number = int(existing[-1][len(stem) + 1:-4]) + 1 if existing else 1
+    target = f"{stem}.{number:04d}.npz"
+    write_segment(target, records)
+    return target
+
+
+def load_index(path):
+    index = SimilarityIndex()
+    index.load_segments(segment_paths(path), merge=True)
+    return index
+
+
+def read_records(path):
+    """Records from a CSV file or JSON Lines; see SimilarityIndex.encode for the fields."""
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.endswith(".csv"):
+            return list(csv.DictReader(f))
+        return [json.loads(line) for line in f if line.strip()]
+
+
+# Loaded at startup when SIMILARITY_PATH is set (see main)
+_index = None
+
+
+def get_index():
+    return _index
+
+
+def load_from_env():
+    """Load the index at SIMILARITY_PATH, if set; returns it or None."""
+    global _index
+    path = os.getenv("SIMILARITY_PATH")
+    if path:
+        _index = load_index(path)
+    return _index
+
+
+def refresh():
+    """Append segments written since the index was loaded; returns how many."""
+    path = os.getenv("SIMILARITY_PATH")
+    if _index is None or not path:
+        return 0
+    return _index.load_segments(segment_paths(path))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m similarity", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name in ("build", "append"):
+        command = commands.add_parser(name)
+        command.add_argument("records", help="CSV or JSON Lines: gpa, budget (lakhs), degree, major, "
+                                             "priority, funding_source, destination")
+        command.add_argument("index", help="index path (.npz)")
+    query = commands.add_parser("query")
+    query.add_argument("index")
+    query.add_argument("--gpa", type=float, required=True)
+    query.add_argument("--budget", type=float, required=True)
+    query.add_argument("-k", type=int, default=20)
+    for name in CATEGORIES:
+        query.add_argument(f"--{name.replace('_', '-')}", dest=name, default="")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        for stale in segment_paths(args.index)[1:]:
+            os.unlink(stale)
+        print(json.dumps({"index": args.index, "records": write_segment(args.index, read_records(args.records))}))
+    elif args.command == "append":
+        records = read_records(args.records)
+        print(json.dumps({"segment": append_segment(args.index, records), "records": len(records)}))
+    else:
+        index = load_index(args.index)
+        start = time.perf_counter()
+        result = index.nearest(args, args.k)
+        result["seconds"] = time.perf_counter() - start
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import asyncio
+import os
+
+from catalog import encode_json
+from ai_advisor import OFFLINE_NOTE
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+
+# Advisor notes per stream: at most this many per bucket, in body order,
+# fetched by this many workers at a time
+NOTES_PER_BUCKET = int(os.getenv("STREAM_NOTES_PER_BUCKET", "25"))
+ADVISOR_WORKERS = int(os.getenv("STREAM_ADVISOR_WORKERS", "8"))
+
+
+def frame(format, event):
+    """The bytes before and after an event's data."""
+    if format == "sse":
+        return b"event: " + event.encode("ascii") + b"\ndata: ", b"\n\n"
+    return b'{"event":"' + event.encode("ascii") + b'","data":', b"}\n"
+
+
+def encode_event(format, event, data):
+    """One stream frame; data is already-encoded JSON (str or bytes)."""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    head, tail = frame(format, event)
+    return head + data + tail
+
+
+async def recommendation_events(format, body, advisor, profile, countries, workers=ADVISOR_WORKERS):
+    """
+    Stream a recommendation: the deterministic body first, then one
+    advisor_note per (row, country_data) in countries, in completion order.
+
+    countries is iterated lazily, only after the body is out, by a fixed
+    pool of workers; so neither the time to the first byte nor the number
+    of model calls in flight grows with it.
+    """
+    # The body can run to megabytes: sent as it is rather than copied into its frame
+    head, tail = frame(format, "recommendation")
+    yield head
+    yield body
+    yield tail
+
+    countries = iter(countries)
+    finished = asyncio.Queue()
+
+    async def worker():
+        try:
+            for row, country_data in countries:
+                finished.put_nowait((row, await advisor.advise(profile, country_data)))
+        finally:
+            finished.put_nowait(None)
+
+    tasks = [asyncio.ensure_future(worker()) for _ in range(max(1, workers))]
+    running, notes = len(tasks), 0
+    try:
+        while running:
+            item = await finished.get()
+            if item is None:
+                running -= 1
+                continue
+            row, note = item
+            notes += 1
+            yield encode_event(format, "advisor_note", encode_json({
+                "id": row.id,
+                "name": row.name,
+                "archetype": row.archetype,
+                "note": note,
+                "source": "offline" if note == OFFLINE_NOTE else "ai"
+            }))
+        # A worker that failed stops the stream with its error
+        for task in tasks:
+            task.result()
+        yield encode_event(format, "done", encode_json({"advisor_notes": notes}))
+    finally:
+        # Client went away mid-stream: don't leave model calls running
+        for task in tasks:
+            task.cancel()
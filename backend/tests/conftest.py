@@ -0,0 +1,37 @@
+import os
+import sys
+
+# The backend is a flat set of modules run from this directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Bundled data files, no warm-up, and every opt-in feature off unless a test
+# turns it on; set before main is imported, which reads them at import
+for name in ("CATALOG_PATH", "SHARED_CATALOG_DIR", "FX_RATES_PATH", "SIMILARITY_PATH", "RATE_LIMIT_PER_SECOND",
+             "COALESCE_REQUESTS", "RECOMMEND_FAST_PATH", "CATALOG_WATCH_SECONDS", "ADMIN_TOKEN"):
+    os.environ.pop(name, None)
+os.environ["STARTUP_WARMUP"] = "0"
+
+import pytest
+from fastapi.testclient import TestClient
+
+import core_engine
+import main
+
+
+@pytest.fixture
+def client():
+    main.RESPONSE_CACHE.clear()
+    with TestClient(main.app) as client:
+        yield client
+    main.RESPONSE_CACHE.clear()
+
+
+@pytest.fixture
+def catalog():
+    return core_engine.get_catalog()
+
+
+@pytest.fixture
+def profile():
+    return {"degree": "Bachelors", "gpa": 7.5, "major": "Computer Science", "budget": 25.0,
+            "priority": "High ROI", "funding_source": "Self", "target_intake": "Fall 2025"}
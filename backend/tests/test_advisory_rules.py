@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+import advisory_rules
+from benchmarks.advisory_rules import legacy_messages, profile_grid
+
+ENGINE = advisory_rules.ENGINES["en"]
+
+
+def test_messages_match_the_original_ladders():
+    for profile in profile_grid():
+        assert ENGINE.messages(*profile) == legacy_messages(*profile), profile
+
+
+def test_batch_selection_matches_select():
+    grid = profile_grid()
+    advice, risk = ENGINE.select_batch(*np.array(grid).T)
+    for profile, a, r in zip(grid, advice, risk):
+        assert (ENGINE.rules[a], ENGINE.rules[r]) == ENGINE.select(*profile), profile
+
+
+@pytest.mark.parametrize("template, values, expected", [
+    ("GPA {gpa} and ₹{budget}L", (7.5, 25.0), "GPA 7.5 and ₹25.0L"),
+    ("{safe_fast:d} paths, {{literal}} braces", (0, 0, 0, 0, 0, 0, 3), "3 paths, {literal} braces"),
+    ("{moonshots:>3}|{total:.1f}", (0, 0, 4, 0, 0, 2), "  2|4.0"),
+])
+def test_compile_template_renders_like_format(template, values, expected):
+    values += (0,) * (len(advisory_rules.TEMPLATE_FIELDS) - len(values))
+    assert advisory_rules.compile_template(template)(*values) == expected
+
+
+@pytest.mark.parametrize("template", [
+    "{name}",
+    "{gpa.__class__}",
+    "{gpa[0]}",
+    "{gpa!r}",
+    "{gpa:{budget}}",
+    "{0}",
+    "{}",
+    "{__import__('os').system('true')}",
+])
+def test_compile_template_rejects_anything_but_plain_fields(template):
+    with pytest.raises(ValueError):
+        advisory_rules.compile_template(template)
+
+
+def test_missing_templates_are_reported():
+    messages = dict(advisory_rules.MESSAGES["en"])
+    del messages["risk_strong"]
+    with pytest.raises(ValueError, match="risk_strong"):
+        advisory_rules.AdvisoryEngine(messages)
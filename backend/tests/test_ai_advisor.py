@@ -0,0 +1,162 @@
+import asyncio
+import sys
+
+import pytest
+
+import core_engine
+from advisor_stub import start_stub_server, stub_note
+from ai_advisor import OFFLINE_NOTE, AdvisorService, build_prompt
+
+
+class FakeAdvisor(AdvisorService):
+    """AdvisorService with the model call replaced; counts calls per prompt."""
+
+    def __init__(self, delay=0.0, fail=False, **kwargs):
+        super().__init__(endpoint="http://model", api_key="key", deployment="test", **kwargs)
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+
+    async def _complete(self, prompt):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("model unavailable")
+        return f"note {self.calls}"
+
+
+def user():
+    return core_engine.UserProfile(current_degree="Bachelors", gpa=7.5, major_interest="Computer Science",
+                                   budget_max_lakhs=25.0, priority_goal="High ROI")
+
+
+def country(catalog, i=0):
+    return catalog.rows[i].evaluate(25.0, "Fall 2025")
+
+
+def test_concurrent_requests_share_one_call_and_the_result_is_cached(catalog):
+    advisor = FakeAdvisor(delay=0.01)
+
+    async def run():
+        notes = await asyncio.gather(*(advisor.advise(user(), country(catalog)) for _ in range(5)))
+        return notes, await advisor.advise(user(), country(catalog))
+
+    notes, again = asyncio.run(run())
+    assert notes == ["note 1"] * 5
+    assert again == "note 1"
+    assert advisor.calls == 1
+
+
+def test_failures_and_timeouts_fall_back_and_are_not_cached(catalog):
+    failing = FakeAdvisor(fail=True)
+    slow = FakeAdvisor(delay=1.0, timeout=0.01)
+
+    async def run():
+        return [await advisor.advise(user(), country(catalog)) for advisor in (failing, failing, slow)]
+
+    assert asyncio.run(run()) == [OFFLINE_NOTE] * 3
+    assert failing.calls == 2
+    assert not failing._cache and not slow._cache
+
+
+def test_unconfigured_advisor_is_offline(catalog):
+    assert asyncio.run(AdvisorService().advise(user(), country(catalog))) == OFFLINE_NOTE
+
+
+def test_advise_nowait_serves_the_curated_note_first(catalog):
+    advisor = FakeAdvisor()
+    data = country(catalog)
+
+    async def run():
+        note, task = advisor.advise_nowait(user(), data)
+        assert note == data["insider_insight"]
+        await task
+        return advisor.advise_nowait(user(), data)
+
+    assert asyncio.run(run()) == ("note 1", None)
+
+
+def test_concurrency_is_bounded(catalog):
+    advisor = FakeAdvisor(delay=0.01, max_concurrency=2)
+    running = peak = 0
+    complete = advisor._complete
+
+    async def counted(prompt):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        try:
+            return await complete(prompt)
+        finally:
+            running -= 1
+
+    advisor._complete = counted
+
+    async def run():
+        await asyncio.gather(*(advisor.advise(user(), country(catalog, i)) for i in range(len(catalog))))
+
+    asyncio.run(run())
+    assert advisor.calls == len(catalog)
+    assert peak == 2
+
+
+@pytest.fixture
+def stub():
+    """Start advisor_stub servers; (server, AdvisorService on it) per call, shut down afterwards."""
+    servers = []
+
+    def start(delay=0.0, fail=False, timeout=5.0):
+        server, url = start_stub_server(delay=delay, fail=fail)
+        servers.append(server)
+        return server, AdvisorService(endpoint=url, api_key="stub", api_version="2024-06-01",
+                                      deployment="stub", timeout=timeout)
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def advise_twice(advisor, data):
+    """Two sequential notes through the real client, then close it."""
+    async def run():
+        try:
+            return [await advisor.advise(user(), data) for _ in range(2)]
+        finally:
+            await advisor.aclose()
+
+    return asyncio.run(run())
+
+
+def test_stub_server_round_trip(stub, catalog):
+    server, advisor = stub()
+    data = country(catalog)
+    expected = stub_note(build_prompt(user(), data))
+    assert advise_twice(advisor, data) == [expected] * 2
+    # The second note came from the cache
+    assert server.calls == 1
+    assert advisor._client is None
+
+
+def test_stub_server_failure_falls_back(stub, catalog):
+    server, advisor = stub(fail=True)
+    assert advise_twice(advisor, country(catalog)) == [OFFLINE_NOTE] * 2
+    # Not cached, and no retries inside a call
+    assert server.calls == 2
+    assert not advisor._cache
+
+
+def test_stub_server_slower_than_the_timeout_falls_back(stub, catalog):
+    _, advisor = stub(delay=0.5, timeout=0.05)
+    assert advise_twice(advisor, country(catalog)) == [OFFLINE_NOTE] * 2
+    assert not advisor._cache
+
+
+def test_from_env_without_dotenv(monkeypatch):
+    monkeypatch.setitem(sys.modules, "dotenv", None)
+    monkeypatch.setenv("AZURE_OPENAI_ENDPOINT", "http://127.0.0.1:1")
+    monkeypatch.setenv("AZURE_OPENAI_KEY", "key")
+    monkeypatch.setenv("AZURE_OPENAI_DEPLOYMENT_NAME", "stub")
+    monkeypatch.setenv("ADVISOR_TIMEOUT_SECONDS", "2.5")
+    advisor = AdvisorService.from_env()
+    assert advisor.configured and advisor.timeout == 2.5
@@ -0,0 +1,56 @@
+import json
+
+import advisory_rules
+import batch_engine
+from benchmarks.synthetic import synthetic_catalog
+from catalog import ARCHETYPES, classify_gap
+
+GPA = [0.0, 5.9, 6.5, 7.0, 7.5, 8.0, 9.0, 10.0, 7.5, 6.0]
+BUDGET = [0.0, 12.0, 15.0, 20.0, 25.0, 29.9, 45.0, 100.0, 1e16, 25.123456789]
+
+
+def test_scores_match_per_profile_rules():
+    catalog = synthetic_catalog(200, seed=1)
+    result = batch_engine.score_profiles(GPA, BUDGET, catalog)
+    for i, (gpa, budget) in enumerate(zip(GPA, BUDGET)):
+        matched = catalog.match(gpa)
+        assert result.counts[i].tolist() == [len(matched[a]) for a in ARCHETYPES]
+        eligible = {row.position for rows in matched.values() for row in rows}
+        for row in catalog.rows:
+            health = result.health[i, row.position]
+            if row.position not in eligible:
+                assert health == batch_engine.NOT_ELIGIBLE
+                continue
+            assert batch_engine.HEALTH_CLASSES[health] == classify_gap(row.total_cost - budget, row.is_moonshot)[1]
+            assert result.gap[i, row.position] == row.total_cost - budget
+        advice, risk = advisory_rules.ENGINES["en"].select(gpa, budget, *result.counts[i].tolist())
+        assert result.engine.rules[result.advice_rule[i]] == advice
+        assert result.engine.rules[result.risk_rule[i]] == risk
+
+
+def test_columns_body_matches_json_response_rendering(client, catalog):
+    response = client.post("/api/recommend/batch", json={"gpa": GPA, "budget": BUDGET})
+    assert response.status_code == 200
+    result = batch_engine.score_profiles(GPA, BUDGET, catalog)
+    expected = json.dumps({"status": "success", "profiles": len(GPA), **result.columns()},
+                          ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":"))
+    assert response.content == expected.encode("utf-8")
+
+
+def test_ndjson_lines_match_recommend(client, profile):
+    response = client.post("/api/recommend/batch?format=ndjson", json={"gpa": GPA, "budget": BUDGET})
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["index"] for line in lines] == list(range(len(GPA)))
+    for line, gpa, budget in zip(lines, GPA, BUDGET):
+        body = client.post("/api/recommend", json={**profile, "gpa": gpa, "budget": budget}).json()
+        assert line["meta"] == body["meta"]
+        assert line["consultant_note"] == body["consultant_note"]
+        assert line["risk_advisory"] == body["risk_advisory"]
+        listed = [(row["name"], row["financial_health"], row["gap_value"])
+                  for rows in body["strategies"].values() for row in rows]
+        assert sorted((m["name"], m["financial_health"], m["gap_value"]) for m in line["matches"]) == sorted(listed)
+
+
+def test_mismatched_lengths_are_rejected(client):
+    response = client.post("/api/recommend/batch", json={"gpa": [7.5, 8.0], "budget": [25.0]})
+    assert response.status_code == 422
@@ -0,0 +1,59 @@
+import asyncio
+import json
+import warnings
+
+import core_engine
+from benchmarks.__main__ import compare, main as run_benchmarks
+from benchmarks.harness import measure, measure_async, summarize
+
+
+def test_summarize():
+    stats = summarize([0.001] * 99 + [0.1], elapsed=0.2)
+    assert stats["iterations"] == 100
+    assert stats["p50_ms"] == 1.0
+    assert stats["p99_ms"] > 1.0
+    assert stats["rps"] == 500
+
+
+def test_measure_respects_its_limits():
+    calls = []
+    stats = measure(calls.append, [(1,), (2,)], max_iterations=5, max_seconds=60)
+    assert calls == [1, 2, 1, 2, 1]
+    assert stats["iterations"] == 5
+
+
+def test_measure_async_without_a_loop_runs_its_own():
+    calls = []
+
+    async def call(n):
+        calls.append(n)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", DeprecationWarning)
+        stats = measure_async(call, [(1,), (2,)], max_iterations=3, max_seconds=60)
+    assert calls == [1, 2, 1]
+    assert stats["iterations"] == 3
+    loop = asyncio.new_event_loop()
+    try:
+        assert measure_async(call, [(3,)], max_iterations=2, max_seconds=60, loop=loop)["iterations"] == 2
+    finally:
+        loop.close()
+    assert calls[3:] == [3, 3]
+
+
+def test_suite_smoke_run_and_baseline(tmp_path):
+    catalog = core_engine.get_catalog()
+    out = tmp_path / "bench.json"
+    args = ["--rows", "6", "--profiles", "20", "--seconds", "0.01", "--iterations", "5", "--startup-runs", "0"]
+    assert run_benchmarks(args + ["--out", str(out)]) == 0
+    # The suite puts the live catalog back when it's done
+    assert core_engine.get_catalog() is catalog
+
+    report = json.loads(out.read_text())
+    assert {r["scenario"] for r in report["results"]} >= {"engine_match", "asgi", "asgi_fast"}
+    assert all(r["p50_ms"] > 0 for r in report["results"])
+
+    faster = {"results": [{**r, "p50_ms": r["p50_ms"] / 100} for r in report["results"]]}
+    rows, regressed = compare(report["results"], faster, tolerance=0.15)
+    assert regressed and len(rows) == len(report["results"])
+    assert compare(report["results"], report, tolerance=0.15)[1] is False
@@ -0,0 +1,37 @@
+import hashlib
+import json
+import os
+
+import pytest
+
+from benchmarks.synthetic import synthetic_catalog
+from catalog import ARCHETYPES
+
+GOLDEN = os.path.join(os.path.dirname(__file__), "data", "recommend_golden.json")
+
+with open(GOLDEN, encoding="utf-8") as f:
+    GOLDEN_CASES = json.load(f)["cases"]
+
+
+@pytest.mark.parametrize("case", GOLDEN_CASES,
+                         ids=lambda c: "{gpa}-{budget}-{target_intake}".format(**c["profile"]))
+def test_recommend_is_byte_identical_to_original_engine(client, case):
+    response = client.post("/api/recommend", json=case["profile"])
+    assert response.status_code == 200
+    assert hashlib.sha256(response.content).hexdigest() == case["sha256"]
+
+
+def test_match_is_a_filter_in_catalog_order():
+    catalog = synthetic_catalog(300, seed=3)
+    for gpa in (0, 5.0, 6.45, 7.0, 7.05, 8.3, 9.0, 10.0):
+        expected = {a: tuple(row for row in catalog.rows if row.archetype == a and row.min_gpa <= gpa)
+                    for a in ARCHETYPES}
+        assert catalog.match(gpa) == expected
+
+
+def test_budget_indexes_are_sorted_by_cost():
+    catalog = synthetic_catalog(300, seed=3)
+    assert [row.total_cost for row in catalog.within_budget(30)] == sorted(
+        row.total_cost for row in catalog.rows if row.total_cost <= 30)
+    assert {row.position for row in catalog.cost_between(20, 40)} == {
+        row.position for row in catalog.rows if 20 < row.total_cost <= 40}
@@ -0,0 +1,96 @@
+import gc
+import json
+import shutil
+import weakref
+
+import pytest
+
+import core_engine
+from catalog_store import DEFAULT_CATALOG_PATH, CatalogStore
+
+
+@pytest.fixture
+def data_file(tmp_path):
+    path = tmp_path / "countries.json"
+    shutil.copyfile(DEFAULT_CATALOG_PATH, path)
+    return path
+
+
+@pytest.fixture
+def store(data_file, monkeypatch):
+    """A store on a copy of the data file, installed as the app's live store."""
+    store = CatalogStore(str(data_file))
+    monkeypatch.setattr(core_engine, "_store", store)
+    return store
+
+
+def edit(path, change):
+    data = json.loads(path.read_text(encoding="utf-8"))
+    change(data)
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+
+
+def test_reload_only_swaps_on_a_content_change(store, data_file):
+    before = store.catalog
+    assert store.reload() is False
+    assert store.catalog is before
+
+    edit(data_file, lambda data: data["countries"][0].update(total_cost=1.5))
+    assert store.reload() is True
+    assert store.catalog is not before
+    assert store.catalog.version != before.version
+    assert store.catalog.rows[0].total_cost == 1.5
+    # The old snapshot is untouched for requests still holding it
+    assert before.rows[0].total_cost != 1.5
+
+
+def test_a_replaced_catalog_is_freed_without_a_gc_pass(store, data_file):
+    store.catalog.match(7.5)
+    before = weakref.ref(store.catalog)
+    gc.disable()
+    try:
+        edit(data_file, lambda data: data["countries"][0].update(total_cost=1.5))
+        store.reload()
+        assert before() is None
+    finally:
+        gc.enable()
+
+
+def test_invalid_file_keeps_the_last_good_catalog(store, data_file):
+    before = store.catalog
+    edit(data_file, lambda data: data["countries"][0].pop("min_gpa"))
+    with pytest.raises(Exception):
+        store.reload_if_modified()
+    assert store.catalog is before
+    # The watcher doesn't retry the same broken file on every poll
+    assert store.reload_if_modified() is False
+
+
+def test_same_label_different_content_is_a_new_version(store, data_file):
+    before = store.catalog.version
+    edit(data_file, lambda data: data["countries"][1].update(tagline="Edited"))
+    store.reload()
+    assert store.catalog.version.split("+")[0] == before.split("+")[0]
+    assert store.catalog.version != before
+
+
+def test_reload_endpoint(client, store, data_file, profile, monkeypatch):
+    assert client.post("/admin/catalog/reload").status_code == 403
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    assert client.post("/admin/catalog/reload", headers={"X-Admin-Token": "wrong"}).status_code == 403
+
+    before = client.post("/api/recommend", json=profile).json()
+    edit(data_file, lambda data: data["countries"][0].update(tagline="Reloaded"))
+    response = client.post("/admin/catalog/reload", headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 200
+    assert response.json()["changed"] is True
+    assert response.json()["version"] == store.catalog.version
+
+    after = client.post("/api/recommend", json=profile).json()
+    assert after["strategies"]["safe_bets"][0]["tagline"] == "Reloaded"
+    assert before["strategies"]["safe_bets"][0]["tagline"] != "Reloaded"
+
+    edit(data_file, lambda data: data["countries"].append({"name": "Nowhere"}))
+    response = client.post("/admin/catalog/reload", headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 422
+    assert client.post("/api/recommend", json=profile).json() == after
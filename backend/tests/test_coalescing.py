@@ -0,0 +1,138 @@
+import asyncio
+import json
+
+import pytest
+from starlette.testclient import TestClient
+
+import main
+from coalescing import CoalescingMiddleware, SingleFlight, recommend_key
+from instrumentation import Registry
+
+PROFILE = {"degree": "Bachelors", "gpa": 7.5, "major": "Computer Science", "budget": 25.0, "priority": "High ROI"}
+
+
+def test_single_flight_shares_one_call():
+    calls = []
+
+    async def work():
+        result = object()
+        calls.append(result)
+        await asyncio.sleep(0.01)
+        return result
+
+    async def scenario():
+        flight = SingleFlight()
+        results = await asyncio.gather(*(flight.run("k", work) for _ in range(5)), flight.run("other", work))
+        assert len(flight) == 0
+        return results
+
+    *shared, other = asyncio.run(scenario())
+    assert len(calls) == 2
+    assert all(result is calls[0] for result in shared) and other is calls[1]
+
+
+def test_a_cancelled_caller_does_not_cancel_the_others():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.02)
+            return "done"
+
+        first = asyncio.ensure_future(flight.run("k", work))
+        second = asyncio.ensure_future(flight.run("k", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(scenario()) == "done"
+
+
+def scope(query=b"", content_type=b"application/json", etag=None):
+    headers = [(b"content-type", content_type)] if content_type else []
+    if etag:
+        headers.append((b"if-none-match", etag))
+    return {"type": "http", "method": "POST", "path": "/api/recommend", "query_string": query, "headers": headers}
+
+
+def test_recommend_key_is_canonical():
+    key = recommend_key(scope(), json.dumps(PROFILE).encode())
+    reordered = json.dumps({**dict(reversed(PROFILE.items())), "budget": 25}, indent=2).encode()
+    assert recommend_key(scope(), reordered) == key
+    assert recommend_key(scope(b"view=summary"), json.dumps(PROFILE).encode()) != key
+    assert recommend_key(scope(etag=b'"x"'), json.dumps(PROFILE).encode()) != key
+    assert recommend_key(scope(), json.dumps({**PROFILE, "budget": -0.0}).encode()) != recommend_key(
+        scope(), json.dumps({**PROFILE, "budget": 0.0}).encode())
+
+
+@pytest.mark.parametrize("request_scope, body", [
+    (scope(content_type=b"text/plain"), json.dumps(PROFILE).encode()),
+    (scope(content_type=None), json.dumps(PROFILE).encode()),
+    (scope(b"similar=germany"), json.dumps(PROFILE).encode()),
+    (scope(), json.dumps({**PROFILE, "gpa": "7.5"}).encode()),
+    (scope(), b"{"),
+])
+def test_requests_the_route_must_see_are_never_coalesced(request_scope, body):
+    assert recommend_key(request_scope, body) is None
+
+
+def run_concurrently(app, count, body=b"{}"):
+    """Send count identical requests through app at once; the messages each one got."""
+    async def one():
+        sent = []
+        received = [{"type": "http.request", "body": body, "more_body": False}]
+
+        async def receive():
+            return received.pop() if received else {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+
+        await app(scope(), receive, send)
+        return sent
+
+    async def scenario():
+        return await asyncio.gather(*(one() for _ in range(count)))
+
+    return asyncio.run(scenario())
+
+
+def slow_app(calls, fail=False):
+    async def app(scope, receive, send):
+        calls.append((await receive())["body"])
+        await asyncio.sleep(0.02)
+        if fail and len(calls) == 1:
+            raise RuntimeError("leader failed")
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"%d" % len(calls)})
+    return app
+
+
+def test_concurrent_identical_requests_share_a_response():
+    calls = []
+    registry = Registry()
+    app = CoalescingMiddleware(slow_app(calls), key=lambda scope, body: body, registry=registry)
+    responses = run_concurrently(app, 4)
+    assert len(calls) == 1
+    # The route still sees the body the middleware read
+    assert calls == [b"{}"]
+    assert all(r == responses[0] for r in responses)
+    assert registry.families["requests_coalesced_total"].series == {("/api/recommend",): 3}
+    assert app.flights == {}
+
+
+def test_followers_run_the_route_when_the_leader_fails():
+    calls = []
+    app = CoalescingMiddleware(slow_app(calls, fail=True), key=lambda scope, body: body, registry=Registry())
+    with pytest.raises(RuntimeError):
+        run_concurrently(app, 3)
+    assert len(calls) > 1
+    assert app.flights == {}
+
+
+def test_coalesced_recommend_is_byte_identical(client):
+    coalesced = TestClient(CoalescingMiddleware(main.app, registry=Registry()))
+    for profile in (PROFILE, {**PROFILE, "gpa": 9.0}, {**PROFILE, "gpa": "bad"}):
+        ours = coalesced.post("/api/recommend", json=profile)
+        theirs = client.post("/api/recommend", json=profile)
+        assert (ours.status_code, ours.content) == (theirs.status_code, theirs.content)
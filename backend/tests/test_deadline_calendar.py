@@ -0,0 +1,127 @@
+import datetime
+
+import pytest
+
+import deadline_calendar
+from benchmarks.synthetic import synthetic_catalog
+from deadline_calendar import _ics_fold, parse_deadline_date, to_ics
+
+TODAY = datetime.date(2025, 3, 10)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Dec 2024", (datetime.date(2024, 12, 1), datetime.date(2024, 12, 31))),
+    ("February 2028", (datetime.date(2028, 2, 1), datetime.date(2028, 2, 29))),
+    (" sept. 2025 ", (datetime.date(2025, 9, 1), datetime.date(2025, 9, 30))),
+    ("Now", None),
+])
+def test_parse_deadline_date(text, expected):
+    assert parse_deadline_date(text) == expected
+
+
+@pytest.mark.parametrize("text", ["Soon", "13 2025", "Foo 2025", "2025"])
+def test_parse_deadline_date_rejects_other_formats(text):
+    with pytest.raises(ValueError):
+        parse_deadline_date(text)
+
+
+def all_entries(cal):
+    return [e for entries in cal.intakes.values() for e in entries]
+
+
+@pytest.mark.parametrize("today, days", [(TODAY, 30), (TODAY, 0), (datetime.date(2024, 1, 1), 3660),
+                                         (datetime.date(2030, 1, 1), 30)])
+def test_upcoming_matches_a_scan(catalog, today, days):
+    cal = deadline_calendar.deadline_calendar(catalog)
+    horizon = today + datetime.timedelta(days=days)
+    got = cal.upcoming(today, days)
+    dated = [e for e in got if e.end]
+    expected = {id(e) for e in all_entries(cal) if e.end and e.start <= horizon and e.end >= today}
+    assert {id(e) for e in dated} == expected
+    assert [e.end for e in dated] == sorted(e.end for e in dated)
+    # "Now" tasks first, and only for intakes that haven't closed
+    undated = got[:len(got) - len(dated)]
+    assert all(e.end is None and cal.closes[(e.country_id, e.intake)] >= today for e in undated)
+
+
+def test_upcoming_filters(catalog):
+    cal = deadline_calendar.deadline_calendar(catalog)
+    got = cal.upcoming(datetime.date(2024, 1, 1), 3660, countries={"germany"}, intake="Fall 2025")
+    assert got and {(e.country_id, e.intake) for e in got} == {("germany", "Fall 2025")}
+
+
+@pytest.mark.parametrize("count", [1, 3, 40])
+@pytest.mark.parametrize("intake", [None, "Fall 2025", "Nope"])
+def test_filters_match_the_unfiltered_calendar(count, intake):
+    # Large enough that a few countries are looked up by key
+    cal = deadline_calendar.DeadlineCalendar(synthetic_catalog(300, seed=1))
+    ids = [row_id for row_id, _ in cal.intakes][::7][:count]
+    countries = set(ids) | {"nope"}
+
+    def wanted(entries):
+        return [e for e in entries if e.country_id in countries and intake in (None, e.intake)]
+
+    for today, days in ((TODAY, 30), (datetime.date(2024, 1, 1), 3660)):
+        assert cal.upcoming(today, days, countries, intake) == wanted(cal.upcoming(today, days))
+    assert cal.entries(countries, intake) == wanted(cal.entries())
+    assert bool(cal.entries(countries, intake)) is (intake != "Nope")
+
+
+def test_earliest_intakes(catalog):
+    cal = deadline_calendar.deadline_calendar(catalog)
+    ids = {row.id for row in catalog.rows}
+    found = cal.earliest_intakes(TODAY, ids)
+    for row in catalog.rows:
+        openings = [entries for (cid, _), entries in cal.intakes.items() if cid == row.id]
+        firsts = [next(e for e in entries if e.end) for entries in openings if any(e.end for e in entries)]
+        ahead = [e for e in firsts if e.end >= TODAY]
+        if not ahead:
+            assert row.id not in found
+            continue
+        best = min(ahead, key=lambda e: (e.end, e.order))
+        assert found[row.id][1].end == best.end
+
+
+@pytest.mark.parametrize("line", [
+    "SUMMARY:" + "x" * 200,
+    "SUMMARY:" + "🇩🇪 Germany: Apply" * 12,
+    "DESCRIPTION:" + "é" * 100,
+    "SHORT:line",
+])
+def test_ics_fold(line):
+    folded = _ics_fold(line)
+    pieces = folded.split("\r\n ")
+    assert all(len(piece.encode("utf-8")) <= (75 if i == 0 else 74) for i, piece in enumerate(pieces))
+    assert "".join(pieces) == line
+
+
+def test_ics_export(client, catalog):
+    response = client.get("/api/deadlines.ics", params={"countries": "germany", "today": "2025-03-10"})
+    assert response.headers["content-type"].startswith("text/calendar")
+    text = response.text
+    assert text.endswith("END:VCALENDAR\r\n")
+    lines = text.replace("\r\n ", "").split("\r\n")[:-1]
+    assert all(len(line.encode("utf-8")) <= 75 for line in text.split("\r\n"))
+    cal = deadline_calendar.deadline_calendar(catalog)
+    entries = cal.entries({"germany"})
+    assert lines.count("BEGIN:VEVENT") == len(entries)
+    assert f"SUMMARY:Germany: {entries[0].task}".replace(",", "\\,").replace(";", "\\;") in lines
+
+
+def test_now_tasks_land_on_today(catalog):
+    cal = deadline_calendar.deadline_calendar(catalog)
+    undated = [e for e in all_entries(cal) if e.end is None]
+    if not undated:
+        pytest.skip("bundled catalog has no 'Now' tasks")
+    text = to_ics(undated[:1], TODAY, stamp=datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc))
+    assert "DTSTART;VALUE=DATE:20250310\r\nDTEND;VALUE=DATE:20250311" in text
+    assert "DTSTAMP:20250101T000000Z" in text
+
+
+def test_endpoints(client):
+    body = client.get("/api/deadlines", params={"days": 60, "today": "2025-03-10"}).json()
+    assert body["today"] == "2025-03-10" and body["days"] == 60
+    intakes = client.get("/api/deadlines/intakes", params={"gpa": 9.0, "today": "2025-03-10"}).json()
+    assert intakes["status"] == "success"
+    assert client.get("/api/deadlines", params={"countries": "atlantis"}).status_code == 422
+    assert client.get("/api/deadlines", params={"days": -1}).status_code == 422
@@ -0,0 +1,93 @@
+import json
+
+import numpy as np
+import pytest
+
+import advisory_rules
+import batch_engine
+import export
+import fx
+from export import ProfileFile, ProfileGrid, axis, read_chunks
+
+GRID = ProfileGrid([5.5, 6.5, 7.5, 9.0], [8, 15, 25, 40, 80], ["Fall 2025", "Spring 2026"])
+
+
+def test_axis():
+    assert axis("7:7.5:0.1").tolist() == [7.0, 7.1, 7.2, 7.3, 7.4, 7.5]
+    assert axis("5,7.5,9").tolist() == [5.0, 7.5, 9.0]
+    for spec in ("5:1:1", "1:5:0"):
+        with pytest.raises(ValueError):
+            axis(spec)
+
+
+def test_grid_covers_every_combination():
+    chunks = list(GRID.chunks(7))
+    assert sum(len(gpa) for gpa, _, _ in chunks) == len(GRID) == 40
+    gpa, budget, intake = (np.concatenate(column) for column in zip(*chunks))
+    assert set(zip(gpa.tolist(), budget.tolist(), intake.tolist())) == {
+        (g, b, i) for i in (0, 1) for g in GRID.gpa.tolist() for b in GRID.budget.tolist()}
+
+
+def run(tmp_path, source, name="out", **kwargs):
+    out = str(tmp_path / name)
+    summary = export.export(source, out, format="npz", chunk_size=kwargs.pop("chunk_size", 7), **kwargs)
+    with open(f"{out}/aggregates.json", encoding="utf-8") as f:
+        return summary, list(read_chunks(out)), json.load(f)
+
+
+def test_columns_match_batch_scoring(tmp_path, catalog):
+    summary, chunks, _ = run(tmp_path, GRID, processes=1)
+    assert (summary["rows"], summary["chunks"]) == (40, 6)
+    columns = {name: np.concatenate([c[name] for c in chunks]) for name in chunks[0]}
+    assert columns["index"].tolist() == list(range(40))
+    expected = batch_engine.score_profiles(columns["gpa"], columns["budget"], catalog)
+    assert (columns["safe_count"] == expected.counts[:, 0]).all()
+    assert (columns["moonshot_count"] == expected.counts[:, 2]).all()
+    assert (columns["total_options"] == expected.counts.sum(axis=1)).all()
+    assert (columns["financial_health"] == expected.health).all()
+    np.testing.assert_array_equal(columns["gap_value"], expected.gap)
+    assert (columns["advice_rule"] == expected.advice_rule).all()
+
+
+def test_aggregates_match_the_columns(tmp_path):
+    _, chunks, report = run(tmp_path, GRID, processes=1)
+    columns = {name: np.concatenate([c[name] for c in chunks])
+               for name in ("budget", "intake", "safe_count", "total_options")}
+    assert report["profiles"] == 40
+    assert sum(b["profiles"] for b in report["buckets_by_budget"]) == 40
+    band = np.searchsorted(advisory_rules.BUDGET_BANDS, columns["budget"], side="right")
+    labels = export.band_labels(advisory_rules.BUDGET_BANDS)
+    for bucket in report["buckets_by_budget"]:
+        intake = GRID.intakes.index(bucket["intake"])
+        rows = (columns["intake"] == intake) & (band == labels.index(bucket["budget_band"]))
+        assert bucket["profiles"] == rows.sum()
+        assert bucket["safe_bets"] == pytest.approx((columns["safe_count"][rows] > 0).mean())
+        assert bucket["no_options"] == pytest.approx((columns["total_options"][rows] == 0).mean())
+
+
+def test_worker_processes_give_the_same_results(tmp_path):
+    _, single, report = run(tmp_path, GRID, "single", processes=1)
+    _, pooled, pooled_report = run(tmp_path, GRID, "pooled", processes=2)
+    assert pooled_report == report
+    for ours, theirs in zip(pooled, single):
+        for name in theirs:
+            np.testing.assert_array_equal(ours[name], theirs[name])
+
+
+def test_profile_file(tmp_path):
+    path = tmp_path / "profiles.csv"
+    path.write_text("gpa,budget,currency,target_intake\n7.5,25,,\n8,30000,USD,Spring 2026\n6,10,,Fall 2025\n",
+                    encoding="utf-8")
+    source = ProfileFile(str(path))
+    (gpa, budget, intake), = source.chunks(10)
+    assert gpa.tolist() == [7.5, 8.0, 6.0]
+    assert budget.tolist() == pytest.approx([25.0, 30000 * 84.0 / fx.LAKH, 10.0])
+    assert intake.tolist() == [0, 1, 0]
+    assert source.intakes == ["Fall 2025", "Spring 2026"]
+
+
+def test_bad_profiles_name_their_line(tmp_path):
+    path = tmp_path / "profiles.jsonl"
+    path.write_text('{"gpa": 7, "budget": 20}\n\n{"gpa": 7}\n', encoding="utf-8")
+    with pytest.raises(ValueError, match=r"profiles.jsonl:3"):
+        list(ProfileFile(str(path)).chunks(10))
@@ -0,0 +1,118 @@
+import json
+
+import pytest
+
+import fast_path
+
+PROFILE = {"degree": "Bachelors", "gpa": 7.5, "major": "Computer Science", "budget": 25.0,
+           "priority": "High ROI", "funding_source": "Self", "target_intake": "Fall 2025"}
+
+BODIES = [
+    PROFILE,
+    {**PROFILE, "gpa": 9, "budget": 60},
+    {**PROFILE, "gpa": 5.0, "budget": 8.5},
+    {**PROFILE, "target_intake": None, "funding_source": None},
+    {k: v for k, v in PROFILE.items() if k not in ("funding_source", "target_intake")},
+    {**PROFILE, "budget": 2000, "currency": "USD"},
+    {**PROFILE, "currency": "XYZ"},
+    # Left to pydantic: coercions and errors
+    {**PROFILE, "gpa": "7.5"},
+    {**PROFILE, "gpa": True},
+    {**PROFILE, "budget": None},
+    {k: v for k, v in PROFILE.items() if k != "major"},
+    {**PROFILE, "degree": 3},
+    {**PROFILE, "target_intake": ["Fall 2025"]},
+    {**PROFILE, "gpa": 1e400},
+    [PROFILE],
+    "not a profile",
+]
+
+QUERIES = ["", "?view=summary", "?fields=name,gap_value", "?fields=nope", "?view=compact", "?rank=score&top=2",
+           "?rank=pareto", "?rank=best", "?rank=score&top=0", "?rank=score&top=02", "?view=full&view=summary"]
+
+
+def post(client, query, body, enabled, monkeypatch, **kwargs):
+    monkeypatch.setattr(fast_path, "ENABLED", enabled)
+    return client.post(f"/api/recommend{query}", content=json.dumps(body), **kwargs)
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_fast_path_is_byte_identical(client, monkeypatch, query):
+    for body in BODIES:
+        headers = {"content-type": "application/json"}
+        slow = post(client, query, body, False, monkeypatch, headers=headers)
+        fast = post(client, query, body, True, monkeypatch, headers=headers)
+        assert (fast.status_code, fast.content) == (slow.status_code, slow.content), (query, body)
+        assert fast.headers.get("etag") == slow.headers.get("etag")
+
+
+@pytest.mark.parametrize("content_type", [None, "application/json; charset=utf-8", "application/vnd.api+json",
+                                          "text/plain", "application/x-www-form-urlencoded"])
+def test_content_types_behave_like_the_route(client, monkeypatch, content_type):
+    headers = {} if content_type is None else {"content-type": content_type}
+    slow = post(client, "", PROFILE, False, monkeypatch, headers=headers)
+    fast = post(client, "", PROFILE, True, monkeypatch, headers=headers)
+    assert (fast.status_code, fast.content) == (slow.status_code, slow.content)
+
+
+def test_fast_path_honours_etags(client, monkeypatch):
+    headers = {"content-type": "application/json"}
+    etag = post(client, "", PROFILE, True, monkeypatch, headers=headers).headers["etag"]
+    response = post(client, "", PROFILE, True, monkeypatch, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+
+
+@pytest.mark.parametrize("content_type, expected", [
+    ("application/json", True), ("Application/JSON; charset=utf-8", True), ("application/ld+json", True),
+    ("text/json", False), ("application/jsonp", False), ("", False), (None, False),
+])
+def test_is_json(content_type, expected):
+    assert fast_path.is_json(content_type) is expected
+
+
+def test_parse_profile():
+    profile = fast_path.parse_profile(json.dumps(PROFILE).encode())
+    assert (profile.gpa, profile.budget, profile.target_intake, profile.currency) == (7.5, 25.0, "Fall 2025", None)
+    assert fast_path.parse_profile(b"{") is None
+    assert fast_path.parse_profile(json.dumps({**PROFILE, "gpa": "7"}).encode()) is None
+    assert type(fast_path.parse_profile(json.dumps({**PROFILE, "gpa": 7}).encode()).gpa) is float
+
+
+@pytest.mark.parametrize("query, expected", [
+    (b"", ("full", None, None, None)),
+    (b"view=summary&fields=a,b", ("summary", "a,b", None, None)),
+    (b"rank=pareto&top=12", ("full", None, "pareto", 12)),
+    (b"top=-1", None), (b"top=1.5", None), (b"view=x", None), (b"similar=5", None),
+])
+def test_parse_query(query, expected):
+    assert fast_path.parse_query(query) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("12", 12), ("0", 0), ("-3", -3), ("07", None), ("", None), ("-", None), (" 3", None), ("1.0", None),
+    ("٣", None),
+])
+def test_parse_int(text, expected):
+    assert fast_path.parse_int(text) == expected
+
+
+def test_whatif_fast_path_is_byte_identical(client, monkeypatch):
+    moves = [(body, query, {}) for body in BODIES for query in ("", "?view=summary", "?view=compact")]
+    moves += [(PROFILE, "", headers) for headers in ({"X-Session-Id": ""}, {"X-Session-Id": "s" * 129},
+                                                     {"X-Whatif-Revision": "abc"}, {"X-Whatif-Revision": "07"},
+                                                     {"X-Whatif-Revision": "-1"})]
+    revisions = {}
+    for body, query, extra in moves:
+        responses = []
+        for session, enabled in (("slow", False), ("fast", True)):
+            monkeypatch.setattr(fast_path, "ENABLED", enabled)
+            headers = {"content-type": "application/json", "X-Session-Id": session, **extra}
+            if session in revisions and "X-Whatif-Revision" not in extra:
+                headers["X-Whatif-Revision"] = revisions[session]
+            response = client.post(f"/api/whatif{query}", content=json.dumps(body), headers=headers)
+            if response.status_code == 200:
+                revisions[session] = str(response.json()["revision"])
+            responses.append(response)
+        slow, fast = responses
+        assert (fast.status_code, fast.content) == (slow.status_code, slow.content), (query, body, extra)
@@ -0,0 +1,101 @@
+import json
+import os
+
+import pytest
+
+import fx
+from fx import CostView, FXTable, cost_view, fx_table
+
+TABLE = fx.load_fx_table()
+
+
+def table_data():
+    with open(fx.DEFAULT_FX_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+PROFILE = {"degree": "Bachelors", "gpa": 7.5, "major": "Computer Science", "budget": 30000,
+           "priority": "High ROI", "currency": "usd"}
+
+
+def test_budget_in_lakhs():
+    assert TABLE.budget_in_lakhs(25.0, "INR") == pytest.approx(25.0)
+    assert TABLE.budget_in_lakhs(30000, "usd") == pytest.approx(30000 * 84.0 / fx.LAKH)
+    with pytest.raises(ValueError, match="XYZ"):
+        TABLE.budget_in_lakhs(1, "XYZ")
+
+
+def test_table_is_validated():
+    data = table_data()
+    with pytest.raises(ValueError, match="Base"):
+        FXTable({**data, "base": "XYZ"})
+    with pytest.raises(ValueError, match="XYZ"):
+        FXTable({**data, "countries": {**data["countries"], "Germany": "XYZ"}})
+
+
+def test_base_currency_at_the_table_year_is_the_catalog(catalog):
+    view = CostView(catalog, TABLE, "INR")
+    for row, total, salary in zip(catalog.rows, view.total_cost, view.avg_salary_post_grad):
+        assert total == pytest.approx(row.total_cost)
+        assert salary == pytest.approx(row.country.avg_salary_post_grad)
+    body = json.loads(view.body)
+    assert [c["roi_percentage"] for c in body["countries"]] == [row.roi_percentage for row in catalog.rows]
+
+
+def test_conversion_and_local_inflation(catalog):
+    usd = CostView(catalog, TABLE, "USD")
+    later = CostView(catalog, TABLE, "USD", TABLE.year + 2)
+    for i, row in enumerate(catalog.rows):
+        assert usd.total_cost[i] == pytest.approx(row.total_cost * fx.LAKH / 84.0)
+        local = TABLE.countries.get(row.name, TABLE.base)
+        growth = (1 + TABLE.currencies[local].inflation) ** 2
+        assert later.total_cost[i] == pytest.approx(usd.total_cost[i] * growth)
+        # ROI is a ratio, so the currency doesn't move it
+        assert later.roi_percentage[i] == usd.roi_percentage[i]
+
+
+def test_cost_views_are_cached_and_bounded(catalog, monkeypatch):
+    monkeypatch.setattr(fx, "MAX_VIEWS", 2)
+    first = cost_view(catalog, "usd", table=TABLE)
+    assert cost_view(catalog, "USD", table=TABLE) is first
+    cost_view(catalog, "EUR", table=TABLE)
+    cost_view(catalog, "GBP", table=TABLE)
+    assert cost_view(catalog, "USD", table=TABLE) is not first
+
+
+def test_table_follows_the_file(tmp_path):
+    data = table_data()
+    path = tmp_path / "fx.json"
+    path.write_text(json.dumps(data), encoding="utf-8")
+    assert fx_table(str(path)).version == data["version"]
+    path.write_text(json.dumps({**data, "version": "next"}), encoding="utf-8")
+    os.utime(path, ns=(0, 1))
+    assert fx_table(str(path)).version == "next"
+
+
+def test_recommend_in_another_currency(client):
+    converted = client.post("/api/recommend", json=PROFILE)
+    lakhs = TABLE.budget_in_lakhs(PROFILE["budget"], "USD")
+    plain = client.post("/api/recommend", json={**PROFILE, "budget": lakhs, "currency": None})
+    assert converted.status_code == 200
+    # Same body, money still in INR lakhs, and meta says so; the plain
+    # request shares the budget but not the cache entry
+    body = plain.json()
+    assert "currency" not in body["meta"]
+    assert converted.json() == {**body, "meta": {**body["meta"], "currency": "INR", "unit": 100_000}}
+
+
+def test_unknown_currency_is_422(client):
+    response = client.post("/api/recommend", json={**PROFILE, "currency": "XYZ"})
+    assert response.status_code == 422
+    assert response.json()["detail"] == "Unknown currency: XYZ"
+    assert client.get("/api/costs", params={"currency": "XYZ"}).status_code == 422
+
+
+def test_costs_endpoint(client):
+    body = client.get("/api/costs", params={"currency": "eur", "year": 2027}).json()
+    assert (body["currency"], body["symbol"], body["year"]) == ("EUR", "€", 2027)
+    germany = next(c for c in body["countries"] if c["name"] == "Germany")
+    assert germany["native"]["currency"] == "EUR"
+    assert germany["native"]["total_cost"] == germany["total_cost"]
+    assert client.get("/api/costs", params={"year": 1999}).status_code == 422
@@ -0,0 +1,69 @@
+import re
+
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from instrumentation import Histogram, MetricsMiddleware, Registry, request_timer, server_timing
+
+
+def timed_app(registry):
+    def staged(request):
+        timer = request_timer(request)
+        timer.mark("parse")
+        timer.mark("encode")
+        return PlainTextResponse("ok")
+
+    app = Starlette(routes=[Route("/staged", staged)])
+    return MetricsMiddleware(app, registry=registry)
+
+
+def test_histogram_buckets_are_cumulative_when_rendered():
+    registry = Registry(prefix="t_")
+    registry.family("latency", "histogram", "Latency.", ("kind",))
+    for value in (0.001, 0.001, 0.5, 20.0):
+        registry.observe("latency", value, "x")
+    text = registry.render()
+    assert '# TYPE t_latency histogram' in text
+    assert 't_latency_bucket{kind="x",le="0.001"} 2\n' in text
+    assert 't_latency_bucket{kind="x",le="0.5"} 3\n' in text
+    assert 't_latency_bucket{kind="x",le="+Inf"} 4\n' in text
+    assert 't_latency_count{kind="x"} 4\n' in text
+
+
+def test_histogram_observe():
+    histogram = Histogram(buckets=(1, 2))
+    for value in (0.5, 1, 1.5, 3):
+        histogram.observe(value)
+    assert histogram.counts == [2, 1, 1]
+    assert histogram.count == 4 and histogram.sum == 6
+
+
+def test_middleware_records_stages_and_status():
+    registry = Registry(prefix="t_")
+    registry.family("stage_seconds", "histogram", "", ("handler", "stage"))
+    registry.family("requests_total", "counter", "", ("handler", "method", "status"))
+    client = TestClient(timed_app(registry))
+    assert client.get("/staged").status_code == 200
+    assert client.get("/missing").status_code == 404
+    stages = registry.families["stage_seconds"].series
+    assert {labels[1] for labels in stages} == {"parse", "encode"}
+    assert registry.families["requests_total"].series == {
+        ("staged", "GET", "200"): 1, ("unmatched", "GET", "404"): 1}
+
+
+def test_server_timing_header_on_request():
+    client = TestClient(timed_app(Registry(enabled=False)))
+    assert "server-timing" not in client.get("/staged").headers
+    value = client.get("/staged", headers={"X-Server-Timing": "1"}).headers["server-timing"]
+    assert re.fullmatch(r"parse;dur=\d+\.\d{3}, encode;dur=\d+\.\d{3}, total;dur=\d+\.\d{3}", value)
+    assert server_timing([("a", 0.0015)], 0.002) == "a;dur=1.500, total;dur=2.000"
+
+
+def test_metrics_endpoint(client, profile):
+    client.post("/api/recommend", json=profile, headers={"X-Server-Timing": "1"})
+    text = client.get("/metrics").text
+    assert 'gpw_requests_total{handler="recommend_pathway",method="POST",status="200"}' in text
+    assert 'stage="match"' in text and 'stage="encode"' in text
+    assert "# TYPE gpw_stage_seconds histogram" in text
@@ -0,0 +1,67 @@
+import math
+
+import pytest
+
+import pr_simulator
+
+
+@pytest.mark.parametrize("text, months", [
+    ("21 months", (21, 21)), ("6-10 years", (72, 120)), ("2 years", (24, 24)), ("3 - 4 yr", (36, 48)),
+    ("Variable", pr_simulator.VARIABLE_MONTHS), ("", pr_simulator.VARIABLE_MONTHS),
+])
+def test_parse_timeline(text, months):
+    assert pr_simulator.parse_timeline(text) == months
+
+
+def test_parse_success_and_study():
+    assert pr_simulator.parse_success("94%") == 0.94
+    assert pr_simulator.parse_success("150%") == 1.0
+    assert pr_simulator.parse_success("unknown") == 0.0
+    assert pr_simulator.parse_study_months(("Masters (1y)",)) == 12
+    assert pr_simulator.parse_study_months(("Diploma (18m)",)) == 18
+    assert pr_simulator.parse_study_months(()) == pr_simulator.DEFAULT_STUDY_MONTHS
+
+
+def test_same_seed_same_result(catalog):
+    sim = pr_simulator.Simulator(catalog)
+    first = sim.simulate("canada", 30.0, trials=5000, seed=7)
+    assert pr_simulator.Simulator(catalog).simulate("canada", 30.0, trials=5000, seed=7) == first
+    assert sim.simulate("canada", 30.0, trials=5000, seed=8) != first
+
+
+def test_pr_probability_matches_the_branch_odds(catalog):
+    # 40 years is long enough for every branch to resolve, so P(PR) = 1 - P(every branch fails)
+    sim = pr_simulator.Simulator(catalog)
+    for row in catalog.rows:
+        result = sim.simulate(row.id, 25.0, trials=100_000, seed=1, horizon_years=40)
+        fail = math.prod(1 - pr_simulator.parse_success(b.success) for b in row.country.pr_branches)
+        assert result["pr_probability"] == pytest.approx(1 - fail, abs=0.01)
+        assert sum(b["share_of_pr"] for b in result["branches"]) == pytest.approx(1, abs=1e-3)
+
+
+def test_outcome_cache_is_bounded_by_bytes(catalog):
+    one = pr_simulator.sample_outcomes(pr_simulator.Simulator(catalog).models["usa"], 1000, 0, 120.0).nbytes
+    sim = pr_simulator.Simulator(catalog, max_bytes=3 * one)
+    for seed in range(10):
+        sim.simulate("usa", 25.0, trials=1000, seed=seed)
+        assert sim.cache_bytes <= sim.max_bytes
+    assert len(sim._cache) == 3
+    assert sim.cache_bytes == sum(o.nbytes for o in sim._cache.values())
+    # Too big to cache at all
+    sim.simulate("usa", 25.0, trials=4000, seed=0)
+    assert ("usa", 4000, 0, 120.0) not in sim._cache
+
+
+def test_endpoint(client, catalog):
+    body = client.post("/api/simulate/pr", json={"budget": 25, "gpa": 6.5, "trials": 2000}).json()
+    assert body["status"] == "success"
+    assert [r["id"] for r in body["results"]] == [row.id for rows in catalog.match(6.5).values() for row in rows]
+    body = client.post("/api/simulate/pr", json={"budget": 25, "countries": ["usa"], "trials": 2000}).json()
+    assert [r["id"] for r in body["results"]] == ["usa"]
+    response = client.post("/api/simulate/pr", json={"budget": 25, "countries": ["atlantis"]})
+    assert response.status_code == 422
+
+
+@pytest.mark.parametrize("trials", [0, pr_simulator.MAX_TRIALS + 1])
+def test_endpoint_bounds_trials(client, trials):
+    assert client.post("/api/simulate/pr", json={"budget": 25, "trials": trials}).status_code == 422
@@ -0,0 +1,53 @@
+import json
+
+import pytest
+
+from catalog import SUMMARY_FIELDS
+
+
+def project(body, fields):
+    return {archetype: [{k: v for k, v in row.items() if k in fields} for row in rows]
+            for archetype, rows in body["strategies"].items()}
+
+
+@pytest.mark.parametrize("budget", [12.0, 25.0, 100.0])
+def test_summary_view_is_the_full_body_projected(client, profile, budget):
+    profile = {**profile, "budget": budget}
+    full = client.post("/api/recommend", json=profile).json()
+    summary = client.post("/api/recommend?view=summary", json=profile).json()
+    assert summary["strategies"] == project(full, SUMMARY_FIELDS)
+    assert {k: v for k, v in summary.items() if k != "strategies"} == {
+        k: v for k, v in full.items() if k != "strategies"}
+
+
+def test_fields_keep_record_order(client, profile):
+    full = client.post("/api/recommend", json=profile).json()
+    body = client.post("/api/recommend?fields=gap_value,name,costs", json=profile).json()
+    assert body["strategies"] == project(full, {"name", "costs", "gap_value"})
+    row = body["strategies"]["safe_bets"][0]
+    assert list(row) == ["name", "costs", "gap_value"]
+
+
+def test_unknown_field_is_rejected(client, profile):
+    response = client.post("/api/recommend?fields=name,password", json=profile)
+    assert response.status_code == 422
+    assert "password" in response.json()["detail"]
+
+
+def test_country_endpoints(client, catalog):
+    index = client.get("/api/countries").json()
+    assert [c["id"] for c in index] == [row.id for row in catalog.rows]
+    for row in catalog.rows:
+        detail = client.get(f"/api/countries/{row.id}")
+        assert detail.status_code == 200
+        assert json.loads(detail.content) == row.record
+    assert client.get("/api/countries/atlantis").status_code == 404
+
+
+def test_evaluate_returns_a_fresh_copy(catalog):
+    row = catalog.rows[0]
+    before = row.record
+    evaluated = row.evaluate(25.0, "Fall 2025")
+    evaluated["costs"]["tuition"] = -1
+    evaluated["timeline_steps"].append("changed")
+    assert row.record == before
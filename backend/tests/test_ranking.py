@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+import ranking
+from benchmarks.synthetic import synthetic_catalog
+from catalog import ARCHETYPES
+
+
+@pytest.fixture(scope="module")
+def synthetic():
+    return synthetic_catalog(1500, seed=2)
+
+
+def scaled(values, invert=False):
+    low, high = min(values), max(values)
+    return [(1 - (v - low) / (high - low) if invert else (v - low) / (high - low)) if high > low else 1.0
+            for v in values]
+
+
+def brute_scores(catalog, budget, key):
+    """Weighted score per row position, computed straight from the records."""
+    rows = catalog.rows
+    roi = scaled([r.roi_percentage for r in rows])
+    pr = scaled([r.country.pr_success_rate for r in rows])
+    speed = scaled([r.country.break_even_months for r in rows], invert=True)
+    scale = max(r.total_cost for r in rows)
+    w = ranking.PRIORITY_WEIGHTS[key]
+    return {
+        r.position: w.roi * roi[i] + w.pr * pr[i] + w.speed * speed[i]
+        + w.affordability * (1 - min(max(r.total_cost - budget, 0) / scale, 1))
+        for i, r in enumerate(rows)
+    }
+
+
+@pytest.mark.parametrize("priority, key", [
+    ("High ROI", "roi"), ("Fast PR", "pr"), ("low cost", "cost"), ("Quick break-even", "speed"),
+    ("", "balanced"), (None, "balanced"), ("Prestige", "balanced"),
+])
+def test_priority_key(priority, key):
+    assert ranking.priority_key(priority) == key
+
+
+@pytest.mark.parametrize("gpa, budget, k", [(9.0, 30.0, 10), (7.0, 12.0, 3), (10.0, 80.0, None), (5.0, 25.0, 1)])
+def test_score_mode_is_the_top_k_by_score(synthetic, gpa, budget, k):
+    scores = brute_scores(synthetic, budget, "roi")
+    ranked = ranking.rank_buckets(synthetic, gpa, budget, "High ROI", "score", k)
+    for archetype, rows in synthetic.match(gpa).items():
+        picked = ranked[archetype]
+        assert len(picked) == (len(rows) if k is None else min(k, len(rows)))
+        assert {r.position for r in picked} <= {r.position for r in rows}
+        got = [scores[r.position] for r in picked]
+        assert got == pytest.approx(sorted(got, reverse=True), abs=1e-12)
+        rest = [scores[r.position] for r in rows if r not in picked]
+        if got and rest:
+            assert min(got) >= max(rest) - 1e-12
+
+
+def test_pareto_mode_is_the_frontier(synthetic):
+    gpa, budget = 9.0, 30.0
+    index = ranking.ranking_index(synthetic)
+    ranked = ranking.rank_buckets(synthetic, gpa, budget, "Settlement", "pareto")
+    for archetype in ARCHETYPES:
+        bucket = index.buckets[archetype]
+        n = bucket.eligible(gpa)
+        values = np.column_stack([bucket.static[:n], ranking.affordability(bucket.total_cost[:n], budget,
+                                                                           index.cost_scale)])
+        frontier = {bucket.rows[i].position for i in range(n)
+                    if not any(np.all(values[j] >= values[i]) and np.any(values[j] > values[i]) for j in range(n))}
+        assert {r.position for r in ranked[archetype]} == frontier
+
+
+@pytest.mark.parametrize("mode", ranking.RANK_MODES)
+@pytest.mark.parametrize("k", [None, 1, 5, 400])
+def test_small_and_large_paths_agree(synthetic, mode, k):
+    index = ranking.ranking_index(synthetic)
+    for archetype in ARCHETYPES:
+        bucket = index.buckets[archetype]
+        n = bucket.eligible(8.5)
+        weight = ranking.PRIORITY_WEIGHTS["cost"].affordability
+        args = (bucket, n, 28.0, "cost", weight, index.cost_scale, mode, k)
+        assert list(ranking._rank_small(*args)) == ranking._rank_large(*args)
+
+
+def test_ranked_recommendation_keeps_counts_and_messages(client, profile):
+    profile = {**profile, "gpa": 9.0, "budget": 40.0}
+    full = client.post("/api/recommend", json=profile).json()
+    ranked = client.post("/api/recommend?rank=score&top=1", json=profile).json()
+    assert ranked["meta"] == full["meta"]
+    assert ranked["consultant_note"] == full["consultant_note"]
+    assert all(len(rows) <= 1 for rows in ranked["strategies"].values())
+    assert client.post("/api/recommend?rank=score&top=0", json=profile).status_code == 422
+    assert client.post("/api/recommend?rank=best", json=profile).status_code == 422
@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+from starlette.testclient import TestClient
+
+import main
+from instrumentation import Registry
+from rate_limit import MemoryBuckets, RateLimitMiddleware, backend_from_env, client_ip
+
+PROFILE = {"degree": "Bachelors", "gpa": 7.5, "major": "Computer Science", "budget": 25.0, "priority": "High ROI"}
+
+
+def acquire(buckets, client, now):
+    return asyncio.run(buckets.acquire(client, now))
+
+
+def test_bucket_refills_at_rate():
+    buckets = MemoryBuckets(rate=2, burst=3)
+    assert [acquire(buckets, "a", 0.0)[0] for _ in range(4)] == [True, True, True, False]
+    allowed, retry_after = acquire(buckets, "a", 0.0)
+    assert not allowed and retry_after == pytest.approx(0.5)
+    assert acquire(buckets, "a", 0.5) == (True, 0.0)
+    # Other clients have their own bucket
+    assert acquire(buckets, "b", 0.5) == (True, 0.0)
+    # Idle time refills up to burst, never past it
+    assert [acquire(buckets, "a", 100.0)[0] for _ in range(4)] == [True, True, True, False]
+
+
+def test_evicting_a_bucket_forgives_the_client():
+    buckets = MemoryBuckets(rate=1, burst=1, max_clients=2)
+    assert acquire(buckets, "a", 0.0)[0]
+    assert not acquire(buckets, "a", 0.0)[0]
+    acquire(buckets, "b", 0.0)
+    acquire(buckets, "c", 0.0)
+    assert len(buckets._buckets) == 2
+    assert acquire(buckets, "a", 0.0)[0]
+
+
+def scope(forwarded=None, client=("10.0.0.9", 1234)):
+    headers = [(b"x-forwarded-for", value.encode()) for value in forwarded or ()]
+    return {"type": "http", "headers": headers, "client": client}
+
+
+@pytest.mark.parametrize("forwarded, trusted, expected", [
+    ([], 0, "10.0.0.9"),
+    (["1.1.1.1"], 0, "10.0.0.9"),
+    (["6.6.6.6, 1.1.1.1"], 1, "1.1.1.1"),
+    (["6.6.6.6, 1.1.1.1, 10.0.0.2"], 2, "1.1.1.1"),
+    (["6.6.6.6", "1.1.1.1, 10.0.0.2"], 2, "1.1.1.1"),
+    (["1.1.1.1, "], 1, "1.1.1.1"),
+    # Fewer hops than trusted proxies: the chain is broken, use the peer
+    (["1.1.1.1"], 2, "10.0.0.9"),
+])
+def test_client_ip_takes_the_rightmost_trusted_hop(forwarded, trusted, expected):
+    assert client_ip(scope(forwarded), trusted) == expected
+
+
+def test_client_ip_without_a_peer():
+    assert client_ip(scope(client=None)) == "unknown"
+
+
+def test_429_after_the_bucket_empties():
+    registry = Registry()
+    app = RateLimitMiddleware(main.app, MemoryBuckets(rate=0.01, burst=2), registry=registry)
+    with TestClient(app) as client:
+        first, second, third = (client.post("/api/recommend", json=PROFILE) for _ in range(3))
+        assert first.status_code == second.status_code == 200
+        assert third.status_code == 429
+        assert third.json() == {"detail": "Too Many Requests"}
+        assert third.headers["retry-after"] == "100"
+        # Outside the prefix isn't limited
+        assert client.get("/health").status_code != 429
+    assert registry.families["rate_limited_total"].series == {("memory",): 1}
+
+
+def test_a_failing_backend_lets_requests_through():
+    class Broken:
+        name = "broken"
+
+        async def acquire(self, client, now=None):
+            raise ConnectionError("down")
+
+    with TestClient(RateLimitMiddleware(main.app, Broken())) as client:
+        assert client.post("/api/recommend", json=PROFILE).status_code == 200
+
+
+@pytest.mark.parametrize("environ, expected", [
+    ({}, None),
+    ({"RATE_LIMIT_PER_SECOND": "0"}, None),
+    ({"RATE_LIMIT_PER_SECOND": "5"}, ("memory", 5.0, 10.0)),
+    ({"RATE_LIMIT_PER_SECOND": "0.2"}, ("memory", 0.2, 1.0)),
+    ({"RATE_LIMIT_PER_SECOND": "5", "RATE_LIMIT_BURST": "3"}, ("memory", 5.0, 3.0)),
+    ({"RATE_LIMIT_PER_SECOND": "5", "RATE_LIMIT_REDIS_URL": "redis://localhost"}, ("redis", 5.0, 10.0)),
+])
+def test_backend_from_env(environ, expected):
+    backend = backend_from_env(environ)
+    assert (backend and (backend.name, backend.rate, backend.burst)) == expected
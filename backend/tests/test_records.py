@@ -0,0 +1,78 @@
+import dataclasses
+import json
+
+import pytest
+
+from benchmarks.synthetic import seed_records, synthetic_records
+from catalog import compile_catalog, encode_json
+from records import Country
+
+
+def test_to_dict_rebuilds_the_record():
+    for record in synthetic_records(50, seed=4):
+        assert json.dumps(Country.from_dict(record).to_dict()) == json.dumps(record)
+
+
+def test_numbers_keep_their_type():
+    record = seed_records()[0]
+    record = {**record, "total_cost": 12, "min_gpa": 6.0, "costs": {**record["costs"], "tuition": 0.0}}
+    country = Country.from_dict(record, {})
+    assert encode_json(country.to_dict()) == encode_json(record)
+    # 0 and 0.0 are equal, but mustn't share a pooled Costs
+    pool = {}
+    other = Country.from_dict({**record, "costs": {**record["costs"], "tuition": 0}}, pool)
+    again = Country.from_dict(record, pool)
+    assert other.costs is not again.costs
+    assert type(other.costs.tuition) is int and type(again.costs.tuition) is float
+
+
+def test_equal_sub_records_are_shared():
+    records = synthetic_records(60, seed=4)
+    pool = {}
+    countries = [Country.from_dict(r, pool) for r in records]
+    # Synthetic records beyond the first few are clones of the real countries
+    by_flag = {}
+    for country, record in zip(countries, records):
+        by_flag.setdefault(record["flag"], []).append(country)
+    for clones in by_flag.values():
+        first = clones[0]
+        for clone in clones[1:]:
+            assert clone.pr_branches is first.pr_branches
+            assert clone.policy_alerts is first.policy_alerts
+            assert clone.action_deadlines is first.action_deadlines
+            assert clone.timeline_steps is first.timeline_steps
+
+
+def test_records_are_immutable():
+    country = Country.from_dict(seed_records()[0])
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        country.total_cost = 0
+    assert not hasattr(country, "__dict__")
+
+
+def test_unknown_fields_are_rejected():
+    with pytest.raises(ValueError, match="shoe_size"):
+        Country.from_dict({**seed_records()[0], "shoe_size": 42})
+
+
+def test_deadlines_by_intake():
+    record = seed_records()[0]
+    country = Country.from_dict(record)
+    for intake, tasks in record["action_deadlines"].items():
+        assert [t.to_dict() for t in country.deadlines(intake)] == tasks
+    assert country.deadlines("Winter 1999") == ()
+
+
+def test_numeric_columns_match_rows():
+    records = synthetic_records(100, seed=4)
+    catalog = compile_catalog(records)
+    for name, column in catalog.columns.items():
+        assert column.typecode == "d"
+        assert list(column) == [float(r[name]) for r in records]
+
+
+def test_static_json_is_the_record():
+    records = synthetic_records(30, seed=4)
+    catalog = compile_catalog(records)
+    for row, record in zip(catalog.rows, records):
+        assert row.static_json == encode_json(record).encode("utf-8")
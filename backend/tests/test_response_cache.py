@@ -0,0 +1,76 @@
+import pytest
+
+import main
+from response_cache import CachedResponse, ResponseCache, etag_matches
+
+
+def test_matching_etag_gets_304(client, profile):
+    first = client.post("/api/recommend", json=profile)
+    etag = first.headers["etag"]
+    again = client.post("/api/recommend", json=profile, headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == etag
+
+
+def test_other_etag_gets_the_body(client, profile):
+    first = client.post("/api/recommend", json=profile)
+    other = client.post("/api/recommend", json={**profile, "budget": 26.0},
+                        headers={"If-None-Match": first.headers["etag"]})
+    assert other.status_code == 200
+    assert other.headers["etag"] != first.headers["etag"]
+    assert other.content != first.content
+
+
+@pytest.mark.parametrize("header, expected", [
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"x", "abc"', True),
+    ("*", True),
+    ('"abcd"', False),
+    ("", False),
+    (None, False),
+])
+def test_etag_matches(header, expected):
+    assert etag_matches(header, '"abc"') is expected
+
+
+def test_cached_bodies_equal_fresh_ones(client, profile):
+    # GPAs within a cut share an entry; every one must still get its own exact body
+    cases = [{**profile, "gpa": gpa, "budget": budget}
+             for gpa in (5.0, 5.5, 6.4, 6.5, 6.51, 7.0, 7.9, 8.0, 9.9) for budget in (10, 10.0, 25.5, 60)]
+    warm = [client.post("/api/recommend", json=case).content for case in cases]
+    assert main.RESPONSE_CACHE.hits > 0
+    for case, body in zip(cases, warm):
+        main.RESPONSE_CACHE.clear()
+        assert client.post("/api/recommend", json=case).content == body
+
+
+@pytest.mark.parametrize("base, field", [({"budget": 0.0}, "budget"), ({"gpa": 0.0, "budget": 0.0}, "gpa")])
+def test_negative_zero_has_its_own_entry(client, profile, base, field):
+    # -0.0 == 0.0, but the messages echo it as "-0.0"
+    first, second = ({**profile, **base, field: value} for value in (0.0, -0.0))
+    client.post("/api/recommend", json=first)
+    cached = client.post("/api/recommend", json=second).content
+    main.RESPONSE_CACHE.clear()
+    assert cached == client.post("/api/recommend", json=second).content
+    assert b"-0.0" in cached
+
+
+def test_cache_is_bounded_and_scoped_to_a_version():
+    cache = ResponseCache(max_entries=3, max_bytes=10)
+    for key in "abcd":
+        cache.put("v1", key, b"xx")
+    assert len(cache) == 3 and cache.get("v1", "a") is None
+    cache.put("v1", "e", b"x" * 5)
+    assert cache.size_bytes <= 10
+    assert cache.get("v1", "e").body == b"x" * 5
+    # Too big to keep, but still returned
+    assert cache.put("v1", "f", b"x" * 11).body == b"x" * 11
+    assert cache.get("v1", "f") is None
+    assert cache.get("v2", "e") is None
+    assert len(cache) == 0
+
+
+def test_etag_depends_only_on_the_body():
+    assert CachedResponse(b"{}").etag == CachedResponse(b"{}").etag != CachedResponse(b"[]").etag
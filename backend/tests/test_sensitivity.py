@@ -0,0 +1,81 @@
+import math
+from collections import Counter
+
+import pytest
+
+import sensitivity
+from benchmarks.synthetic import synthetic_catalog
+from catalog import ARCHETYPES, classify_gap
+
+
+@pytest.fixture(scope="module")
+def synthetic():
+    return synthetic_catalog(400, seed=5)
+
+
+def health_counts(catalog, gpa, budget):
+    counts = Counter({level: 0 for level in sensitivity.HEALTH_LEVELS})
+    counts.update(classify_gap(row.total_cost - budget, row.is_moonshot)[1]
+                  for row in catalog.rows if row.min_gpa <= gpa)
+    return dict(counts)
+
+
+def bucket_counts(catalog, gpa):
+    return {archetype: len(rows) for archetype, rows in catalog.match(gpa).items()}
+
+
+@pytest.mark.parametrize("gpa", [6.0, 7.3, 10.0])
+def test_budget_steps_are_exact(synthetic, gpa):
+    steps = sensitivity.budget_steps(synthetic, gpa, 25.0)
+    assert steps["initial"] == health_counts(synthetic, gpa, -math.inf)
+    previous = steps["initial"]
+    for step in steps["steps"]:
+        # Nothing changes until exactly "at", then the step's counts hold
+        assert health_counts(synthetic, gpa, math.nextafter(step["at"], -math.inf)) == previous
+        assert health_counts(synthetic, gpa, step["at"]) == step["counts"]
+        previous = step["counts"]
+    assert health_counts(synthetic, gpa, math.inf) == previous
+
+
+def test_gpa_steps_are_exact(synthetic):
+    steps = sensitivity.gpa_steps(synthetic, 7.0, 25.0)
+    assert steps["initial"] == bucket_counts(synthetic, -math.inf)
+    previous = steps["initial"]
+    for step in steps["steps"]:
+        assert bucket_counts(synthetic, math.nextafter(step["at"], -math.inf)) == previous
+        assert bucket_counts(synthetic, step["at"]) == step["counts"]
+        for enter in step["enters"]:
+            row = synthetic.by_id[enter["id"]]
+            assert row.min_gpa == step["at"]
+            assert enter["financial_health"] == classify_gap(row.total_cost - 25.0, row.is_moonshot)[1]
+        previous = step["counts"]
+    assert set(previous) == set(ARCHETYPES)
+
+
+def test_next_is_the_smallest_increase_that_changes_anything(synthetic):
+    result = sensitivity.sensitivity(synthetic, 7.0, 25.0)
+    upcoming = result["by_budget"]["next"]
+    assert upcoming["at"] == min(step["at"] for step in result["by_budget"]["steps"] if step["at"] > 25.0)
+    assert upcoming["increase"] == upcoming["at"] - 25.0
+    upcoming = result["by_gpa"]["next"]
+    assert upcoming["at"] == min(step["at"] for step in result["by_gpa"]["steps"] if step["at"] > 7.0)
+    assert sensitivity.sensitivity(synthetic, 10.0, 1e9)["by_gpa"]["next"] is None
+
+
+def test_endpoint(client, catalog):
+    response = client.get("/api/sensitivity", params={"gpa": 7.0, "budget": 20})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "success"
+    assert body["catalog_version"] == catalog.version
+    assert body["by_budget"]["next"] == {
+        "at": 25, "increase": 5,
+        "changes": [{"id": "united-kingdom", "financial_health": "manageable"},
+                    {"id": "canada", "financial_health": "manageable"},
+                    {"id": "ireland", "financial_health": "excellent"}]}
+
+
+@pytest.mark.parametrize("query", ["gpa=nan&budget=20", "gpa=7&budget=inf", "gpa=7&budget=-Infinity",
+                                   "gpa=7", "gpa=seven&budget=20"])
+def test_endpoint_rejects_invalid_numbers(client, query):
+    assert client.get(f"/api/sensitivity?{query}").status_code == 422
@@ -0,0 +1,77 @@
+import hashlib
+import json
+import os
+import shutil
+
+import pytest
+
+import core_engine
+from benchmarks.synthetic import synthetic_catalog
+from catalog_store import DEFAULT_CATALOG_PATH
+from shared_catalog import Segment, SharedCatalogStore, write_segment
+
+GOLDEN = os.path.join(os.path.dirname(__file__), "data", "recommend_golden.json")
+INTAKES = ("Fall 2025", "Spring 2026", "Fall 2026", "Winter 1999")
+
+
+@pytest.fixture
+def data_file(tmp_path):
+    path = tmp_path / "countries.json"
+    shutil.copyfile(DEFAULT_CATALOG_PATH, path)
+    return path
+
+
+def test_segment_rows_match_the_compiled_catalog(tmp_path):
+    compiled = synthetic_catalog(300, seed=6)
+    write_segment(compiled, str(tmp_path / "segment.bin"))
+    shared = Segment(str(tmp_path / "segment.bin")).catalog()
+    assert shared.version == compiled.version
+    assert bytes(shared.index_json) == compiled.index_json
+    for name, column in compiled.columns.items():
+        assert list(shared.columns[name]) == list(column)
+    for ours, theirs in zip(shared.rows, compiled.rows):
+        assert (ours.id, ours.name, ours.archetype, ours.min_gpa, ours.total_cost, ours.roi_percentage) == (
+            theirs.id, theirs.name, theirs.archetype, theirs.min_gpa, theirs.total_cost, theirs.roi_percentage)
+        assert type(ours.total_cost) is type(theirs.total_cost)
+        assert ours.record == theirs.record
+        for intake in INTAKES:
+            for fields in (None, frozenset({"name", "gap_value", "deadlines"})):
+                assert ours.encode(27.5, intake, fields) == theirs.encode(27.5, intake, fields)
+
+
+def test_not_a_segment(tmp_path):
+    path = tmp_path / "junk.bin"
+    path.write_bytes(b"\x00" * 64)
+    with pytest.raises(ValueError):
+        Segment(str(path))
+
+
+def test_recommend_is_byte_identical_from_a_shared_segment(client, data_file, tmp_path, monkeypatch):
+    monkeypatch.setattr(core_engine, "_store", SharedCatalogStore(str(data_file), str(tmp_path / "shared")))
+    with open(GOLDEN, encoding="utf-8") as f:
+        cases = json.load(f)["cases"]
+    for case in cases:
+        content = client.post("/api/recommend", json=case["profile"]).content
+        assert hashlib.sha256(content).hexdigest() == case["sha256"], case["profile"]
+
+
+def test_workers_share_one_compile_and_follow_new_generations(data_file, tmp_path):
+    directory = str(tmp_path / "shared")
+    first = SharedCatalogStore(str(data_file), directory)
+    second = SharedCatalogStore(str(data_file), directory)
+    assert first.generation == second.generation == 1
+    assert first.segment == second.segment
+
+    old = second.catalog
+    data = json.loads(data_file.read_text(encoding="utf-8"))
+    data["countries"][0]["tagline"] = "Edited"
+    data_file.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    assert first.reload() is True
+    assert first.generation == 2
+
+    assert second.refresh() is True
+    assert second.generation == 2
+    assert second.catalog.rows[0].record["tagline"] == "Edited"
+    # The replaced segment's file is gone, but catalogs still holding its mapping keep working
+    assert old.rows[0].record["tagline"] != "Edited"
+    assert second.refresh() is False
@@ -0,0 +1,142 @@
+import json
+import threading
+
+import numpy as np
+import pytest
+
+import similarity
+from benchmarks.similarity import Profile, synthetic_records
+from similarity import SimilarityIndex, append_segment, concat, load_index, write_segment
+
+RECORDS = synthetic_records(20_000, seed=3)
+PROFILE = {"degree": "Bachelors", "gpa": 7.5, "major": "Computer Science", "budget": 25.0, "priority": "High ROI"}
+
+
+def queries(count=40, seed=5):
+    rng = np.random.default_rng(seed)
+    picked = [RECORDS[i] for i in rng.integers(0, len(RECORDS), count)]
+    # Off-grid GPAs and budgets, and categories the index has never seen
+    profiles = [Profile({**r, "gpa": r["gpa"] + rng.normal(0, 0.3), "budget": r["budget"] * rng.uniform(0.7, 1.4)})
+                for r in picked]
+    profiles.append(Profile({**picked[0], "major": "Astrology", "degree": "PhD", "gpa": 0.0, "budget": 900.0}))
+    return profiles
+
+
+def brute_force(index, profile, k):
+    grid, tail = index._state
+    columns = concat(grid.columns, tail)
+    distance = index._distances(columns, np.arange(len(columns["gpa"])), index.query(profile))
+    return [round(float(d), 4) for d in np.sort(distance)[:k]]
+
+
+@pytest.mark.parametrize("k", [1, 20, similarity.MAX_K])
+def test_nearest_is_exact(k):
+    index = SimilarityIndex()
+    index.add_records(RECORDS, merge=True)
+    for profile in queries():
+        result = index.nearest(profile, k)
+        assert [n["distance"] for n in result["neighbours"]] == brute_force(index, profile, k)
+        assert sum(d["count"] for d in result["destinations"]) == result["k"] == k
+
+
+def test_unmerged_appends_are_searched():
+    index = SimilarityIndex()
+    index.add_records(RECORDS[:15_000], merge=True)
+    index.add_records(RECORDS[15_000:], merge=False)
+    assert len(index._state[1]["gpa"]) == 5000 and len(index) == len(RECORDS)
+    for profile in queries():
+        distances = [n["distance"] for n in index.nearest(profile, 20)["neighbours"]]
+        assert distances == brute_force(index, profile, 20)
+
+
+def test_appends_are_merged_in_the_background(monkeypatch):
+    monkeypatch.setattr(similarity, "MAX_TAIL", 1000)
+    index = SimilarityIndex()
+    index.add_records(RECORDS[:10_000], merge=True)
+    # Hold the merge until more records have been appended behind it
+    started, release = threading.Event(), threading.Event()
+
+    class Gated(similarity.Grid):
+        def __init__(self, columns, sizes):
+            started.set()
+            release.wait(10)
+            super().__init__(columns, sizes)
+
+    monkeypatch.setattr(similarity, "Grid", Gated)
+    index.add_records(RECORDS[10_000:11_500])
+    assert started.wait(10)
+    index.add_records(RECORDS[11_500:14_000])
+    assert len(index._state[1]["gpa"]) == 4000
+    release.set()
+    index.wait_merged()
+    # The 1500 first merged, then the 2500 appended meanwhile
+    assert len(index._state[1]["gpa"]) == 0 and len(index) == 14_000
+    for profile in queries(10):
+        distances = [n["distance"] for n in index.nearest(profile, 20)["neighbours"]]
+        assert distances == brute_force(index, profile, 20)
+
+
+def test_fewer_records_than_k():
+    index = SimilarityIndex()
+    assert index.nearest(Profile(RECORDS[0]), 5) == {"k": 0, "records": 0, "destinations": [], "neighbours": []}
+    index.add_records(RECORDS[:3])
+    assert index.nearest(Profile(RECORDS[0]), 5)["k"] == 3
+
+
+def test_categories_are_normalized():
+    index = SimilarityIndex()
+    # Profile asks as a self-funded student
+    index.add_records([{**RECORDS[0], "major": "Computer Science", "funding_source": "self"}], merge=True)
+    profile = Profile({**RECORDS[0], "major": "  computer   SCIENCE "})
+    assert index.nearest(profile, 1)["neighbours"][0]["distance"] == 0
+
+
+def test_segments_round_trip(tmp_path):
+    path = str(tmp_path / "outcomes.npz")
+    write_segment(path, RECORDS[:12_000])
+    assert append_segment(path, RECORDS[12_000:16_000]) == str(tmp_path / "outcomes.0001.npz")
+    assert append_segment(path, RECORDS[16_000:]) == str(tmp_path / "outcomes.0002.npz")
+    loaded = load_index(path)
+    built = SimilarityIndex()
+    built.add_records(RECORDS, merge=True)
+    assert len(loaded) == len(built)
+    for profile in queries(10):
+        assert loaded.nearest(profile, 20) == built.nearest(profile, 20)
+
+
+def test_refresh_loads_new_segments(tmp_path, monkeypatch):
+    path = str(tmp_path / "outcomes.npz")
+    write_segment(path, RECORDS[:1000])
+    monkeypatch.setenv("SIMILARITY_PATH", path)
+    monkeypatch.setattr(similarity, "_index", None)
+    assert len(similarity.load_from_env()) == 1000
+    assert similarity.refresh() == 0
+    append_segment(path, RECORDS[1000:1500])
+    assert similarity.refresh() == 1
+    assert len(similarity.get_index()) == 1500
+
+
+def test_similar_is_404_without_an_index(client, monkeypatch):
+    monkeypatch.setattr(similarity, "_index", None)
+    response = client.post("/api/recommend", params={"similar": 5}, json=PROFILE)
+    assert response.status_code == 404
+
+
+def test_similar_appends_a_section(client, monkeypatch):
+    index = SimilarityIndex()
+    index.add_records(RECORDS[:2000], merge=True)
+    monkeypatch.setattr(similarity, "_index", index)
+    plain = client.post("/api/recommend", json=PROFILE).json()
+    body = client.post("/api/recommend", params={"similar": 5}, json=PROFILE).json()
+    section = body.pop("similar_profiles")
+    assert body == plain
+    assert section["k"] == 5 and len(section["neighbours"]) == 5
+    assert all("name" in d and "flag" in d for d in section["destinations"])
+    for k in (0, similarity.MAX_K + 1):
+        assert client.post("/api/recommend", params={"similar": k}, json=PROFILE).status_code == 422
+
+
+def test_read_records(tmp_path):
+    path = tmp_path / "records.jsonl"
+    path.write_text("\n".join(json.dumps(r) for r in RECORDS[:3]) + "\n\n", encoding="utf-8")
+    assert similarity.read_records(str(path)) == RECORDS[:3]
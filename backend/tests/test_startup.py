@@ -0,0 +1,79 @@
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+@pytest.fixture
+def starting(monkeypatch):
+    monkeypatch.setitem(main.STARTUP, "ready", False)
+    monkeypatch.setitem(main.STARTUP, "seconds", None)
+
+
+def request_body(user):
+    return {"degree": user.degree, "gpa": user.gpa, "major": user.major, "budget": user.budget,
+            "priority": user.priority}
+
+
+def test_health_is_503_until_ready(client, catalog, starting):
+    response = client.get("/health")
+    assert response.status_code == 503
+    assert response.json()["status"] == "starting"
+    # Everything else serves as normal meanwhile
+    assert client.post("/api/recommend", json=request_body(main.warmup_requests(catalog)[0])).status_code == 200
+
+
+def test_health_reports_cold_then_warm(client, catalog):
+    body = client.get("/health").json()
+    assert (body["status"], body["state"], body["countries"]) == ("operational", "cold", len(catalog))
+    assert body["catalog_version"] == catalog.version
+    client.post("/api/recommend", json=request_body(main.warmup_requests(catalog)[0]))
+    assert client.get("/health").json()["state"] == "warm"
+
+
+def test_warmup_requests_are_the_cut_points_nearest_a_typical_gpa(catalog):
+    users = main.warmup_requests(catalog)
+    gpas = [user.gpa for user in users]
+    cuts = {row.min_gpa for row in catalog.rows}
+    assert len(gpas) == min(len(cuts), main.WARMUP_PROFILES) == len(set(gpas))
+    assert set(gpas) <= cuts
+    distances = [abs(gpa - main.WARMUP_GPA) for gpa in gpas]
+    assert distances == sorted(distances)
+    assert all(abs(cut - main.WARMUP_GPA) >= distances[-1] for cut in cuts - set(gpas))
+
+
+def test_warm_up_prerenders_identical_bodies(client, catalog, starting):
+    users = main.warmup_requests(catalog)
+    asyncio.run(main.warm_up(catalog))
+    assert main.STARTUP["ready"] and main.STARTUP["seconds"] >= 0
+    assert len(main.RESPONSE_CACHE) == len(users)
+
+    hits = main.RESPONSE_CACHE.hits
+    warmed = [client.post("/api/recommend", json=request_body(user)).content for user in users]
+    assert main.RESPONSE_CACHE.hits == hits + len(users)
+    main.RESPONSE_CACHE.clear()
+    assert [client.post("/api/recommend", json=request_body(user)).content for user in users] == warmed
+
+
+def test_a_failing_warm_up_still_reports_ready(catalog, starting, monkeypatch):
+    def broken(catalog):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(main, "warm_catalog", broken)
+    asyncio.run(main.warm_up(catalog))
+    assert main.STARTUP["ready"]
+
+
+def test_lifespan_warms_in_the_background(starting, monkeypatch):
+    monkeypatch.setattr(main, "WARMUP", True)
+    main.RESPONSE_CACHE.clear()
+    with TestClient(main.app) as client:
+        deadline = time.monotonic() + 30
+        while client.get("/health").status_code == 503:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        assert client.get("/health").json()["state"] == "warm"
+    main.RESPONSE_CACHE.clear()
@@ -0,0 +1,124 @@
+import asyncio
+import json
+
+import pytest
+
+import ai_advisor
+import core_engine
+import main
+import streaming
+from benchmarks.synthetic import synthetic_catalog
+from catalog_store import DEFAULT_CATALOG_PATH, CatalogStore
+
+
+class RecordingAdvisor:
+    def __init__(self):
+        self.countries = []
+
+    async def advise(self, profile, country_data):
+        self.countries.append(country_data["name"])
+        return f"note for {country_data['name']}"
+
+
+@pytest.fixture
+def advisor(monkeypatch):
+    advisor = RecordingAdvisor()
+    monkeypatch.setattr(ai_advisor, "get_advisor", lambda: advisor)
+    return advisor
+
+
+def events(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def listed_names(body):
+    return sorted(row["name"] for rows in body["strategies"].values() for row in rows)
+
+
+def test_body_first_then_a_note_per_row(client, advisor, profile):
+    stream = events(client.post("/api/recommend/stream", json=profile))
+    expected = client.post("/api/recommend", json=profile).json()
+    assert stream[0] == {"event": "recommendation", "data": expected}
+    notes = [e["data"] for e in stream if e["event"] == "advisor_note"]
+    assert sorted(note["name"] for note in notes) == listed_names(expected)
+    assert all(note["note"] == f"note for {note['name']}" and note["source"] == "ai" for note in notes)
+    assert stream[-1] == {"event": "done", "data": {"advisor_notes": len(notes)}}
+
+
+@pytest.mark.parametrize("query", ["?rank=score&top=1", "?rank=pareto", "?rank=score&top=2&view=summary"])
+def test_notes_only_for_rows_in_the_body(client, advisor, profile, query):
+    profile = {**profile, "gpa": 9.0, "budget": 60.0}
+    stream = events(client.post(f"/api/recommend/stream{query}", json=profile))
+    body = stream[0]["data"]
+    assert body == client.post(f"/api/recommend{query}", json=profile).json()
+    assert sorted(advisor.countries) == listed_names(body)
+    assert stream[-1]["data"]["advisor_notes"] == len(advisor.countries)
+    assert sum(body["meta"][k] for k in ("safe_count", "fast_count", "moonshot_count")) > len(advisor.countries)
+
+
+def test_sse_framing(client, advisor, profile):
+    text = client.post("/api/recommend/stream?format=sse", json=profile).text
+    frames = [frame for frame in text.split("\n\n") if frame]
+    assert frames[0].startswith("event: recommendation\ndata: {")
+    assert frames[-1] == 'event: done\ndata: {"advisor_notes":%d}' % len(advisor.countries)
+
+
+def test_offline_notes_are_labelled(client, profile, monkeypatch):
+    monkeypatch.setattr(main.ai_advisor, "get_advisor", lambda: ai_advisor.AdvisorService())
+    stream = events(client.post("/api/recommend/stream", json=profile))
+    notes = [e["data"] for e in stream if e["event"] == "advisor_note"]
+    assert notes and all(n["note"] == ai_advisor.OFFLINE_NOTE and n["source"] == "offline" for n in notes)
+
+
+class Row:
+    def __init__(self, n):
+        self.id = self.name = f"row-{n}"
+        self.archetype = "safe_bets"
+
+
+class SlowAdvisor:
+    def __init__(self):
+        self.running = self.peak = 0
+
+    async def advise(self, profile, country_data):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        await asyncio.sleep(0.001)
+        self.running -= 1
+        return "note"
+
+
+def test_rows_are_only_read_after_the_body_and_by_a_bounded_pool():
+    consumed = []
+
+    def countries():
+        for n in range(50):
+            consumed.append(n)
+            yield Row(n), {}
+
+    async def scenario():
+        advisor = SlowAdvisor()
+        events = streaming.recommendation_events("ndjson", b"{}", advisor, {}, countries(), workers=4)
+        first = await events.__anext__()
+        assert consumed == []
+        rest = [frame async for frame in events]
+        return advisor, b"".join([first] + rest)
+
+    advisor, text = asyncio.run(scenario())
+    lines = [json.loads(line) for line in text.splitlines()]
+    assert lines[0] == {"event": "recommendation", "data": {}}
+    assert len(consumed) == 50 and advisor.peak == 4
+    assert lines[-1] == {"event": "done", "data": {"advisor_notes": 50}}
+
+
+def test_notes_are_capped_per_bucket(client, advisor, monkeypatch):
+    store = CatalogStore(DEFAULT_CATALOG_PATH)
+    store.publish(synthetic_catalog(300, seed=1))
+    monkeypatch.setattr(core_engine, "_store", store)
+    monkeypatch.setattr(streaming, "NOTES_PER_BUCKET", 3)
+    profile = {"degree": "Bachelors", "gpa": 9.5, "major": "Computer Science", "budget": 80.0, "priority": "High ROI"}
+    stream = events(client.post("/api/recommend/stream", json=profile))
+    body = stream[0]["data"]
+    expected = sorted(row["name"] for rows in body["strategies"].values() for row in rows[:3])
+    assert sorted(advisor.countries) == expected
+    assert len(advisor.countries) == 9 < sum(len(rows) for rows in body["strategies"].values())
@@ -0,0 +1,157 @@
+import random
+
+import pytest
+
+import core_engine
+import main
+import whatif
+from benchmarks.synthetic import synthetic_catalog
+from benchmarks.whatif import slider_walk
+from catalog import classify_gap
+from catalog_store import DEFAULT_CATALOG_PATH, CatalogStore
+from fast_path import RecommendProfile
+from whatif import WhatIfSessions, apply_delta, health_changes
+
+PROFILE = slider_walk(1)[0]
+
+
+@pytest.fixture(autouse=True)
+def sessions(monkeypatch):
+    """Fresh sessions per test, so session ids don't carry over."""
+    monkeypatch.setattr(main, "WHATIF_SESSIONS", WhatIfSessions())
+
+
+@pytest.fixture
+def large_catalog(monkeypatch):
+    """A 300-country synthetic catalog installed as the live one."""
+    store = CatalogStore(DEFAULT_CATALOG_PATH)
+    store.publish(synthetic_catalog(300, seed=2))
+    monkeypatch.setattr(core_engine, "_store", store)
+    return store.catalog
+
+
+class Slider:
+    """A client of one what-if session, keeping the body its deltas stand for."""
+
+    def __init__(self, client, session="s1", view="full"):
+        self.client = client
+        self.view = view
+        self.headers = {"X-Session-Id": session}
+        self.state = None
+
+    def move(self, profile, **headers):
+        response = self.client.post(f"/api/whatif?view={self.view}", json=profile,
+                                    headers={**self.headers, **headers})
+        assert response.status_code == 200
+        delta = response.json()
+        self.headers["X-Whatif-Revision"] = str(delta["revision"])
+        self.state = apply_delta(self.state, delta)
+        return delta
+
+
+def full_body(client, profile, view="full"):
+    return client.post(f"/api/recommend?view={view}", json=profile).json()
+
+
+@pytest.mark.parametrize("view", ["full", "summary"])
+@pytest.mark.parametrize("catalog_fixture", ["catalog", "large_catalog"])
+def test_deltas_round_trip_to_the_recommend_body(client, request, view, catalog_fixture):
+    request.getfixturevalue(catalog_fixture)
+    slider = Slider(client, view=view)
+    for step, profile in enumerate(slider_walk(150, seed=1)):
+        delta = slider.move(profile)
+        assert delta["reset"] is (step == 0)
+        assert slider.state == full_body(client, profile, view), step
+
+
+def test_deltas_are_small(client, large_catalog):
+    slider = Slider(client)
+    profiles = slider_walk(30, seed=4)
+    slider.move(profiles[0])
+    for profile in profiles[1:]:
+        delta = client.post("/api/whatif", json=profile, headers=slider.headers)
+        slider.headers["X-Whatif-Revision"] = str(delta.json()["revision"])
+        assert len(delta.content) < len(client.post("/api/recommend", json=profile).content) / 10
+
+
+@pytest.mark.parametrize("change", [
+    {"target_intake": "Spring 2026"},
+    {"view": "summary"},
+    {"revision": "99"},
+])
+def test_resets(client, catalog, change):
+    slider = Slider(client)
+    profiles = slider_walk(3, seed=2)
+    slider.move(profiles[0])
+    assert slider.move(profiles[1])["reset"] is False
+    profile = {**profiles[2], **{k: v for k, v in change.items() if k == "target_intake"}}
+    slider.view = change.get("view", slider.view)
+    headers = {"X-Whatif-Revision": change["revision"]} if "revision" in change else {}
+    delta = slider.move(profile, **headers)
+    assert delta["reset"] is True
+    assert slider.state == full_body(client, profile, slider.view)
+
+
+def test_a_catalog_reload_resets(client, catalog, monkeypatch):
+    slider = Slider(client)
+    slider.move(PROFILE)
+    store = CatalogStore(DEFAULT_CATALOG_PATH)
+    store.publish(synthetic_catalog(50, seed=8))
+    monkeypatch.setattr(core_engine, "_store", store)
+    assert slider.move(PROFILE)["reset"] is True
+    assert slider.state == full_body(client, PROFILE)
+
+
+def test_without_a_revision_the_session_continues(client):
+    slider = Slider(client)
+    first, second = slider_walk(2, seed=3)
+    slider.move(first)
+    del slider.headers["X-Whatif-Revision"]
+    assert slider.move(second)["reset"] is False
+
+
+def test_delete_ends_the_session(client):
+    slider = Slider(client)
+    slider.move(PROFILE)
+    assert client.delete("/api/whatif", headers={"X-Session-Id": "s1"}).status_code == 204
+    assert slider.move(PROFILE)["reset"] is True
+
+
+def test_session_id_is_required(client):
+    assert client.post("/api/whatif", json=PROFILE).status_code == 422
+    assert client.post("/api/whatif", json=PROFILE, headers={"X-Session-Id": ""}).status_code == 422
+
+
+def test_currency(client):
+    slider = Slider(client)
+    slider.move({**PROFILE, "budget": 30000, "currency": "USD"})
+    usd = slider.state
+    assert (usd["meta"]["currency"], usd["meta"]["unit"]) == ("INR", 100_000)
+    assert slider.move({**PROFILE, "budget": 30000 * 84.0 / 100_000})["reset"] is False
+    plain = slider.state
+    assert plain == {**usd, "meta": {k: v for k, v in usd["meta"].items() if k not in ("currency", "unit")}}
+
+
+def test_sessions_are_bounded(catalog):
+    sessions = WhatIfSessions(max_sessions=2)
+    user = RecommendProfile("Bachelors", 7.5, "", 25.0, "High ROI", None, None)
+    projection = main.resolve_fields(catalog, "full", None)
+    for session in ("a", "b", "c"):
+        sessions.update(session, catalog, user, projection)
+    assert len(sessions) == 2
+    # "a" was evicted, "c" carries on
+    assert b'"reset":true' in sessions.update("a", catalog, user, projection)
+    assert b'"reset":false' in sessions.update("c", catalog, user, projection)
+    assert (sessions.resets, sessions.deltas) == (4, 1)
+
+
+def test_health_changes_match_a_scan(catalog):
+    rng = random.Random(0)
+    budgets = [0.0, 200.0] + [round(rng.uniform(0, 120), 1) for _ in range(200)]
+    # and exactly on every threshold
+    budgets += [row.total_cost - gap for row in catalog.rows for gap in (0, whatif.MANAGEABLE_GAP)]
+    for before, after in zip(budgets, budgets[1:]):
+        expected = [row for row in catalog.rows
+                    if classify_gap(row.total_cost - before, row.is_moonshot)[1]
+                    != classify_gap(row.total_cost - after, row.is_moonshot)[1]]
+        assert health_changes(catalog, before, after) == expected
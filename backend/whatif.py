@@ -0,0 +1,199 @@
+"""
+What-if sessions for the frontend's GPA and budget sliders.
+
+POST /api/whatif takes the same profile as /api/recommend plus a session
+id, and answers with what changed since that session's previous profile
+rather than the whole body:
+
+  entered    rows that became eligible, fully encoded, per bucket and id
+  left       ids of rows that are no longer eligible
+  changed    rows eligible before and after whose financial_health changed
+  order      the new id order of each bucket whose membership changed
+  consultant_note, risk_advisory, meta   only when they changed
+
+Between two GPAs only rows whose min_gpa lies between them can enter or
+leave, and between two budgets only rows whose total_cost (or total_cost
+minus MANAGEABLE_GAP) lies between them can change health. Both are
+bisects into the catalog's sorted indexes, so a slider step touches a
+handful of rows whatever the catalog size. Every other row's gap_value
+and "Gap: ₹xL" status follow from the budget each delta carries (see
+apply_delta).
+
+The first request of a session, an evicted session, a catalog reload, a
+new intake or view, or an X-Whatif-Revision other than the session's
+latest revision get "reset": true with every eligible row under
+"entered". Sessions live in a per-worker LRU, so behind several workers
+route a session to one worker or expect the odd reset.
+"""
+import os
+from collections import OrderedDict
+
+import advisory_rules
+import fx
+from catalog import ARCHETYPES, MANAGEABLE_GAP, classify_gap, encode_json, encode_number, slugify
+
+MAX_SESSIONS = int(os.getenv("WHATIF_SESSIONS", "10000"))
+
+# Slack around the health thresholds when picking candidate rows; the
+# candidates are then classified exactly, as CatalogRow.encode does
+THRESHOLD_SLACK = 1e-6
+
+
+class Session:
+    __slots__ = ("revision", "version", "gpa", "budget", "target_intake", "projection", "messages")
+
+    def __init__(self, revision, version, gpa, budget, target_intake, projection, messages):
+        self.revision = revision
+        self.version = version
+        self.gpa = gpa
+        self.budget = budget
+        self.target_intake = target_intake
+        self.projection = projection
+        # Encoded (consultant_note, risk_advisory, meta)
+        self.messages = messages
+
+
+def health_changes(catalog, before, after):
+    """Rows whose financial_health differs between two budgets, in catalog order."""
+    if before == after:
+        return []
+    low, high = min(before, after) - THRESHOLD_SLACK, max(before, after) + THRESHOLD_SLACK
+    candidates = {row.position: row for row in catalog.cost_between(low, high)}
+    candidates.update((row.position, row)
+                      for row in catalog.cost_between(low + MANAGEABLE_GAP, high + MANAGEABLE_GAP))
+    return [
+        row for _, row in sorted(candidates.items())
+        if classify_gap(row.total_cost - before, row.is_moonshot)[1]
+        != classify_gap(row.total_cost - after, row.is_moonshot)[1]
+    ]
+
+
+def encode_messages(user, matched):
+    counts = [len(matched[archetype]) for archetype in ARCHETYPES]
+    consultant_note, risk_advisory = advisory_rules.advisory_messages(user.gpa, user.budget, *counts)
+    meta = {"total_options": sum(counts), "safe_count": counts[0], "fast_count": counts[1],
+            "moonshot_count": counts[2]}
+    if getattr(user, "converted", False):
+        meta.update(fx.CATALOG_UNITS)
+    return encode_json(consultant_note).encode("utf-8"), encode_json(risk_advisory).encode("utf-8"), \
+        encode_json(meta).encode("utf-8")
+
+
+class WhatIfSessions:
+    """LRU of each session's last profile, bounded by session count."""
+
+    def __init__(self, max_sessions=MAX_SESSIONS):
+        self.max_sessions = max_sessions
+        self.resets = 0
+        self.deltas = 0
+        self._sessions = OrderedDict()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def update(self, session_id, catalog, user, projection, revision=None):
+        """
+        Encoded delta moving session_id from its previous profile to user
+        (in lakhs), which becomes the session's new state.
+        """
+        previous = self._sessions.pop(session_id, None)
+        reset = (previous is None or previous.version != catalog.version
+                 or previous.target_intake != user.target_intake or previous.projection != projection
+                 or (revision is not None and revision != previous.revision))
+        matched = catalog.match(user.gpa)
+        budget, intake = user.budget, user.target_intake
+
+        if reset:
+            self.resets += 1
+            entered = [row for rows in matched.values() for row in rows]
+            left, changed, moved = (), (), ()
+        else:
+            self.deltas += 1
+            old_cut, new_cut = catalog.cut(previous.gpa), catalog.cut(user.gpa)
+            crossed = [row for row in catalog.by_gpa[min(old_cut, new_cut):max(old_cut, new_cut)]
+                       if row.archetype in matched]
+            entered = crossed if new_cut > old_cut else ()
+            left = crossed if new_cut < old_cut else ()
+            # Eligible before and after: below both cuts
+            floor = min(previous.gpa, user.gpa)
+            changed = [row for row in health_changes(catalog, previous.budget, budget)
+                       if row.min_gpa <= floor and row.archetype in matched]
+            moved = {row.archetype for row in crossed}
+
+        messages = encode_messages(user, matched)
+        revision = previous.revision + 1 if previous is not None else 1
+        self._sessions[session_id] = Session(revision, catalog.version, user.gpa, budget, intake, projection,
+                                             messages)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+        by_archetype = {}
+        for row in sorted(entered, key=lambda r: r.position):
+            by_archetype.setdefault(row.archetype, []).append(
+                encode_json(row.id).encode("utf-8") + b":" + row.encode(budget, intake, projection))
+        updates = []
+        for row in changed:
+            financial_status, financial_health = classify_gap(row.total_cost - budget, row.is_moonshot)
+            updates.append({"id": row.id, "archetype": row.archetype, "financial_status": financial_status,
+                            "financial_health": financial_health})
+        order = {archetype: [row.id for row in matched[archetype]] for archetype in ARCHETYPES if archetype in moved}
+
+        parts = [
+            b'{"status":"success","revision":', str(revision).encode("ascii"),
+            b',"reset":', b"true" if reset else b"false",
+            b',"budget":', encode_number(float(budget)).encode("ascii"),
+            b',"entered":{',
+            b",".join(b'"' + archetype.encode("ascii") + b'":{' + b",".join(rows) + b"}"
+                      for archetype, rows in by_archetype.items()),
+            b'},"left":', encode_json([row.id for row in left]).encode("utf-8"),
+            b',"changed":', encode_json(updates).encode("utf-8"),
+            b',"order":', encode_json(order).encode("utf-8"),
+        ]
+        for name, value, old in zip((b"consultant_note", b"risk_advisory", b"meta"), messages,
+                                    previous.messages if not reset else (None,) * 3):
+            if value != old:
+                parts += (b',"', name, b'":', value)
+        parts.append(b"}")
+        return b"".join(parts)
+
+    def discard(self, session_id):
+        self._sessions.pop(session_id, None)
+
+
+def apply_delta(state, delta):
+    """
+    What a client does with a delta: the /api/recommend body (as parsed
+    JSON) it stands for, given the one the previous delta stood for
+    (ignored on reset). Rows are keyed by id (see catalog.slugify).
+    """
+    if delta["reset"]:
+        buckets = {archetype: {} for archetype in ARCHETYPES}
+        state = {}
+    else:
+        buckets = {archetype: {slugify(row["name"]): row for row in rows}
+                   for archetype, rows in state["strategies"].items()}
+    left = set(delta["left"])
+    for archetype in buckets:
+        buckets[archetype] = {id: row for id, row in buckets[archetype].items() if id not in left}
+    for archetype, rows in delta["entered"].items():
+        buckets[archetype].update(rows)
+    for archetype, ids in delta["order"].items():
+        buckets[archetype] = {id: buckets[archetype][id] for id in ids}
+    for update in delta["changed"]:
+        row = buckets[update["archetype"]][update["id"]]
+        row["financial_status"] = update["financial_status"]
+        row["financial_health"] = update["financial_health"]
+
+    budget = delta["budget"]
+    for rows in buckets.values():
+        for row in rows.values():
+            gap = row["total_cost"] - budget
+            if "gap_value" in row:
+                row["gap_value"] = gap
+            if row.get("financial_health", "excellent") != "excellent":
+                row["financial_status"] = f"Gap: ₹{gap:.1f}L"
+
+    result = {"status": "success", "strategies": {a: list(rows.values()) for a, rows in buckets.items()}}
+    for name in ("consultant_note", "risk_advisory", "meta"):
+        result[name] = delta[name] if name in delta else state[name]
+    return result